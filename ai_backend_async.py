@@ -0,0 +1,244 @@
+"""
+Async (ASGI) server for Pametna Njiva - same API as ai_backend_with_llm.py
+
+OpenWeatherMap and LLM calls are awaited instead of blocking a worker,
+so a single process keeps hundreds of field and chat requests in flight.
+Caches, prefetching, data watching and the GRIB fallback are shared with
+the Flask server, which stays available as `python ai_backend_with_llm.py`.
+
+Run with:
+    uvicorn ai_backend_async:app --host 0.0.0.0 --port 5000
+    hypercorn ai_backend_async:app --bind 0.0.0.0:5000
+    python ai_backend_async.py
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+
+from quart import Quart, Response, g, jsonify, request
+from quart_cors import cors
+
+from ai_backend_with_llm import (
+    _data_info_payload,
+    _health_payload,
+    _live_field_payload,
+    _metrics_payload,
+    _parse_fields,
+    _prefetch_register_payload,
+    _reload_payload,
+    _sse,
+    _stream_sse,
+    ai_engine,
+    metrics,
+)
+
+app = cors(Quart(__name__))
+
+
+def _sse_response(events):
+    return Response(
+        events,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.before_serving
+async def start_background_threads():
+    ai_engine.prefetcher.start()
+    ai_engine.data_watcher.start()
+
+
+@app.after_serving
+async def flush_recommendation_cache():
+    # Full-file write, kept off the event loop
+    await asyncio.to_thread(ai_engine.ai_model.recommendation_cache.flush)
+
+
+@app.before_request
+async def start_request_timer():
+    g.request_started = time.monotonic()
+
+
+@app.after_request
+async def record_request_time(response):
+    # Streamed responses are timed until their headers, not their last event
+    if 'request_started' in g:
+        metrics.observe(
+            'smartfield_request_seconds', time.monotonic() - g.request_started,
+            endpoint=request.url_rule.rule if request.url_rule else 'unmatched',
+            status=response.status_code
+        )
+    return response
+
+
+@app.route('/api/health', methods=['GET'])
+async def health_check():
+    return jsonify({**_health_payload(), 'server': 'asgi'})
+
+
+@app.route('/api/metrics', methods=['GET'])
+async def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(_metrics_payload(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/field-data', methods=['GET'])
+async def get_field_data():
+    try:
+        lat = float(request.args.get('lat', 43.3438))
+        lon = float(request.args.get('lon', 17.8078))
+
+        # Registered fields are answered from the background snapshot
+        snapshot = ai_engine.prefetcher.snapshot(lat, lon)
+        if snapshot:
+            return jsonify(snapshot)
+
+        field_data = await ai_engine.aget_field_data(lat, lon)
+
+        if not field_data:
+            return jsonify({'error': 'No data available'}), 404
+
+        ai_recommendations = await ai_engine.aget_ai_recommendation(field_data)
+
+        return jsonify(_live_field_payload(field_data, ai_recommendations))
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/chatbot', methods=['POST'])
+async def chatbot():
+    try:
+        data = await request.get_json()
+        message = data.get('message', '')
+        field_data = data.get('fieldData', None)
+
+        response, model = await ai_engine.ai_model.agenerate_chat_response(message, field_data)
+
+        return jsonify({
+            'response': response,
+            'ai_model': model,
+            'timestamp': datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/field-data/batch', methods=['POST'])
+async def field_data_batch():
+    """Field data and recommendations for many fields, streamed as NDJSON"""
+    try:
+        fields = _parse_fields(await request.get_json())
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid fields: {e}'}), 400
+
+    async def lines():
+        async for item in ai_engine.aiter_field_data_batch(fields):
+            yield (json.dumps(item, ensure_ascii=False) + '\n').encode('utf-8')
+
+    return Response(lines(), mimetype='application/x-ndjson')
+
+
+@app.route('/api/field-data/stream', methods=['GET'])
+async def stream_field_data():
+    """Field data as a first event, then the recommendation token by token"""
+    try:
+        lat = float(request.args.get('lat', 43.3438))
+        lon = float(request.args.get('lon', 17.8078))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    async def events():
+        try:
+            field_data = await ai_engine.aget_field_data(lat, lon)
+            if not field_data:
+                yield _sse('error', {'error': 'No data available'})
+                return
+
+            yield _sse('field', {**field_data, **ai_engine.assess_field(field_data)})
+
+            parts, fallback = [], None
+            async for kind, value in ai_engine.ai_model.astream_recommendation(field_data):
+                if kind == 'done':
+                    # A fallback replaces the partial advice, it is not appended
+                    yield _sse('done', {
+                        'advice': fallback if fallback is not None else ''.join(parts).strip(),
+                        'ai_model': value
+                    })
+                    break
+                yield _stream_sse(kind, value, bool(parts))
+                if kind == 'fallback':
+                    fallback = value
+                else:
+                    parts.append(value)
+        except Exception as e:
+            yield _sse('error', {'error': str(e)})
+
+    return _sse_response(events())
+
+
+@app.route('/api/chatbot/stream', methods=['POST'])
+async def stream_chatbot():
+    """Chatbot answer streamed as Server-Sent Events"""
+    data = await request.get_json() or {}
+    message = data.get('message', '')
+    field_data = data.get('fieldData', None)
+
+    async def events():
+        try:
+            partial = False
+            async for kind, value in ai_engine.ai_model.astream_chat_response(message, field_data):
+                if kind == 'done':
+                    yield _sse('done', {'ai_model': value, 'timestamp': datetime.now().isoformat()})
+                    break
+                yield _stream_sse(kind, value, partial)
+                partial = True
+        except Exception as e:
+            yield _sse('error', {'error': str(e)})
+
+    return _sse_response(events())
+
+
+@app.route('/api/prefetch/fields', methods=['GET', 'POST'])
+async def prefetch_fields():
+    """Register fields for background refresh (POST) or list prefetch state (GET)"""
+    if request.method == 'GET':
+        return jsonify(ai_engine.prefetcher.stats())
+
+    payload, status = _prefetch_register_payload(await request.get_json())
+    return jsonify(payload), status
+
+
+@app.route('/api/reload-data', methods=['POST'])
+async def reload_data():
+    """Reload data files in the background; ?wait=true waits until the new data is in"""
+    try:
+        reload = ai_engine.data_watcher.reload_async()
+        waited = request.args.get('wait', 'false').lower() in ('1', 'true', 'yes')
+        if waited:
+            await asyncio.to_thread(reload.join)
+
+        return jsonify(_reload_payload(waited)), 200 if waited else 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/data-info', methods=['GET'])
+async def data_info():
+    return jsonify(_data_info_payload())
+
+
+if __name__ == '__main__':
+    port = int(os.getenv('PORT', '5000'))
+    print("=" * 60)
+    print("🌾 Pametna Njiva AI Backend Server (async / ASGI)")
+    print("=" * 60)
+    print(f"✓ AI Model: {ai_engine.ai_model.model_type}")
+    print(f"🚀 Server starting on http://localhost:{port}")
+    print("=" * 60)
+    app.run(host='0.0.0.0', port=port)
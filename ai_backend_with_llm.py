@@ -3,16 +3,25 @@ AI Backend for Pametna Njiva - WITH REAL AI MODELS
 Supports: OpenAI GPT, Groq, Google Gemini
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
+import asyncio
+import atexit
 import json
 import csv
+import math
 import os
-import glob
+import hashlib
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime
-import random
+from importlib.util import find_spec
 from dotenv import load_dotenv
-import requests
+import httpx
 
 # Load environment variables from .env file
 load_dotenv()
@@ -22,13 +31,13 @@ OPENWEATHER_API_KEY = "9172da3f581beb6fb192e6eadfc534a9"
 
 # AI Model imports
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI, OpenAI
     OPENAI_AVAILABLE = True
 except:
     OPENAI_AVAILABLE = False
 
 try:
-    from groq import Groq
+    from groq import AsyncGroq, Groq
     GROQ_AVAILABLE = True
 except:
     GROQ_AVAILABLE = False
@@ -39,16 +48,728 @@ try:
 except:
     GEMINI_AVAILABLE = False
 
+# Regional GRIB cube from grib_processor (imports numpy lazily, so check for it here)
+try:
+    from grib_processor import DEFAULT_CUBE_PATH, RegionalCube
+    GRIB_CUBE_AVAILABLE = find_spec('numpy') is not None
+except ImportError:
+    GRIB_CUBE_AVAILABLE = False
+
 app = Flask(__name__)
 CORS(app)
 
+
+class Metrics:
+    """Counters and latency histograms, exposed in Prometheus text format
+    
+    Recording is a dict update under a lock, cheap enough to leave on for
+    every request. Cache, breaker and single-flight numbers are not
+    recorded here - they are read from their stats when /api/metrics is
+    scraped.
+    """
+    
+    # Histogram bucket upper bounds (seconds)
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    
+    # Metric name -> (type, help)
+    DESCRIPTIONS = {
+        'smartfield_request_seconds': ('histogram', 'HTTP request time until the response headers'),
+        'smartfield_stage_seconds': ('histogram', 'Time spent per stage of building field data and advice'),
+        'smartfield_upstream_seconds': ('histogram', 'OpenWeatherMap and LLM provider call time (first token for streams)'),
+        'smartfield_upstream_calls_total': ('counter', 'OpenWeatherMap and LLM provider calls by outcome'),
+        'smartfield_llm_tokens_total': ('counter', 'Prompt and completion tokens reported by the LLM provider'),
+        'smartfield_cache_hits_total': ('counter', 'Cache hits'),
+        'smartfield_cache_misses_total': ('counter', 'Cache misses'),
+        'smartfield_cache_hit_ratio': ('gauge', 'Cache hits / lookups since start'),
+        'smartfield_circuit_breaker_open': ('gauge', '1 while the provider circuit breaker is open or half-open'),
+        'smartfield_circuit_breaker_rejected_total': ('counter', 'Calls answered by the fallback because the breaker was open'),
+        'smartfield_single_flight_coalesced_total': ('counter', 'Calls that joined an identical call already in flight'),
+        'smartfield_llm_hedged_total': ('counter', 'LLM requests also sent to the hedge provider'),
+        'smartfield_llm_hedge_wins_total': ('counter', 'Hedged LLM requests answered by the hedge provider'),
+    }
+    
+    def __init__(self):
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [count per bucket ..., count above, sum]
+        self._lock = threading.Lock()
+    
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        bucket = bisect_left(self.BUCKETS, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.BUCKETS) + 2)
+            histogram[bucket] += 1
+            histogram[-1] += seconds
+    
+    @contextmanager
+    def timer(self, stage):
+        """Time a block into smartfield_stage_seconds"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe('smartfield_stage_seconds', time.monotonic() - start, stage=stage)
+    
+    def render(self, collected=()):
+        """Prometheus text; collected is extra (name, labels, value) samples read at scrape time"""
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = [(key, list(values)) for key, values in self._histograms.items()]
+        
+        lines = {}  # name -> sample lines
+        for (name, labels), value in counters:
+            lines.setdefault(name, []).append(f'{name}{self._labels(labels)} {value}')
+        for name, labels, value in collected:
+            lines.setdefault(name, []).append(f'{name}{self._labels(tuple(sorted(labels.items())))} {value}')
+        for (name, labels), values in histograms:
+            samples = lines.setdefault(name, [])
+            count = 0
+            for bound, bucket_count in zip(self.BUCKETS + ('+Inf',), values):
+                count += bucket_count
+                samples.append(f'{name}_bucket{self._labels(labels + (("le", bound),))} {count}')
+            samples.append(f'{name}_sum{self._labels(labels)} {round(values[-1], 6)}')
+            samples.append(f'{name}_count{self._labels(labels)} {count}')
+        
+        text = []
+        for name in sorted(lines):
+            kind, description = self.DESCRIPTIONS.get(name, ('untyped', name))
+            text += [f'# HELP {name} {description}', f'# TYPE {name} {kind}', *lines[name]]
+        return '\n'.join(text) + '\n'
+    
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+metrics = Metrics()
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters"""
+    
+    def __init__(self, maxsize=1024, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def items(self):
+        """Snapshot of live entries as (key, remaining_ttl, value)"""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, expires - now, value) for key, (expires, value) in self._data.items() if expires > now]
+    
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRatio': round(self.hits / total, 3) if total else 0.0
+        }
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution
+    
+    The first caller runs the function; callers arriving while it is in
+    flight wait for it and share its result (or exception). do() is for
+    threads, ado() for coroutines on the server's event loop.
+    """
+    
+    def __init__(self):
+        self.executed = 0
+        self.coalesced = 0
+        self._calls = {}  # key -> concurrent Future
+        self._tasks = {}  # key -> asyncio Task
+        self._lock = threading.Lock()
+    
+    def do(self, key, fn, *args):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        
+        if leader:
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._calls[key]
+        return future.result()
+    
+    async def ado(self, key, fn, *args):
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn(*args))
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        # A cancelled waiter must not cancel the call the others share
+        return await asyncio.shield(task)
+    
+    def stats(self):
+        return {
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+            'inFlight': len(self._calls) + len(self._tasks)
+        }
+
+
+class CircuitBreaker:
+    """Circuit breaker for one upstream provider (closed -> open -> half-open)
+    
+    The outcomes of the last BREAKER_WINDOW calls are kept; a call fails if
+    it raised or took longer than the slow-call threshold. Once at least
+    BREAKER_MIN_CALLS are recorded and the failure rate reaches
+    BREAKER_ERROR_RATE, the breaker opens and allow() returns False for
+    BREAKER_OPEN_SECONDS, so callers fall back instantly. Then one probe call
+    is let through (half-open): success closes the breaker, failure opens it
+    again. Every setting can be overridden per provider, e.g.
+    GROQ_BREAKER_SLOW_CALL=5.
+    """
+    
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+    
+    def __init__(self, name, slow_call=5):
+        self.name = name
+        self.error_rate = float(self._setting('ERROR_RATE', 0.5))
+        self.slow_call = float(self._setting('SLOW_CALL', slow_call))  # seconds
+        self.window = int(self._setting('WINDOW', 20))
+        self.min_calls = int(self._setting('MIN_CALLS', 5))
+        self.open_seconds = float(self._setting('OPEN_SECONDS', 30))
+        self.state = self.CLOSED
+        self.opened_until = 0
+        self.probe_started = None
+        self.rejected = 0
+        self._outcomes = deque(maxlen=self.window)
+        self._lock = threading.Lock()
+    
+    def _setting(self, key, default):
+        return os.getenv(f'{self.name.upper()}_BREAKER_{key}', os.getenv(f'BREAKER_{key}', default))
+    
+    def allow(self):
+        """True if a call may go to the provider now"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.CLOSED:
+                return True
+            # Open long enough, or the previous probe never reported back
+            if (self.state == self.OPEN and now >= self.opened_until) or \
+               (self.state == self.HALF_OPEN and now - self.probe_started > self.open_seconds):
+                self.state = self.HALF_OPEN
+                self.probe_started = now
+                return True
+            self.rejected += 1
+            return False
+    
+    def record(self, success, elapsed):
+        """Report the outcome of an allowed call"""
+        failed = not success or elapsed > self.slow_call
+        metrics.observe('smartfield_upstream_seconds', elapsed, provider=self.name)
+        metrics.inc(
+            'smartfield_upstream_calls_total', provider=self.name,
+            outcome='error' if not success else 'slow' if elapsed > self.slow_call else 'ok'
+        )
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                if failed:
+                    self._open(self.open_seconds)
+                else:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                return
+            if self.state == self.OPEN:
+                return
+            
+            self._outcomes.append(failed)
+            if len(self._outcomes) >= self.min_calls and \
+               sum(self._outcomes) / len(self._outcomes) >= self.error_rate:
+                self._open(self.open_seconds)
+    
+    def trip(self, seconds=None):
+        """Open immediately, e.g. on an auth error or rate limit"""
+        with self._lock:
+            self._open(self.open_seconds if seconds is None else seconds)
+    
+    def _open(self, seconds):
+        if self.state != self.OPEN:
+            print(f"⚠ Circuit breaker '{self.name}' open for {seconds:.0f}s")
+        self.state = self.OPEN
+        self.opened_until = time.monotonic() + seconds
+        self._outcomes.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'recentFailures': sum(self._outcomes),
+                'recentCalls': len(self._outcomes),
+                'rejected': self.rejected,
+                'openForSeconds': round(max(self.opened_until - time.monotonic(), 0), 1)
+                if self.state == self.OPEN else 0
+            }
+
+
+class WeatherCache:
+    """OpenWeatherMap responses keyed by lat/lon snapped to a grid cell
+    
+    Nearby fields share a cell, so re-clicking a field or opening a
+    neighbouring farm is answered from memory. Current conditions and the
+    forecast have separate TTLs.
+    """
+    
+    def __init__(self):
+        self.cell_size = float(os.getenv('WEATHER_CACHE_CELL', '0.05'))  # degrees
+        maxsize = int(os.getenv('WEATHER_CACHE_SIZE', '1024'))
+        self.current = TTLCache(maxsize, int(os.getenv('WEATHER_CACHE_CURRENT_TTL', '600')))
+        self.forecast = TTLCache(maxsize, int(os.getenv('WEATHER_CACHE_FORECAST_TTL', '3600')))
+    
+    def cell(self, lat, lon):
+        """Snap coordinates to the centre of their grid cell"""
+        size = self.cell_size
+        return (round(round(lat / size) * size, 4), round(round(lon / size) * size, 4))
+    
+    def stats(self):
+        return {
+            'cellSize': self.cell_size,
+            'current': self.current.stats(),
+            'forecast': self.forecast.stats()
+        }
+
+
+class RecommendationCache:
+    """LLM recommendations keyed by a hash of quantized field data plus model
+    
+    The recommendation prompt is a pure function of a handful of rounded
+    numbers, so fields whose values fall into the same quantization buckets
+    reuse the advice. Entries are optionally persisted to a JSON file so
+    they survive restarts. set() only marks the cache dirty; a background
+    thread writes the file at most every RECOMMENDATION_CACHE_SAVE_INTERVAL
+    seconds and once more at exit, so request handlers (and the async
+    server's event loop) never wait for the full-file rewrite.
+    """
+    
+    # Bucket size per field; fields not listed here are used as-is
+    DEFAULT_QUANTIZATION = {
+        'temperature': 1.0,
+        'soilMoisture': 2.0,
+        'ndvi': 0.05,
+        'vegetation': 5.0,
+        'precipitation': 2.0,
+        'windSpeed': 1.0,
+        'cloudCover': 10.0,
+        'sunshineDuration': 1.0,
+    }
+    
+    # Non-numeric inputs of the prompt
+    CATEGORICAL_FIELDS = ('status', 'priority', 'analysis')
+    
+    def __init__(self):
+        self.quantization = dict(self.DEFAULT_QUANTIZATION)
+        # e.g. RECOMMENDATION_CACHE_QUANTIZATION="temperature=0.5,ndvi=0.02"
+        for item in os.getenv('RECOMMENDATION_CACHE_QUANTIZATION', '').split(','):
+            if '=' in item:
+                field, step = item.split('=', 1)
+                self.quantization[field.strip()] = float(step)
+        
+        self.cache = TTLCache(
+            int(os.getenv('RECOMMENDATION_CACHE_SIZE', '2048')),
+            int(os.getenv('RECOMMENDATION_CACHE_TTL', '21600'))
+        )
+        self.path = os.getenv('RECOMMENDATION_CACHE_PATH')
+        self.save_interval = float(os.getenv('RECOMMENDATION_CACHE_SAVE_INTERVAL', '30'))
+        self.saves = 0
+        self._dirty = False
+        self._saver = None
+        self._save_lock = threading.Lock()
+        self.load()
+    
+    def key(self, field_data, model):
+        """Hash of the quantized field data and model name"""
+        quantized = {}
+        for field, step in self.quantization.items():
+            value = field_data.get(field)
+            if isinstance(value, (int, float)):
+                quantized[field] = round(round(value / step) * step, 6)
+        for field in self.CATEGORICAL_FIELDS:
+            if field in field_data:
+                quantized[field] = field_data[field]
+        payload = json.dumps({'model': model, 'fields': quantized}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        return self.cache.get(key)
+    
+    def set(self, key, advice, model=None):
+        """Store advice with the provider that generated it; get() returns (advice, model)"""
+        self.cache.set(key, (advice, model))
+        if self.path:
+            self._dirty = True
+            self._start_saver()
+    
+    def _start_saver(self):
+        """Start the periodic save thread once and flush again at exit"""
+        if self._saver is not None:
+            return
+        with self._save_lock:
+            if self._saver is not None:
+                return
+            self._saver = threading.Thread(target=self._run_saver, name='recommendation-cache-save', daemon=True)
+            self._saver.start()
+        atexit.register(self.flush)
+    
+    def _run_saver(self):
+        while True:
+            time.sleep(self.save_interval)
+            self.flush()
+    
+    def flush(self):
+        """Write the file if entries were added since the last save"""
+        if not self._dirty:
+            return
+        # Cleared first, so entries added during the write mark it dirty again
+        self._dirty = False
+        self.save()
+    
+    def load(self):
+        """Load persisted entries that have not expired yet"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            now = time.time()
+            for key, entry in entries.items():
+                if entry['expires'] > now:
+                    self.cache.set(key, (entry['advice'], entry.get('model')), ttl=entry['expires'] - now)
+            print(f"✓ Loaded {len(self.cache.items())} cached recommendations from: {self.path}")
+        except Exception as e:
+            print(f"⚠ Error loading recommendation cache: {e}")
+    
+    def save(self):
+        """Persist live entries (atomic replace) if a path is configured"""
+        if not self.path:
+            return
+        now = time.time()
+        entries = {
+            key: {'expires': now + remaining, 'advice': advice, 'model': model}
+            for key, remaining, (advice, model) in self.cache.items()
+        }
+        try:
+            with self._save_lock:
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self.saves += 1
+        except Exception as e:
+            self._dirty = True
+            print(f"⚠ Error saving recommendation cache: {e}")
+    
+    def stats(self):
+        return {
+            **self.cache.stats(),
+            'persistent': bool(self.path),
+            'saveInterval': self.save_interval,
+            'saves': self.saves,
+            'unsaved': self._dirty
+        }
+
+
+class WeatherClient:
+    """Pooled keep-alive HTTP client for OpenWeatherMap
+    
+    One httpx.Client is shared by all requests, so connections (TCP+TLS)
+    are reused, and a small thread pool lets the current-weather and
+    forecast calls run concurrently. The async server uses an
+    httpx.AsyncClient with the same settings instead.
+    """
+    
+    def __init__(self):
+        self.base_url = os.getenv('OPENWEATHER_BASE_URL', 'https://api.openweathermap.org/data/2.5')
+        self.timeout = float(os.getenv('OPENWEATHER_TIMEOUT', '5'))
+        self.pool_size = int(os.getenv('OPENWEATHER_POOL_SIZE', '20'))
+        self.client = httpx.Client(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size
+            )
+        )
+        self.executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='openweather')
+        self.async_client = None
+    
+    def get(self, endpoint, params):
+        return self.client.get(f"/{endpoint}", params=params)
+    
+    async def aget(self, endpoint, params):
+        # Created on first use, inside the server's event loop
+        if self.async_client is None:
+            self.async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size
+                )
+            )
+        return await self.async_client.get(f"/{endpoint}", params=params)
+    
+    def submit(self, fn, *args):
+        """Run fn(*args) on the client's thread pool"""
+        return self.executor.submit(fn, *args)
+
+
+class PrefetchLimitError(Exception):
+    """A registration would exceed PREFETCH_MAX_CELLS"""
+
+
+class FieldPrefetcher:
+    """Keeps weather and recommendations of registered fields warm
+    
+    Registered coordinates are grouped by weather cell. A daemon thread
+    refreshes each cell every PREFETCH_INTERVAL seconds, pausing
+    PREFETCH_STAGGER seconds between cells to stay within provider rate
+    limits, and /api/field-data serves the stored snapshot while it is
+    younger than PREFETCH_MAX_AGE.
+    
+    At most PREFETCH_MAX_CELLS cells are registered at once, and a cell
+    that was neither registered again nor read for
+    PREFETCH_REGISTRATION_TTL seconds is dropped, so clients cannot make
+    the server poll OpenWeatherMap for an unbounded set of places. Cells
+    from PREFETCH_FIELDS never expire.
+    """
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self.enabled = os.getenv('PREFETCH_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+        self.interval = float(os.getenv('PREFETCH_INTERVAL', '600'))
+        self.stagger = float(os.getenv('PREFETCH_STAGGER', '1'))
+        self.max_age = float(os.getenv('PREFETCH_MAX_AGE', str(2 * self.interval)))
+        self.max_cells = int(os.getenv('PREFETCH_MAX_CELLS', '500'))
+        self.registration_ttl = float(os.getenv('PREFETCH_REGISTRATION_TTL', '86400'))
+        self.cells = OrderedDict()  # cell -> last refresh attempt (0 = never)
+        self.last_used = {}  # cell -> last registration or snapshot read (not for PREFETCH_FIELDS)
+        self.snapshots = {}  # cell -> (timestamp, field data with recommendation)
+        self.expired = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        
+        # e.g. PREFETCH_FIELDS="43.3438,17.8078;44.5475,18.6753"
+        for item in os.getenv('PREFETCH_FIELDS', '').split(';'):
+            if ',' in item:
+                lat, lon = item.split(',', 1)
+                self.cells[self.engine.weather_cache.cell(float(lat), float(lon))] = 0
+    
+    def register(self, coords):
+        """Add fields given as (lat, lon) pairs; returns the number of new weather cells
+        
+        Raises PrefetchLimitError, registering nothing, if the new cells
+        would exceed max_cells.
+        """
+        cells = {self.engine.weather_cache.cell(lat, lon) for lat, lon in coords}
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            new = [cell for cell in cells if cell not in self.cells]
+            if len(self.cells) + len(new) > self.max_cells:
+                raise PrefetchLimitError(
+                    f"{len(new)} new weather cells would exceed the prefetch limit of "
+                    f"{self.max_cells} ({len(self.cells)} registered)"
+                )
+            for cell in cells:
+                if cell in self.last_used or cell in new:
+                    self.last_used[cell] = now
+            for cell in new:
+                self.cells[cell] = 0
+        if new:
+            self._wake.set()
+        return len(new)
+    
+    def _expire(self, now):
+        """Drop cells unused for registration_ttl seconds (caller holds the lock)"""
+        stale = [cell for cell, used in self.last_used.items() if now - used > self.registration_ttl]
+        for cell in stale:
+            del self.last_used[cell]
+            self.cells.pop(cell, None)
+            self.snapshots.pop(cell, None)
+        self.expired += len(stale)
+    
+    def start(self):
+        """Start the refresh thread once (no-op when prefetching is disabled)"""
+        if not self.enabled or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='field-prefetch', daemon=True)
+            self._thread.start()
+        print(f"✓ Field prefetch every {self.interval:.0f}s for {len(self.cells)} weather cells")
+    
+    def _run(self):
+        while True:
+            self._wake.clear()
+            now = time.time()
+            with self._lock:
+                self._expire(now)
+                due = [cell for cell, attempted in self.cells.items() if now - attempted >= self.interval]
+            
+            for i, cell in enumerate(due):
+                if i:
+                    time.sleep(self.stagger)
+                self.refresh(cell)
+            
+            with self._lock:
+                attempts = list(self.cells.values())
+            wait_for = min((attempted + self.interval - time.time() for attempted in attempts), default=self.interval)
+            self._wake.wait(max(wait_for, self.stagger))
+    
+    def refresh(self, cell):
+        """Recompute the snapshot of one weather cell"""
+        with self._lock:
+            if cell not in self.cells:
+                return  # expired meanwhile
+            self.cells[cell] = time.time()
+        try:
+            # Force fresh current conditions; the forecast is reused while cached
+            self.engine.weather_cache.current.pop(cell)
+            field_data = self.engine.get_field_data(*cell)
+            if not field_data:
+                return
+            snapshot = {**field_data, **self.engine.get_ai_recommendation(field_data)}
+            with self._lock:
+                if cell in self.cells:
+                    self.snapshots[cell] = (time.time(), snapshot)
+        except Exception as e:
+            print(f"⚠ Prefetch failed for {cell}: {e}")
+    
+    def snapshot(self, lat, lon):
+        """Precomputed field data for lat/lon with freshness metadata, or None"""
+        if not self.enabled:
+            return None
+        cell = self.engine.weather_cache.cell(lat, lon)
+        with self._lock:
+            entry = self.snapshots.get(cell)
+            # Fields that are still viewed keep their registration alive
+            if entry is not None and cell in self.last_used:
+                self.last_used[cell] = time.time()
+        if entry is None:
+            return None
+        
+        updated, data = entry
+        age = time.time() - updated
+        if age > self.max_age:
+            return None
+        return {
+            **data,
+            'lat': lat,
+            'lon': lon,
+            'freshness': {
+                'source': 'prefetch',
+                'updatedAt': datetime.fromtimestamp(updated).isoformat(),
+                'ageSeconds': round(age, 1)
+            }
+        }
+    
+    def stats(self):
+        with self._lock:
+            ages = [time.time() - updated for updated, _ in self.snapshots.values()]
+        return {
+            'enabled': self.enabled,
+            'running': self._thread is not None,
+            'interval': self.interval,
+            'cells': len(self.cells),
+            'maxCells': self.max_cells,
+            'registrationTtl': self.registration_ttl,
+            'expired': self.expired,
+            'snapshots': len(ages),
+            'oldestSnapshotSeconds': round(max(ages), 1) if ages else None
+        }
+
+
 class AIModelManager:
     """Manages different AI models"""
     
+    # Chat model per OpenAI-compatible provider
+    CHAT_MODELS = {
+        'groq': "llama-3.3-70b-versatile",  # Novi model - brz i besplatan!
+        'openai': "gpt-3.5-turbo",
+    }
+    
+    # Extra arguments for streamed chat completions. OpenAI only sends usage
+    # in the last chunk when asked; Groq always sends it there as x_groq.usage
+    # (its client has no stream_options), Gemini on the streamed response.
+    STREAM_OPTIONS = {
+        'openai': {'stream_options': {'include_usage': True}},
+    }
+    
+    # Hedge budget until enough primary latencies are recorded for a p95
+    HEDGE_INITIAL_BUDGET = 3.0
+    HEDGE_MIN_SAMPLES = 20
+    
     def __init__(self):
         self.model_type = os.getenv('AI_MODEL', 'local')  # groq, openai, gemini, or local
         self.client = None
+        self.async_clients = {}  # provider -> AsyncGroq/AsyncOpenAI, created by the async server
+        self.timeout = float(os.getenv('LLM_TIMEOUT', '30'))  # seconds per provider request
+        self.recommendation_cache = RecommendationCache()
+        self.inflight = SingleFlight()
+        self.breakers = {name: CircuitBreaker(name, slow_call=10) for name in ('groq', 'openai', 'gemini')}
+        self.latencies = {name: deque(maxlen=100) for name in self.breakers}
         self.initialize_model()
+        self.initialize_hedge()
     
     def initialize_model(self):
         """Initialize the selected AI model"""
@@ -61,7 +782,7 @@ class AIModelManager:
             
             if api_key and api_key != 'your-groq-api-key-here':
                 try:
-                    self.client = Groq(api_key=api_key)
+                    self.client = Groq(api_key=api_key, timeout=self.timeout)
                     print("✓ Groq AI model initialized successfully!")
                 except Exception as e:
                     print(f"⚠ Groq initialization failed: {e}")
@@ -74,7 +795,7 @@ class AIModelManager:
         elif self.model_type == 'openai' and OPENAI_AVAILABLE:
             api_key = os.getenv('OPENAI_API_KEY')
             if api_key and api_key != 'your-openai-api-key-here':
-                self.client = OpenAI(api_key=api_key)
+                self.client = OpenAI(api_key=api_key, timeout=self.timeout)
                 print("✓ OpenAI GPT model initialized")
             else:
                 print("⚠ OpenAI API key not found, using local AI")
@@ -94,11 +815,147 @@ class AIModelManager:
             print("✓ Using local AI (rule-based)")
             self.model_type = 'local'
     
+    def initialize_hedge(self):
+        """Optional second provider for hedged requests (AI_HEDGE_MODEL)
+        
+        A request that the primary provider has not answered within the
+        hedge budget - AI_HEDGE_AFTER seconds, or by default the primary's
+        observed p95 latency - is also sent to the hedge provider; the first
+        complete answer wins.
+        """
+        self.hedge_model = os.getenv('AI_HEDGE_MODEL', '').strip() or None
+        self.hedge_after = os.getenv('AI_HEDGE_AFTER', 'p95')
+        self.hedge_client = None
+        self.hedge_executor = None
+        self.hedges = 0
+        self.hedge_wins = 0
+        
+        if self.hedge_model is None:
+            return
+        if self.model_type == 'local' or self.hedge_model == self.model_type:
+            print(f"⚠ Hedging with {self.hedge_model} needs a different primary AI model, disabled")
+            self.hedge_model = None
+            return
+        
+        self.hedge_client = self._create_client(self.hedge_model)
+        if self.hedge_client is None:
+            print(f"⚠ Hedge model {self.hedge_model} not available (library or API key missing), disabled")
+            self.hedge_model = None
+            return
+        
+        self.hedge_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('AI_HEDGE_WORKERS', '32')),
+            thread_name_prefix='llm-hedge'
+        )
+        print(f"✓ Hedging {self.model_type} with {self.hedge_model} after {self.hedge_after}")
+    
+    def _create_client(self, provider):
+        """Sync client for a provider, or None if its library or API key is missing"""
+        if provider == 'groq' and GROQ_AVAILABLE:
+            api_key = os.getenv('GROQ_API_KEY')
+            if api_key and api_key != 'your-groq-api-key-here':
+                return Groq(api_key=api_key, timeout=self.timeout)
+        elif provider == 'openai' and OPENAI_AVAILABLE:
+            api_key = os.getenv('OPENAI_API_KEY')
+            if api_key and api_key != 'your-openai-api-key-here':
+                return OpenAI(api_key=api_key, timeout=self.timeout)
+        elif provider == 'gemini' and GEMINI_AVAILABLE:
+            api_key = os.getenv('GOOGLE_API_KEY')
+            if api_key and api_key != 'your-google-api-key-here':
+                genai.configure(api_key=api_key)
+                return genai.GenerativeModel('gemini-pro')
+        return None
+    
+    def _client_for(self, provider):
+        return self.client if provider == self.model_type else self.hedge_client
+    
+    def hedge_budget(self):
+        """Seconds to wait for the primary provider before hedging"""
+        if self.hedge_after != 'p95':
+            return float(self.hedge_after)
+        samples = sorted(self.latencies[self.model_type])
+        if len(samples) < self.HEDGE_MIN_SAMPLES:
+            return self.HEDGE_INITIAL_BUDGET
+        return samples[int(len(samples) * 0.95) - 1]
+    
+    def hedge_stats(self):
+        return {
+            'model': self.hedge_model,
+            'budgetSeconds': round(self.hedge_budget(), 3) if self.hedge_model else None,
+            'hedged': self.hedges,
+            'hedgeWins': self.hedge_wins
+        }
+    
     def generate_recommendation(self, field_data):
-        """Generate AI recommendation based on field data"""
+        """Generate AI recommendation based on field data
+        
+        Returns (advice, model) - model is the provider that served the
+        advice, or 'local' for the fallback message.
+        """
+        
+        # Near-identical fields reuse cached advice instead of a new LLM call
+        cache_key = self.recommendation_cache.key(field_data, self.model_type)
+        cached = self.recommendation_cache.get(cache_key)
+        if cached is not None:
+            advice, model = cached
+            return advice, model or self.model_type
+        
+        if self.model_type == 'local':
+            return self._local_generate(field_data), 'local'
+        
+        # Concurrent requests for the same key share one LLM call
+        return self.inflight.do(
+            ('recommendation', cache_key), self._generate_recommendation, cache_key, field_data
+        )
+    
+    def _generate_recommendation(self, cache_key, field_data):
+        advice, model = self._generate(self._recommendation_prompt(field_data))
+        
+        # Provider errors fall back to the local message - don't cache those
+        if model != 'local':
+            self.recommendation_cache.set(cache_key, advice, model)
+        return advice, model
+    
+    def stream_recommendation(self, field_data):
+        """Stream the recommendation as (kind, value) events
+        
+        ('token', text) is a part of the advice (cached advice comes as one
+        token). ('fallback', text) means the provider failed: text is the
+        local message and replaces, not extends, tokens sent before it. The
+        last event is ('done', model) with the provider that produced the
+        advice, or 'local'. Only streams that finish cleanly are cached.
+        """
+        cache_key = self.recommendation_cache.key(field_data, self.model_type)
+        cached = self.recommendation_cache.get(cache_key)
+        if cached is not None:
+            yield 'token', cached[0]
+            yield 'done', cached[1] or self.model_type
+            return
+        
+        if self.model_type == 'local':
+            yield 'token', self._local_generate(field_data)
+            yield 'done', 'local'
+            return
+        
+        parts = []
+        for kind, text in self._stream(self._recommendation_prompt(field_data)):
+            if kind == 'fallback':
+                yield kind, text
+                yield 'done', 'local'
+                return
+            parts.append(text)
+            yield kind, text
+        
+        advice = ''.join(parts).strip()
+        if advice:
+            self.recommendation_cache.set(cache_key, advice, self.model_type)
+        yield 'done', self.model_type
+    
+    def _recommendation_prompt(self, field_data):
+        """Build the recommendation prompt from field data"""
         
         # Create detailed prompt with ALL available data
-        prompt = f"""You are an expert ECOLOGICAL agronomist specializing in sustainable farming. Analyze REAL satellite data and provide SPECIFIC eco-friendly recommendations.
+        return f"""You are an expert ECOLOGICAL agronomist specializing in sustainable farming. Analyze REAL satellite data and provide SPECIFIC eco-friendly recommendations.
 
 📊 ACTUAL SATELLITE DATA (NASA/ECMWF):
 • Temperature: {field_data['temperature']}°C
@@ -150,59 +1007,445 @@ RULES:
 ✗ NO generic advice
 ✗ NO made-up numbers
 ✗ NO purely chemical solutions without organic alternatives"""
-
-        if self.model_type == 'groq':
-            return self._groq_generate(prompt)
-        elif self.model_type == 'openai':
-            return self._openai_generate(prompt)
-        elif self.model_type == 'gemini':
-            return self._gemini_generate(prompt)
-        else:
-            return self._local_generate(field_data)
     
-    def _groq_generate(self, prompt):
-        """Generate using Groq"""
+    def _generate(self, prompt):
+        """Generate a full completion; returns (text, model that served it)
+        
+        Provider errors, or an open circuit breaker, give the local message
+        with model 'local'. With a hedge model configured the request is
+        hedged (see initialize_hedge).
+        """
+        with metrics.timer('llm'):
+            if self.hedge_model is not None:
+                return self._hedged_generate(prompt)
+            
+            text = self._provider_generate(self.model_type, prompt)
+            if text is None:
+                return self._local_generate({}), 'local'
+            return text, self.model_type
+    
+    def _hedged_generate(self, prompt):
+        """Primary first; the hedge provider joins once the budget has passed
+        
+        Both attempts are streamed with a cancel event. The loser stops at
+        its next chunk, closing its connection, and records no latency,
+        breaker outcome or token usage.
+        """
+        cancel = {self.model_type: threading.Event(), self.hedge_model: threading.Event()}
+        primary = self.hedge_executor.submit(
+            self._provider_generate, self.model_type, prompt, cancel[self.model_type]
+        )
+        futures = {primary: self.model_type}
+        
+        # A fast failure of the primary hedges right away
+        done, _ = wait([primary], timeout=self.hedge_budget())
+        if done and primary.result() is not None:
+            return primary.result(), self.model_type
+        
+        self.hedges += 1
+        hedge = self.hedge_executor.submit(
+            self._provider_generate, self.hedge_model, prompt, cancel[self.hedge_model]
+        )
+        futures[hedge] = self.hedge_model
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                text = future.result()
+                if text is not None:
+                    for other in pending:
+                        cancel[futures[other]].set()
+                        other.cancel()
+                    if futures[future] == self.hedge_model:
+                        self.hedge_wins += 1
+                    return text, futures[future]
+        return self._local_generate({}), 'local'
+    
+    def _provider_generate(self, provider, prompt, cancel=None):
+        """One completion from one provider through its circuit breaker; None on failure
+        
+        With a cancel event (hedged requests) the completion is streamed and
+        abandoned once the event is set; a cancelled call returns None and
+        records nothing.
+        """
+        breaker = self.breakers[provider]
+        if (cancel is not None and cancel.is_set()) or not breaker.allow():
+            return None
+        
+        start = time.monotonic()
         try:
-            response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",  # Novi model - brz i besplatan!
+            if cancel is None:
+                text, response = self._provider_complete(provider, prompt)
+            else:
+                text, response = self._provider_complete_cancellable(provider, prompt, cancel)
+        except Exception as e:
+            if cancel is not None and cancel.is_set():
+                return None
+            breaker.record(False, time.monotonic() - start)
+            print(f"{provider} error: {e}")
+            return None
+        
+        # Lost the hedge race: keep the result out of breaker, p95 and usage
+        if text is None or (cancel is not None and cancel.is_set()):
+            return None
+        elapsed = time.monotonic() - start
+        breaker.record(True, elapsed)
+        self.latencies[provider].append(elapsed)
+        self._record_usage(provider, response)
+        return text
+    
+    def _provider_complete(self, provider, prompt):
+        """Blocking completion; returns (text, response)"""
+        client = self._client_for(provider)
+        if provider in self.CHAT_MODELS:
+            response = client.chat.completions.create(
+                model=self.CHAT_MODELS[provider],
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.7,
                 max_tokens=800  # Increased for complete responses
             )
-            return response.choices[0].message.content.strip()
+            return response.choices[0].message.content.strip(), response
+        response = client.generate_content(prompt)
+        return response.text.strip(), response
+    
+    def _provider_complete_cancellable(self, provider, prompt, cancel):
+        """Streamed completion checked against cancel between chunks
+        
+        Returns (text, object carrying the usage), or (None, None) once
+        cancel is set - the stream is closed, which drops the connection.
+        """
+        meter = {}
+        if provider in self.CHAT_MODELS:
+            tokens = self._chat_completion_stream(provider, prompt, meter)
+        else:
+            tokens = self._gemini_stream(provider, prompt, meter)
+        parts = []
+        try:
+            for token in tokens:
+                if cancel.is_set():
+                    return None, None
+                parts.append(token)
+        finally:
+            tokens.close()
+        return ''.join(parts).strip(), meter.get('usage')
+    
+    def _record_usage(self, provider, response):
+        """Count the prompt/completion tokens the provider reports for a response"""
+        if response is None:
+            return
+        usage = getattr(response, 'usage', None)  # Groq / OpenAI
+        if usage is not None:
+            prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+        else:
+            usage = getattr(response, 'usage_metadata', None)  # Gemini
+            if usage is None:
+                return
+            prompt_tokens, completion_tokens = usage.prompt_token_count, usage.candidates_token_count
+        metrics.inc('smartfield_llm_tokens_total', prompt_tokens or 0, provider=provider, type='prompt')
+        metrics.inc('smartfield_llm_tokens_total', completion_tokens or 0, provider=provider, type='completion')
+    
+    def _stream(self, prompt):
+        """Stream a completion with the primary provider
+        
+        Yields ('token', text) events; if the breaker is open or the
+        provider fails (also partway through), one ('fallback', local
+        message) event ends the stream. Token usage is recorded once the
+        stream finishes; a failed stream reports none.
+        """
+        breaker = self.breakers.get(self.model_type)
+        if breaker is None or not breaker.allow():
+            yield 'fallback', self._local_generate({})
+            return
+        
+        start = time.monotonic()
+        first_token = None
+        meter = {}
+        try:
+            if self.model_type in self.CHAT_MODELS:
+                tokens = self._chat_completion_stream(self.model_type, prompt, meter)
+            else:
+                tokens = self._gemini_stream(self.model_type, prompt, meter)
+            for token in tokens:
+                if first_token is None:
+                    first_token = time.monotonic() - start
+                yield 'token', token
         except Exception as e:
-            print(f"Groq error: {e}")
-            return self._local_generate({})
+            breaker.record(False, time.monotonic() - start)
+            print(f"{self.model_type} streaming error: {e}")
+            yield 'fallback', self._local_generate({})
+            return
+        
+        # Latency of a stream is judged by its first token
+        breaker.record(True, first_token if first_token is not None else time.monotonic() - start)
+        self._record_usage(self.model_type, meter.get('usage'))
     
-    def _openai_generate(self, prompt):
-        """Generate using OpenAI"""
+    def _chat_completion_stream(self, provider, prompt, meter):
+        """Stream using an OpenAI-compatible client (Groq or OpenAI)
+        
+        meter['usage'] is set to the object carrying the token usage once
+        the provider reports it. Closing the generator closes the stream.
+        """
+        stream = self._client_for(provider).chat.completions.create(
+            model=self.CHAT_MODELS[provider],
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_tokens=800,
+            stream=True,
+            **self.STREAM_OPTIONS.get(provider, {})
+        )
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=800  # Increased for complete responses
-            )
-            return response.choices[0].message.content.strip()
+            for chunk in stream:
+                usage = self._chunk_usage(chunk)
+                if usage is not None:
+                    meter['usage'] = usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+    
+    def _gemini_stream(self, provider, prompt, meter):
+        """Stream using Google Gemini (usage_metadata is on the streamed response)"""
+        response = self._client_for(provider).generate_content(prompt, stream=True)
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+        meter['usage'] = response
+    
+    @staticmethod
+    def _chunk_usage(chunk):
+        """Object with the usage of a stream chunk, or None (OpenAI: chunk.usage, Groq: chunk.x_groq.usage)"""
+        if getattr(chunk, 'usage', None) is not None:
+            return chunk
+        x_groq = getattr(chunk, 'x_groq', None)
+        if getattr(x_groq, 'usage', None) is not None:
+            return x_groq
+        return None
+    
+    async def agenerate_recommendation(self, field_data):
+        """Async generate_recommendation for the ASGI server"""
+        cache_key = self.recommendation_cache.key(field_data, self.model_type)
+        cached = self.recommendation_cache.get(cache_key)
+        if cached is not None:
+            advice, model = cached
+            return advice, model or self.model_type
+        
+        if self.model_type == 'local':
+            return self._local_generate(field_data), 'local'
+        
+        return await self.inflight.ado(
+            ('recommendation', cache_key), self._agenerate_recommendation, cache_key, field_data
+        )
+    
+    async def _agenerate_recommendation(self, cache_key, field_data):
+        advice, model = await self._agenerate(self._recommendation_prompt(field_data))
+        
+        if model != 'local':
+            self.recommendation_cache.set(cache_key, advice, model)
+        return advice, model
+    
+    async def astream_recommendation(self, field_data):
+        """Async stream_recommendation for the ASGI server"""
+        cache_key = self.recommendation_cache.key(field_data, self.model_type)
+        cached = self.recommendation_cache.get(cache_key)
+        if cached is not None:
+            yield 'token', cached[0]
+            yield 'done', cached[1] or self.model_type
+            return
+        
+        if self.model_type == 'local':
+            yield 'token', self._local_generate(field_data)
+            yield 'done', 'local'
+            return
+        
+        parts = []
+        async for kind, text in self._astream(self._recommendation_prompt(field_data)):
+            if kind == 'fallback':
+                yield kind, text
+                yield 'done', 'local'
+                return
+            parts.append(text)
+            yield kind, text
+        
+        advice = ''.join(parts).strip()
+        if advice:
+            self.recommendation_cache.set(cache_key, advice, self.model_type)
+        yield 'done', self.model_type
+    
+    async def agenerate_chat_response(self, message, field_data=None):
+        if self.model_type == 'local':
+            return f"Please add AI API key to get responses. Question: {message}", 'local'
+        return await self.inflight.ado(
+            ('chat', self._chat_key(message, field_data)), self._agenerate, self._chat_prompt(message, field_data)
+        )
+    
+    async def astream_chat_response(self, message, field_data=None):
+        """Async stream_chat_response"""
+        if self.model_type == 'local':
+            yield 'token', f"Please add AI API key to get responses. Question: {message}"
+            yield 'done', 'local'
+            return
+        async for kind, text in self._astream(self._chat_prompt(message, field_data)):
+            yield kind, text
+            if kind == 'fallback':
+                yield 'done', 'local'
+                return
+        yield 'done', self.model_type
+    
+    def _get_async_client(self, provider):
+        """Async client for an OpenAI-compatible provider, created on first use"""
+        if provider not in self.async_clients:
+            if provider == 'groq':
+                api_key = os.getenv('GROQ_API_KEY')
+                self.async_clients[provider] = AsyncGroq(api_key=api_key, timeout=self.timeout)
+            else:
+                api_key = os.getenv('OPENAI_API_KEY')
+                self.async_clients[provider] = AsyncOpenAI(api_key=api_key, timeout=self.timeout)
+        return self.async_clients[provider]
+    
+    async def _agenerate(self, prompt):
+        """Async _generate: the event loop is free while the providers respond"""
+        with metrics.timer('llm'):
+            if self.hedge_model is not None:
+                return await self._ahedged_generate(prompt)
+            
+            text = await self._aprovider_generate(self.model_type, prompt)
+            if text is None:
+                return self._local_generate({}), 'local'
+            return text, self.model_type
+    
+    async def _ahedged_generate(self, prompt):
+        """Async _hedged_generate - the losing request is cancelled"""
+        primary = asyncio.ensure_future(self._aprovider_generate(self.model_type, prompt))
+        tasks = {primary: self.model_type}
+        
+        done, _ = await asyncio.wait([primary], timeout=self.hedge_budget())
+        if done and primary.result() is not None:
+            return primary.result(), self.model_type
+        
+        self.hedges += 1
+        tasks[asyncio.ensure_future(self._aprovider_generate(self.hedge_model, prompt))] = self.hedge_model
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                text = task.result()
+                if text is not None:
+                    # Cancelling the loser aborts its HTTP request
+                    for other in pending:
+                        other.cancel()
+                    if tasks[task] == self.hedge_model:
+                        self.hedge_wins += 1
+                    return text, tasks[task]
+        return self._local_generate({}), 'local'
+    
+    async def _aprovider_generate(self, provider, prompt):
+        """Async _provider_generate"""
+        breaker = self.breakers[provider]
+        if not breaker.allow():
+            return None
+        
+        start = time.monotonic()
+        try:
+            if provider in self.CHAT_MODELS:
+                response = await self._get_async_client(provider).chat.completions.create(
+                    model=self.CHAT_MODELS[provider],
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.7,
+                    max_tokens=800
+                )
+                text = response.choices[0].message.content.strip()
+            else:
+                response = await self._client_for(provider).generate_content_async(prompt)
+                text = response.text.strip()
         except Exception as e:
-            print(f"OpenAI error: {e}")
-            return self._local_generate({})
+            breaker.record(False, time.monotonic() - start)
+            print(f"{provider} error: {e}")
+            return None
+        
+        elapsed = time.monotonic() - start
+        breaker.record(True, elapsed)
+        self.latencies[provider].append(elapsed)
+        self._record_usage(provider, response)
+        return text
     
-    def _gemini_generate(self, prompt):
-        """Generate using Google Gemini"""
+    async def _astream(self, prompt):
+        """Async _stream"""
+        breaker = self.breakers.get(self.model_type)
+        if breaker is None or not breaker.allow():
+            yield 'fallback', self._local_generate({})
+            return
+        
+        start = time.monotonic()
+        first_token = None
+        usage = None
         try:
-            response = self.client.generate_content(prompt)
-            return response.text.strip()
+            if self.model_type in self.CHAT_MODELS:
+                stream = await self._get_async_client(self.model_type).chat.completions.create(
+                    model=self.CHAT_MODELS[self.model_type],
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.7,
+                    max_tokens=800,
+                    stream=True,
+                    **self.STREAM_OPTIONS.get(self.model_type, {})
+                )
+                async for chunk in stream:
+                    usage = self._chunk_usage(chunk) or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if first_token is None:
+                            first_token = time.monotonic() - start
+                        yield 'token', chunk.choices[0].delta.content
+            else:
+                response = await self.client.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    if chunk.text:
+                        if first_token is None:
+                            first_token = time.monotonic() - start
+                        yield 'token', chunk.text
+                usage = response
         except Exception as e:
-            print(f"Gemini error: {e}")
-            return self._local_generate({})
+            breaker.record(False, time.monotonic() - start)
+            print(f"{self.model_type} streaming error: {e}")
+            yield 'fallback', self._local_generate({})
+            return
+        
+        breaker.record(True, first_token if first_token is not None else time.monotonic() - start)
+        self._record_usage(self.model_type, usage)
     
     def _local_generate(self, field_data):
         """Fallback local generation"""
         return "AI model is not available. Add API key to .env file. See .env.example for instructions."
     
     def generate_chat_response(self, message, field_data=None):
-        """Generate chatbot response"""
+        """Generate chatbot response; returns (text, model that served it)"""
+        if self.model_type == 'local':
+            return f"Please add AI API key to get responses. Question: {message}", 'local'
+        return self.inflight.do(
+            ('chat', self._chat_key(message, field_data)), self._generate, self._chat_prompt(message, field_data)
+        )
+    
+    def _chat_key(self, message, field_data):
+        """Normalized chat request: model, whitespace-collapsed message and field data"""
+        payload = json.dumps(
+            {'model': self.model_type, 'message': ' '.join(message.split()), 'fieldData': field_data},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def stream_chat_response(self, message, field_data=None):
+        """Stream the chatbot response as (kind, value) events, like stream_recommendation"""
+        if self.model_type == 'local':
+            yield 'token', f"Please add AI API key to get responses. Question: {message}"
+            yield 'done', 'local'
+            return
+        for kind, text in self._stream(self._chat_prompt(message, field_data)):
+            yield kind, text
+            if kind == 'fallback':
+                yield 'done', 'local'
+                return
+        yield 'done', self.model_type
+    
+    def _chat_prompt(self, message, field_data=None):
+        """Build the chatbot prompt"""
         
         context = ""
         if field_data:
@@ -214,7 +1457,7 @@ CURRENT FIELD DATA:
 - Precipitation: {field_data.get('precipitation', 'N/A')}mm
 """
         
-        prompt = f"""You are an ECO-FRIENDLY AI assistant for sustainable farming. Answer the question in ENGLISH with focus on ecological practices.
+        return f"""You are an ECO-FRIENDLY AI assistant for sustainable farming. Answer the question in ENGLISH with focus on ecological practices.
 
 {context}
 
@@ -226,47 +1469,262 @@ Provide a SHORT, USEFUL answer (2-3 sentences) that:
 ✓ Promotes soil health and biodiversity
 ✓ Is PRACTICAL and CONCRETE
 ✓ Uses emojis 🌱💧♻️🌍"""
+
+
+class FarmDataWatcher:
+    """Picks up new farm_data_* files and swaps them into the engine atomically
+    
+    Known files are kept in an index (kind, ctime, mtime, size); the data
+    directory is only re-listed when its own mtime changes, and otherwise
+    just the newest files are re-checked for in-place rewrites. Only the
+    kinds whose newest file is new or changed are parsed again, into a
+    fresh dict off the request path that is installed with a single
+    assignment, so a request always sees one complete data_cache.
+    """
+    
+    SUFFIXES = {'.json': 'json', '.csv': 'csv'}
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self.directory = os.getenv('FARM_DATA_DIR', '.')
+        self.enabled = os.getenv('DATA_WATCH_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+        self.interval = float(os.getenv('DATA_WATCH_INTERVAL', '5'))
+        # Files modified more recently than this may still be being written
+        self.settle = float(os.getenv('DATA_WATCH_SETTLE', '1'))
+        self.files = {}  # path -> (kind, ctime, mtime_ns, size)
+        self.loaded = {}  # kind -> (path, mtime_ns, size) currently installed
+        self.failed = None  # last file set that did not parse
+        self.cube_path = os.getenv('GRIB_CUBE_PATH', DEFAULT_CUBE_PATH) if GRIB_CUBE_AVAILABLE else None
+        self.cube_loaded = None  # (mtime_ns, size) of the installed cube header
+        self.cube_failed = None
+        self.reloads = 0
+        self.errors = 0
+        self._dir_mtime = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._reload_lock = threading.Lock()
+        self._reload_pending = False
+        self._reload_thread = None
+    
+    def _kind(self, name):
+        root, ext = os.path.splitext(name)
+        return self.SUFFIXES.get(ext) if root.startswith('farm_data_') else None
+    
+    def _stat(self, path, kind, st=None):
+        st = st or os.stat(path)
+        self.files[path] = (kind, st.st_ctime, st.st_mtime_ns, st.st_size)
+    
+    def scan(self):
+        """Refresh the file index"""
+        dir_mtime = os.stat(self.directory).st_mtime_ns
+        if dir_mtime != self._dir_mtime:
+            self._dir_mtime = dir_mtime
+            # Entries of unchanged files are kept; removed files drop out
+            known, self.files = self.files, {}
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    kind = self._kind(entry.name)
+                    if not kind or not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    if entry.path in known and known[entry.path][2:] == (st.st_mtime_ns, st.st_size):
+                        self.files[entry.path] = known[entry.path]
+                    else:
+                        self._stat(entry.path, kind, st)
+            return
         
-        if self.model_type == 'groq':
-            return self._groq_generate(prompt)
-        elif self.model_type == 'openai':
-            return self._openai_generate(prompt)
-        elif self.model_type == 'gemini':
-            return self._gemini_generate(prompt)
-        else:
-            return f"Please add AI API key to get responses. Question: {message}"
+        # Same directory listing - only the newest files can have changed
+        for path in list(self.latest().values()):
+            try:
+                self._stat(path, self.files[path][0])
+            except OSError:
+                del self.files[path]
+    
+    def latest(self):
+        """Newest indexed file per kind, by ctime"""
+        latest = {}
+        for path, (kind, ctime, _, _) in self.files.items():
+            if kind not in latest or ctime > self.files[latest[kind]][1]:
+                latest[kind] = path
+        return latest
+    
+    def check(self, force=False, settle=None):
+        """Load the newest files if they changed; returns True if data was swapped"""
+        settle = self.settle if settle is None else settle
+        with self._lock:
+            try:
+                self.scan()
+            except OSError as e:
+                print(f"⚠ Cannot scan {self.directory}: {e}")
+                return False
+            
+            wanted = {kind: (path, *self.files[path][2:]) for kind, path in self.latest().items()}
+            if not wanted or (wanted in (self.loaded, self.failed) and not force):
+                return False
+            if any(time.time() - mtime / 1e9 < settle for _, mtime, _ in wanted.values()):
+                return False
+            
+            # Kinds whose newest file is unchanged keep their parsed data
+            current = self.engine.data_cache
+            changed = [
+                kind for kind in wanted
+                if force or wanted[kind] != self.loaded.get(kind) or kind not in current
+            ]
+            try:
+                cache = self.engine.read_data_files(
+                    **{f'{kind}_file': wanted[kind][0] for kind in changed}
+                )
+            except Exception as e:
+                # Keep serving the previous data; retried once the files change
+                self.failed = wanted
+                self.errors += 1
+                print(f"⚠ Error loading data: {e}")
+                return False
+            
+            for kind in wanted.keys() - set(changed):
+                cache[kind] = current[kind]
+                cache[f'{kind}_file'] = current[f'{kind}_file']
+            self.engine.data_cache = cache
+            self.loaded = wanted
+            self.reloads += 1
+            return True
+    
+    def check_cube(self, force=False, settle=None):
+        """Load the regional GRIB cube into memory when its header changes"""
+        if not self.cube_path:
+            return False
+        settle = self.settle if settle is None else settle
+        with self._lock:
+            # The header is written after the .npy, so it marks a finished ingest
+            try:
+                st = os.stat(self.cube_path + '.json')
+            except OSError:
+                return False
+            signature = (st.st_mtime_ns, st.st_size)
+            if signature in (self.cube_loaded, self.cube_failed) and not force:
+                return False
+            if time.time() - st.st_mtime_ns / 1e9 < settle:
+                return False
+            
+            try:
+                cube = RegionalCube(self.cube_path, in_memory=True)
+            except Exception as e:
+                self.cube_failed = signature
+                self.errors += 1
+                print(f"⚠ Error loading GRIB cube: {e}")
+                return False
+            
+            self.engine.grib_cube = cube
+            self.cube_loaded = signature
+            self.reloads += 1
+            print(f"✓ Loaded GRIB cube from: {self.cube_path} "
+                  f"({cube.header['nlat']}x{cube.header['nlon']}, {len(cube.keys)} variables)")
+            return True
+    
+    def reload(self):
+        """Reload data files and the GRIB cube, even if they look unchanged"""
+        self.check(force=True, settle=0)
+        self.check_cube(force=True, settle=0)
+    
+    def reload_async(self):
+        """reload() in the background; returns the worker thread
+        
+        There is at most one worker. A call while it is reloading makes it
+        run one more pass afterwards, so repeated requests coalesce instead
+        of stacking concurrent rebuilds, and joining the returned thread
+        still waits for a reload that started after the call.
+        """
+        with self._reload_lock:
+            self._reload_pending = True
+            if self._reload_thread is None or not self._reload_thread.is_alive():
+                self._reload_thread = threading.Thread(
+                    target=self._run_reloads, name='data-reload', daemon=True
+                )
+                self._reload_thread.start()
+            return self._reload_thread
+    
+    def _run_reloads(self):
+        while True:
+            with self._reload_lock:
+                if not self._reload_pending:
+                    self._reload_thread = None
+                    return
+                self._reload_pending = False
+            self.reload()
+    
+    def start(self):
+        """Start the polling thread once (no-op when watching is disabled)"""
+        if not self.enabled or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='data-watch', daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
+            self.check_cube()
+    
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'directory': self.directory,
+            'interval': self.interval,
+            'knownFiles': len(self.files),
+            'gribCube': self.cube_path if self.cube_loaded else None,
+            'reloads': self.reloads,
+            'errors': self.errors
+        }
 
 
 class AgriculturalAI:
     """AI Engine for agricultural recommendations"""
     
+    # Metrics stage per OpenWeatherMap endpoint
+    OPENWEATHER_STAGES = {'weather': 'openweather_current', 'forecast': 'openweather_forecast'}
+    
     def __init__(self):
         self.data_cache = {}
+        self.grib_cube = None
+        self.cube_interpolate = os.getenv('GRIB_CUBE_INTERPOLATE', 'true').lower() in ('1', 'true', 'yes')
+        self.weather_cache = WeatherCache()
+        self.weather_client = WeatherClient()
+        self.weather_inflight = SingleFlight()
+        self.weather_breaker = CircuitBreaker('openweather', slow_call=3)
         self.ai_model = AIModelManager()
+        # Separate from the weather client's pool, whose workers this one waits on
+        self.batch_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('FIELD_BATCH_WORKERS', '16')),
+            thread_name_prefix='field-batch'
+        )
+        self.prefetcher = FieldPrefetcher(self)
+        self.data_watcher = FarmDataWatcher(self)
         self.load_latest_data()
     
     def load_latest_data(self):
-        """Load the latest JSON and CSV meteorological data"""
-        try:
-            json_files = glob.glob('farm_data_*.json')
-            if json_files:
-                latest_json = max(json_files, key=os.path.getctime)
-                with open(latest_json, 'r', encoding='utf-8') as f:
-                    self.data_cache['json'] = json.load(f)
-                    self.data_cache['json_file'] = latest_json
-                print(f"✓ Loaded JSON data from: {latest_json}")
-            
-            csv_files = glob.glob('farm_data_*.csv')
-            if csv_files:
-                latest_csv = max(csv_files, key=os.path.getctime)
-                with open(latest_csv, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    self.data_cache['csv'] = list(reader)
-                    self.data_cache['csv_file'] = latest_csv
-                print(f"✓ Loaded CSV data from: {latest_csv}")
-                
-        except Exception as e:
-            print(f"⚠ Error loading data: {e}")
+        """Load the latest JSON and CSV meteorological data and the GRIB cube"""
+        self.data_watcher.reload()
+    
+    def read_data_files(self, json_file=None, csv_file=None):
+        """Parse data files into a new data_cache dict (the current one is not touched)"""
+        cache = {}
+        if json_file:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                cache['json'] = json.load(f)
+                cache['json_file'] = json_file
+            print(f"✓ Loaded JSON data from: {json_file}")
+        
+        if csv_file:
+            with open(csv_file, 'r', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                cache['csv'] = list(reader)
+                cache['csv_file'] = csv_file
+            print(f"✓ Loaded CSV data from: {csv_file}")
+        
+        return cache
     
     def get_field_data(self, lat, lon):
         """Get meteorological data for specific coordinates"""
@@ -276,11 +1734,30 @@ class AgriculturalAI:
         if realtime_data:
             return realtime_data
         
-        # Fallback to cached data
-        if 'json' not in self.data_cache:
-            return None
+        with metrics.timer('fallback'):
+            return self._get_fallback_data(lat, lon)
+    
+    async def aget_field_data(self, lat, lon):
+        """Async get_field_data (the fallbacks are in-memory and do not block)"""
+        realtime_data = await self._aget_openweather_data(lat, lon)
         
-        data = self.data_cache['json']
+        if realtime_data:
+            return realtime_data
+        
+        with metrics.timer('fallback'):
+            return self._get_fallback_data(lat, lon)
+    
+    def _get_fallback_data(self, lat, lon):
+        """Field data without OpenWeatherMap"""
+        # Fallback to the ingested GRIB grid at this location
+        grib_data = self._get_grib_cube_data(lat, lon)
+        if grib_data:
+            return grib_data
+        
+        # Fallback to cached data (one read of data_cache - it may be swapped meanwhile)
+        data = self.data_cache.get('json')
+        if data is None:
+            return None
         
         # Get values with fallback to reasonable defaults
         temperature = data.get('t', {}).get('value', 20)
@@ -325,6 +1802,164 @@ class AgriculturalAI:
             'lon': lon
         }
     
+    def iter_field_data_batch(self, fields):
+        """Yield field data with recommendations for many fields, in completion order
+        
+        Fields in the same weather cell share one weather lookup, and fields
+        whose data maps to the same recommendation cache key share one LLM
+        call. Each result carries the field's position in the request as
+        'index' (and its 'id', if given).
+        """
+        cells = self._group_by_cell(fields)
+        result = lambda index, *parts: self._batch_result(fields, index, *parts)
+        
+        pending = {
+            self.batch_executor.submit(self.get_field_data, *cell): ('cell', cell)
+            for cell in cells
+        }
+        waiting = {}  # recommendation key -> [(index, field_data)]
+        advice_done = {}
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, job = pending.pop(future)
+                try:
+                    value = future.result()
+                    error = None
+                except Exception as e:
+                    value, error = None, str(e)
+                
+                if kind == 'cell':
+                    if not value:
+                        for index in cells[job]:
+                            yield result(index, {'error': error or 'No data available'})
+                        continue
+                    for index in cells[job]:
+                        field_data = {**value, 'lat': fields[index]['lat'], 'lon': fields[index]['lon']}
+                        key = self.ai_model.recommendation_cache.key(field_data, self.ai_model.model_type)
+                        if key in advice_done:
+                            yield result(index, field_data, self.assess_field(field_data), advice_done[key])
+                        elif key in waiting:
+                            waiting[key].append((index, field_data))
+                        else:
+                            waiting[key] = [(index, field_data)]
+                            future = self.batch_executor.submit(self.ai_model.generate_recommendation, field_data)
+                            pending[future] = ('advice', key)
+                else:
+                    advice = None if error else {'advice': value[0], 'ai_model': value[1]}
+                    for index, field_data in waiting.pop(job):
+                        if error:
+                            yield result(index, field_data, {'error': error})
+                        else:
+                            yield result(index, field_data, self.assess_field(field_data), advice)
+                    if not error:
+                        advice_done[job] = advice
+    
+    async def aiter_field_data_batch(self, fields):
+        """Async iter_field_data_batch - weather and LLM calls run as tasks"""
+        cells = self._group_by_cell(fields)
+        result = lambda index, *parts: self._batch_result(fields, index, *parts)
+        
+        pending = {
+            asyncio.ensure_future(self.aget_field_data(*cell)): ('cell', cell)
+            for cell in cells
+        }
+        waiting = {}  # recommendation key -> [(index, field_data)]
+        advice_done = {}
+        
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                kind, job = pending.pop(future)
+                try:
+                    value = future.result()
+                    error = None
+                except Exception as e:
+                    value, error = None, str(e)
+                
+                if kind == 'cell':
+                    if not value:
+                        for index in cells[job]:
+                            yield result(index, {'error': error or 'No data available'})
+                        continue
+                    for index in cells[job]:
+                        field_data = {**value, 'lat': fields[index]['lat'], 'lon': fields[index]['lon']}
+                        key = self.ai_model.recommendation_cache.key(field_data, self.ai_model.model_type)
+                        if key in advice_done:
+                            yield result(index, field_data, self.assess_field(field_data), advice_done[key])
+                        elif key in waiting:
+                            waiting[key].append((index, field_data))
+                        else:
+                            waiting[key] = [(index, field_data)]
+                            future = asyncio.ensure_future(self.ai_model.agenerate_recommendation(field_data))
+                            pending[future] = ('advice', key)
+                else:
+                    advice = None if error else {'advice': value[0], 'ai_model': value[1]}
+                    for index, field_data in waiting.pop(job):
+                        if error:
+                            yield result(index, field_data, {'error': error})
+                        else:
+                            yield result(index, field_data, self.assess_field(field_data), advice)
+                    if not error:
+                        advice_done[job] = advice
+    
+    def _group_by_cell(self, fields):
+        """Field positions grouped by weather cell"""
+        cells = OrderedDict()
+        for index, field in enumerate(fields):
+            cells.setdefault(self.weather_cache.cell(field['lat'], field['lon']), []).append(index)
+        return cells
+    
+    def _batch_result(self, fields, index, *parts):
+        field = fields[index]
+        merged = {'index': index, 'id': field.get('id'), 'lat': field['lat'], 'lon': field['lon']}
+        for part in parts:
+            merged.update(part)
+        return merged
+    
+    def _get_grib_cube_data(self, lat, lon):
+        """Field data sampled from the in-memory regional GRIB cube, or None outside it"""
+        cube = self.grib_cube
+        if cube is None or not cube.contains(lat, lon):
+            return None
+        
+        values = cube.query(lat, lon, interpolate=self.cube_interpolate)
+        
+        def value(key, default):
+            number = values.get(key)
+            return default if number is None or math.isnan(number) else number
+        
+        temperature = value('temperatura_2m', 18.0)
+        humidity = value('vlaznost', 60.0)
+        wind_speed = value('brzina_vjetra', 2.5)
+        cloud_cover = value('oblacnost', 30.0)
+        precipitation = value('padavine', 0.0)  # accumulated over the forecast, kg/m² = mm
+        
+        # Volumetric soil moisture (m³/m³) as a percentage, if the cube has it
+        soil_water = value('vlaznost_tla', None)
+        if soil_water is not None:
+            soil_moisture = max(10, min(soil_water * 100, 80))
+        else:
+            soil_moisture = self._estimate_soil_moisture_from_weather(0, temperature, humidity, precipitation)
+        
+        vegetation = self._estimate_vegetation_from_weather(temperature, humidity, cloud_cover, precipitation)
+        ndvi = self._estimate_ndvi(vegetation, temperature, soil_moisture)
+        sunshine_duration = self._estimate_sunshine_from_clouds(cloud_cover)
+        
+        return {
+            'temperature': round(temperature, 1),
+            'soilMoisture': round(soil_moisture, 1),
+            'precipitation': round(precipitation, 1),
+            'ndvi': round(ndvi, 2),
+            'vegetation': round(vegetation, 1),
+            'windSpeed': round(wind_speed, 2),
+            'cloudCover': round(cloud_cover, 1),
+            'sunshineDuration': round(sunshine_duration / 3600, 1),
+            'lat': lat,
+            'lon': lon
+        }
+    
     def _calculate_soil_moisture(self, data):
         wilting_point = data.get('wilt', {}).get('value', 0.1)
         field_capacity = data.get('fldcp', {}).get('value', 0.36)
@@ -338,91 +1973,180 @@ class AgriculturalAI:
         
         return max(10, min(base_moisture, 80))
     
+    def _fetch_openweather(self, endpoint, cache, lat, lon):
+        """Fetch an OpenWeatherMap endpoint for the grid cell of lat/lon, using the cache"""
+        cell = self.weather_cache.cell(lat, lon)
+        cached = cache.get(cell)
+        if cached is not None:
+            return cached
+        
+        # Concurrent misses for the same cell share one upstream request
+        return self.weather_inflight.do((endpoint, cell), self._request_openweather, endpoint, cache, cell)
+    
+    def _request_openweather(self, endpoint, cache, cell):
+        # While the breaker is open, callers go straight to the fallback data
+        if not self.weather_breaker.allow():
+            return None
+        
+        start = time.monotonic()
+        try:
+            with metrics.timer(self.OPENWEATHER_STAGES[endpoint]):
+                response = self.weather_client.get(endpoint, self._openweather_params(cell))
+                data = self._openweather_json(response)
+        except Exception:
+            self.weather_breaker.record(False, time.monotonic() - start)
+            raise
+        
+        self.weather_breaker.record(data is not None, time.monotonic() - start)
+        if data is not None:
+            cache.set(cell, data)
+        return data
+    
+    async def _afetch_openweather(self, endpoint, cache, lat, lon):
+        """Async _fetch_openweather"""
+        cell = self.weather_cache.cell(lat, lon)
+        cached = cache.get(cell)
+        if cached is not None:
+            return cached
+        
+        return await self.weather_inflight.ado((endpoint, cell), self._arequest_openweather, endpoint, cache, cell)
+    
+    async def _arequest_openweather(self, endpoint, cache, cell):
+        if not self.weather_breaker.allow():
+            return None
+        
+        start = time.monotonic()
+        try:
+            with metrics.timer(self.OPENWEATHER_STAGES[endpoint]):
+                response = await self.weather_client.aget(endpoint, self._openweather_params(cell))
+                data = self._openweather_json(response)
+        except Exception:
+            self.weather_breaker.record(False, time.monotonic() - start)
+            raise
+        
+        self.weather_breaker.record(data is not None, time.monotonic() - start)
+        if data is not None:
+            cache.set(cell, data)
+        return data
+    
+    def _openweather_params(self, cell):
+        return {
+            'lat': cell[0],
+            'lon': cell[1],
+            'appid': OPENWEATHER_API_KEY,
+            'units': 'metric'
+        }
+    
+    def _openweather_json(self, response):
+        # Check for API errors
+        if response.status_code == 401:
+            print(f"⚠ OpenWeatherMap API key invalid or not activated yet")
+            print(f"   Please wait 10-120 minutes for activation")
+            # Retrying on every request won't help until the key works
+            self.weather_breaker.trip(600)
+            return None
+        
+        if response.status_code == 429:
+            retry_after = response.headers.get('Retry-After', '')
+            self.weather_breaker.trip(float(retry_after) if retry_after.isdigit() else None)
+            return None
+        
+        response.raise_for_status()
+        return response.json()
+    
     def _get_openweather_data(self, lat, lon):
         """Get real-time data from OpenWeatherMap API"""
         try:
-            # Current weather
-            current_url = f"https://api.openweathermap.org/data/2.5/weather"
-            params = {
-                'lat': lat,
-                'lon': lon,
-                'appid': OPENWEATHER_API_KEY,
-                'units': 'metric'
-            }
-            
-            response = requests.get(current_url, params=params, timeout=5)
-            
-            # Check for API errors
-            if response.status_code == 401:
-                print(f"⚠ OpenWeatherMap API key invalid or not activated yet")
-                print(f"   Please wait 10-120 minutes for activation")
-                return None
-            
-            response.raise_for_status()
-            data = response.json()
+            # 5-day forecast runs concurrently with the current-weather call
+            forecast_future = self.weather_client.submit(
+                self._fetch_openweather, 'forecast', self.weather_cache.forecast, lat, lon
+            )
             
-            # Check if data is valid
-            if 'main' not in data:
-                print(f"⚠ Invalid response from OpenWeatherMap")
+            # Current weather
+            data = self._fetch_openweather('weather', self.weather_cache.current, lat, lon)
+            if data is None:
                 return None
             
-            # Extract data
-            temperature = data['main']['temp']
-            humidity = data['main']['humidity']
-            wind_speed = data['wind']['speed']
-            clouds = data['clouds']['all']
-            
-            # Precipitation
-            precipitation = 0
-            if 'rain' in data:
-                precipitation = data['rain'].get('1h', 0)
-            
-            # Get 5-day forecast for precipitation
-            forecast_url = f"https://api.openweathermap.org/data/2.5/forecast"
-            forecast_response = requests.get(forecast_url, params=params, timeout=5)
-            forecast_data = forecast_response.json()
+            forecast_data = forecast_future.result()
+            with metrics.timer('estimation'):
+                return self._field_data_from_openweather(lat, lon, data, forecast_data)
             
-            # Calculate 7-day precipitation
-            total_precipitation = 0
-            for item in forecast_data['list'][:40]:  # 5 days * 8 (3h intervals)
-                if 'rain' in item:
-                    total_precipitation += item['rain'].get('3h', 0)
-            
-            # Estimate soil moisture
-            soil_moisture = self._estimate_soil_moisture_from_weather(
-                precipitation, temperature, humidity, total_precipitation
-            )
-            
-            # Estimate vegetation
-            vegetation = self._estimate_vegetation_from_weather(
-                temperature, humidity, clouds, total_precipitation
+        except Exception as e:
+            print(f"⚠ OpenWeatherMap API error: {e}")
+            return None
+    
+    async def _aget_openweather_data(self, lat, lon):
+        """Async _get_openweather_data - both endpoints are awaited together"""
+        try:
+            data, forecast_data = await asyncio.gather(
+                self._afetch_openweather('weather', self.weather_cache.current, lat, lon),
+                self._afetch_openweather('forecast', self.weather_cache.forecast, lat, lon)
             )
+            if data is None:
+                return None
             
-            # Estimate NDVI
-            ndvi = self._estimate_ndvi(vegetation, temperature, soil_moisture)
-            
-            # Sunshine duration
-            sunshine_duration = self._estimate_sunshine_from_clouds(clouds)
-            
-            print(f"✅ Real-time data from OpenWeatherMap: {temperature}°C, {clouds}% clouds")
-            
-            return {
-                'temperature': round(temperature, 1),
-                'soilMoisture': round(soil_moisture, 1),
-                'precipitation': round(total_precipitation, 1),
-                'ndvi': round(ndvi, 2),
-                'vegetation': round(vegetation, 1),
-                'windSpeed': round(wind_speed, 2),
-                'cloudCover': round(clouds, 1),
-                'sunshineDuration': round(sunshine_duration / 3600, 1),
-                'lat': lat,
-                'lon': lon
-            }
+            with metrics.timer('estimation'):
+                return self._field_data_from_openweather(lat, lon, data, forecast_data)
             
         except Exception as e:
             print(f"⚠ OpenWeatherMap API error: {e}")
             return None
     
+    def _field_data_from_openweather(self, lat, lon, data, forecast_data):
+        """Build field data from current weather and forecast responses"""
+        # Check if data is valid
+        if 'main' not in data:
+            print(f"⚠ Invalid response from OpenWeatherMap")
+            return None
+        
+        # Extract data
+        temperature = data['main']['temp']
+        humidity = data['main']['humidity']
+        wind_speed = data['wind']['speed']
+        clouds = data['clouds']['all']
+        
+        # Precipitation
+        precipitation = 0
+        if 'rain' in data:
+            precipitation = data['rain'].get('1h', 0)
+        
+        # Calculate 7-day precipitation
+        total_precipitation = 0
+        for item in forecast_data['list'][:40]:  # 5 days * 8 (3h intervals)
+            if 'rain' in item:
+                total_precipitation += item['rain'].get('3h', 0)
+        
+        # Estimate soil moisture
+        soil_moisture = self._estimate_soil_moisture_from_weather(
+            precipitation, temperature, humidity, total_precipitation
+        )
+        
+        # Estimate vegetation
+        vegetation = self._estimate_vegetation_from_weather(
+            temperature, humidity, clouds, total_precipitation
+        )
+        
+        # Estimate NDVI
+        ndvi = self._estimate_ndvi(vegetation, temperature, soil_moisture)
+        
+        # Sunshine duration
+        sunshine_duration = self._estimate_sunshine_from_clouds(clouds)
+        
+        print(f"✅ Real-time data from OpenWeatherMap: {temperature}°C, {clouds}% clouds")
+        
+        return {
+            'temperature': round(temperature, 1),
+            'soilMoisture': round(soil_moisture, 1),
+            'precipitation': round(total_precipitation, 1),
+            'ndvi': round(ndvi, 2),
+            'vegetation': round(vegetation, 1),
+            'windSpeed': round(wind_speed, 2),
+            'cloudCover': round(clouds, 1),
+            'sunshineDuration': round(sunshine_duration / 3600, 1),
+            'lat': lat,
+            'lon': lon
+        }
+    
     def _estimate_soil_moisture_from_weather(self, current_precip, temperature, humidity, precip_7d):
         """Estimate soil moisture from weather data"""
         base_moisture = 40
@@ -504,18 +2228,31 @@ class AgriculturalAI:
     
     def _estimate_precipitation(self, precipitation_rate):
         seconds_in_7_days = 7 * 24 * 3600
-        precipitation_7d = precipitation_rate * seconds_in_7_days
-        
-        if precipitation_rate == 0:
-            return random.uniform(0, 3)
-        
-        return precipitation_7d
+        return precipitation_rate * seconds_in_7_days
     
     def get_ai_recommendation(self, field_data):
         """Get AI-generated recommendation"""
         
         # Use AI model to generate recommendation
-        ai_advice = self.ai_model.generate_recommendation(field_data)
+        ai_advice, model = self.ai_model.generate_recommendation(field_data)
+        
+        return {
+            **self.assess_field(field_data),
+            'ai_model': model,
+            'advice': ai_advice
+        }
+    
+    async def aget_ai_recommendation(self, field_data):
+        """Async get_ai_recommendation"""
+        ai_advice, model = await self.ai_model.agenerate_recommendation(field_data)
+        return {
+            **self.assess_field(field_data),
+            'ai_model': model,
+            'advice': ai_advice
+        }
+    
+    def assess_field(self, field_data):
+        """Rule-based status, priority and analysis levels for a field"""
         
         # Determine status based on data
         moisture = field_data['soilMoisture']
@@ -537,7 +2274,6 @@ class AgriculturalAI:
         return {
             'status': status,
             'priority': priority,
-            'advice': ai_advice,
             'ai_model': self.ai_model.model_type,
             'analysis': {
                 'soilMoistureLevel': 'critical' if moisture < 20 else 'low' if moisture < 30 else 'medium' if moisture < 40 else 'high',
@@ -547,22 +2283,172 @@ class AgriculturalAI:
         }
     
     def get_chatbot_response(self, message, field_data=None):
-        """Get AI chatbot response"""
+        """Get AI chatbot response as (text, model that served it)"""
         return self.ai_model.generate_chat_response(message, field_data)
 
 
 # Initialize AI engine
 ai_engine = AgriculturalAI()
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    return jsonify({
+
+# Response bodies shared with the async server (ai_backend_async.py)
+
+def _health_payload():
+    return {
         'status': 'healthy',
         'service': 'Pametna Njiva AI Backend (with LLM)',
         'version': '2.0.0',
         'ai_model': ai_engine.ai_model.model_type,
-        'data_loaded': bool(ai_engine.data_cache)
-    })
+        'data_loaded': bool(ai_engine.data_cache),
+        'weather_cache': ai_engine.weather_cache.stats(),
+        'recommendation_cache': ai_engine.ai_model.recommendation_cache.stats(),
+        'prefetch': ai_engine.prefetcher.stats(),
+        'data_watch': ai_engine.data_watcher.stats(),
+        'circuit_breakers': {
+            'openweather': ai_engine.weather_breaker.stats(),
+            **{name: breaker.stats() for name, breaker in ai_engine.ai_model.breakers.items()}
+        },
+        'single_flight': {
+            'weather': ai_engine.weather_inflight.stats(),
+            'llm': ai_engine.ai_model.inflight.stats()
+        },
+        'hedge': ai_engine.ai_model.hedge_stats()
+    }
+
+
+def _live_field_payload(field_data, ai_recommendations):
+    """Freshly computed field data with its recommendation"""
+    return {
+        **field_data,
+        **ai_recommendations,
+        'freshness': {
+            'source': 'live',
+            'updatedAt': datetime.now().isoformat(),
+            'ageSeconds': 0
+        }
+    }
+
+
+def _parse_fields(data):
+    """Fields of a batch/registration request body; raises KeyError/TypeError/ValueError"""
+    if data is None:
+        return []
+    if not isinstance(data, dict):
+        raise ValueError('request body must be a JSON object')
+    fields = []
+    for field in data.get('fields', []):
+        if not isinstance(field, dict):
+            raise ValueError(f'field must be an object, got {field!r}')
+        fields.append({'id': field.get('id'), 'lat': float(field['lat']), 'lon': float(field['lon'])})
+    return fields
+
+
+def _prefetch_register_payload(data):
+    """Register the fields of a request body for prefetch; returns (payload, status)"""
+    try:
+        fields = _parse_fields(data)
+    except (KeyError, TypeError, ValueError) as e:
+        return {'error': f'Invalid fields: {e}'}, 400
+    
+    try:
+        added = ai_engine.prefetcher.register([(field['lat'], field['lon']) for field in fields])
+    except PrefetchLimitError as e:
+        return {'error': str(e), 'maxCells': ai_engine.prefetcher.max_cells}, 413
+    
+    return {'added': added, **ai_engine.prefetcher.stats()}, 200
+
+
+def _reload_payload(waited):
+    data_cache = ai_engine.data_cache
+    return {
+        'status': 'success' if waited else 'reloading',
+        'message': 'Data reloaded successfully' if waited else 'Data reload started',
+        'files': {
+            'json': data_cache.get('json_file', 'none'),
+            'csv': data_cache.get('csv_file', 'none')
+        }
+    }
+
+
+def _data_info_payload():
+    data_cache = ai_engine.data_cache
+    return {
+        'json_file': data_cache.get('json_file', 'none'),
+        'csv_file': data_cache.get('csv_file', 'none'),
+        'data_available': bool(data_cache),
+        'ai_model': ai_engine.ai_model.model_type,
+        'parameters': list(data_cache.get('json', {}).keys())
+    }
+
+
+def _metrics_payload():
+    """Prometheus text for /api/metrics"""
+    collected = []
+    caches = {
+        'weather_current': ai_engine.weather_cache.current,
+        'weather_forecast': ai_engine.weather_cache.forecast,
+        'recommendation': ai_engine.ai_model.recommendation_cache.cache
+    }
+    for name, cache in caches.items():
+        cache_stats = cache.stats()
+        collected += [
+            ('smartfield_cache_hits_total', {'cache': name}, cache_stats['hits']),
+            ('smartfield_cache_misses_total', {'cache': name}, cache_stats['misses']),
+            ('smartfield_cache_hit_ratio', {'cache': name}, cache_stats['hitRatio'])
+        ]
+    
+    breakers = {'openweather': ai_engine.weather_breaker, **ai_engine.ai_model.breakers}
+    for name, breaker in breakers.items():
+        collected += [
+            ('smartfield_circuit_breaker_open', {'provider': name}, int(breaker.state != CircuitBreaker.CLOSED)),
+            ('smartfield_circuit_breaker_rejected_total', {'provider': name}, breaker.rejected)
+        ]
+    
+    for name, inflight in (('weather', ai_engine.weather_inflight), ('llm', ai_engine.ai_model.inflight)):
+        collected.append(('smartfield_single_flight_coalesced_total', {'group': name}, inflight.coalesced))
+    
+    collected += [
+        ('smartfield_llm_hedged_total', {}, ai_engine.ai_model.hedges),
+        ('smartfield_llm_hedge_wins_total', {}, ai_engine.ai_model.hedge_wins)
+    ]
+    return metrics.render(collected)
+
+
+def _sse(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _stream_sse(kind, text, partial):
+    """SSE for a ('token' | 'fallback', text) stream event; partial - tokens were sent before"""
+    if kind == 'fallback':
+        return _sse('fallback', {'message': text, 'partial': partial})
+    return _sse('token', {'token': text})
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.monotonic()
+
+@app.after_request
+def record_request_time(response):
+    # Streamed responses are timed until their headers, not their last event
+    if 'request_started' in g:
+        metrics.observe(
+            'smartfield_request_seconds', time.monotonic() - g.request_started,
+            endpoint=request.url_rule.rule if request.url_rule else 'unmatched',
+            status=response.status_code
+        )
+    return response
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    return jsonify(_health_payload())
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(_metrics_payload(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/field-data', methods=['GET'])
 def get_field_data():
@@ -570,6 +2456,11 @@ def get_field_data():
         lat = float(request.args.get('lat', 43.3438))
         lon = float(request.args.get('lon', 17.8078))
         
+        # Registered fields are answered from the background snapshot
+        snapshot = ai_engine.prefetcher.snapshot(lat, lon)
+        if snapshot:
+            return jsonify(snapshot)
+        
         field_data = ai_engine.get_field_data(lat, lon)
         
         if not field_data:
@@ -577,12 +2468,7 @@ def get_field_data():
         
         ai_recommendations = ai_engine.get_ai_recommendation(field_data)
         
-        response = {
-            **field_data,
-            **ai_recommendations
-        }
-        
-        return jsonify(response)
+        return jsonify(_live_field_payload(field_data, ai_recommendations))
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -594,41 +2480,128 @@ def chatbot():
         message = data.get('message', '')
         field_data = data.get('fieldData', None)
         
-        response = ai_engine.get_chatbot_response(message, field_data)
+        response, model = ai_engine.get_chatbot_response(message, field_data)
         
         return jsonify({
             'response': response,
-            'ai_model': ai_engine.ai_model.model_type,
+            'ai_model': model,
             'timestamp': datetime.now().isoformat()
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/field-data/batch', methods=['POST'])
+def field_data_batch():
+    """Field data and recommendations for many fields, streamed as NDJSON"""
+    try:
+        fields = _parse_fields(request.get_json())
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid fields: {e}'}), 400
+    
+    def lines():
+        for item in ai_engine.iter_field_data_batch(fields):
+            yield json.dumps(item, ensure_ascii=False) + '\n'
+    
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+
+def _sse_response(events):
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/api/field-data/stream', methods=['GET'])
+def stream_field_data():
+    """Field data as a first event, then the recommendation token by token"""
+    try:
+        lat = float(request.args.get('lat', 43.3438))
+        lon = float(request.args.get('lon', 17.8078))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def events():
+        try:
+            field_data = ai_engine.get_field_data(lat, lon)
+            if not field_data:
+                yield _sse('error', {'error': 'No data available'})
+                return
+            
+            yield _sse('field', {**field_data, **ai_engine.assess_field(field_data)})
+            
+            parts, fallback = [], None
+            for kind, value in ai_engine.ai_model.stream_recommendation(field_data):
+                if kind == 'done':
+                    # A fallback replaces the partial advice, it is not appended
+                    yield _sse('done', {
+                        'advice': fallback if fallback is not None else ''.join(parts).strip(),
+                        'ai_model': value
+                    })
+                    break
+                yield _stream_sse(kind, value, bool(parts))
+                if kind == 'fallback':
+                    fallback = value
+                else:
+                    parts.append(value)
+        except Exception as e:
+            yield _sse('error', {'error': str(e)})
+    
+    return _sse_response(events())
+
+@app.route('/api/chatbot/stream', methods=['POST'])
+def stream_chatbot():
+    """Chatbot answer streamed as Server-Sent Events"""
+    data = request.get_json() or {}
+    message = data.get('message', '')
+    field_data = data.get('fieldData', None)
+    
+    def events():
+        try:
+            partial = False
+            for kind, value in ai_engine.ai_model.stream_chat_response(message, field_data):
+                if kind == 'done':
+                    yield _sse('done', {'ai_model': value, 'timestamp': datetime.now().isoformat()})
+                    break
+                yield _stream_sse(kind, value, partial)
+                partial = True
+        except Exception as e:
+            yield _sse('error', {'error': str(e)})
+    
+    return _sse_response(events())
+
+@app.before_request
+def start_background_threads():
+    # Started lazily so the reloader's parent process never runs them
+    ai_engine.prefetcher.start()
+    ai_engine.data_watcher.start()
+
+@app.route('/api/prefetch/fields', methods=['GET', 'POST'])
+def prefetch_fields():
+    """Register fields for background refresh (POST) or list prefetch state (GET)"""
+    if request.method == 'GET':
+        return jsonify(ai_engine.prefetcher.stats())
+    
+    payload, status = _prefetch_register_payload(request.get_json())
+    return jsonify(payload), status
+
 @app.route('/api/reload-data', methods=['POST'])
 def reload_data():
+    """Reload data files in the background; ?wait=true blocks until the new data is in"""
     try:
-        ai_engine.load_latest_data()
-        return jsonify({
-            'status': 'success',
-            'message': 'Data reloaded successfully',
-            'files': {
-                'json': ai_engine.data_cache.get('json_file', 'none'),
-                'csv': ai_engine.data_cache.get('csv_file', 'none')
-            }
-        })
+        reload = ai_engine.data_watcher.reload_async()
+        waited = request.args.get('wait', 'false').lower() in ('1', 'true', 'yes')
+        if waited:
+            reload.join()
+        
+        return jsonify(_reload_payload(waited)), 200 if waited else 202
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/data-info', methods=['GET'])
 def data_info():
-    return jsonify({
-        'json_file': ai_engine.data_cache.get('json_file', 'none'),
-        'csv_file': ai_engine.data_cache.get('csv_file', 'none'),
-        'data_available': bool(ai_engine.data_cache),
-        'ai_model': ai_engine.ai_model.model_type,
-        'parameters': list(ai_engine.data_cache.get('json', {}).keys()) if 'json' in ai_engine.data_cache else []
-    })
+    return jsonify(_data_info_payload())
 
 if __name__ == '__main__':
     print("=" * 60)
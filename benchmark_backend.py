@@ -0,0 +1,539 @@
+"""
+Load-test benchmark for the Pametna Njiva backend
+
+Starts a local stand-in for OpenWeatherMap (/weather, /forecast) and an
+OpenAI-compatible chat completions endpoint, starts the backend against it
+and drives /api/field-data, /api/chatbot and /api/field-data/batch at rising
+concurrency. Throughput and p50/p95/p99 latency per scenario and
+concurrency level are written as a JSON report. With --baseline the run is
+compared against an earlier report and exits with 1 on a regression, so
+performance changes can be checked offline, without API keys.
+
+Usage:
+    python benchmark_backend.py
+    python benchmark_backend.py --server asgi --concurrency 1,8,32,128 --duration 15
+    python benchmark_backend.py --llm-latency 1.5 --llm-error-rate 0.05 --output report.json
+    python benchmark_backend.py --baseline benchmark_report.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS = ('field-data', 'chatbot', 'batch')
+
+CHAT_QUESTIONS = [
+    "Kada da navodnjavam polje?",
+    "Da li je vrijeme za prihranu dušikom?",
+    "Kakav je rizik od bolesti ove sedmice?",
+    "Šta da radim sa niskim NDVI?",
+    "When should I irrigate this field?",
+]
+
+
+class ProviderStubs:
+    """OpenWeatherMap and OpenAI-compatible chat stand-ins on one local port
+
+    Every response waits for its configured latency (± jitter) and fails
+    with HTTP 500 at the configured error rate. Weather values are derived
+    from the requested coordinates, so different cells get different data.
+    Calls are counted per endpoint.
+    """
+
+    def __init__(self, owm_latency=0.15, llm_latency=0.8, jitter=0.2,
+                 owm_error_rate=0.0, llm_error_rate=0.0, token_delay=0.01, seed=42):
+        self.owm_latency = owm_latency
+        self.llm_latency = llm_latency
+        self.jitter = jitter
+        self.owm_error_rate = owm_error_rate
+        self.llm_error_rate = llm_error_rate
+        self.token_delay = token_delay
+        self.calls = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        stubs = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stubs._handle_weather(self)
+
+            def do_POST(self):
+                stubs._handle_chat(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='provider-stubs').start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.calls)
+
+    def _count(self, key):
+        with self._lock:
+            self.calls[key] += 1
+
+    def _wait(self, latency, error_rate):
+        """Sleep for the latency with jitter; True if this call should fail"""
+        with self._lock:
+            factor = 1 + self.jitter * self._random.uniform(-1, 1)
+            failed = self._random.random() < error_rate
+        time.sleep(max(latency * factor, 0))
+        return failed
+
+    def _send_json(self, handler, status, body):
+        data = json.dumps(body).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _handle_weather(self, handler):
+        url = urlparse(handler.path)
+        endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+        if endpoint not in ('weather', 'forecast'):
+            self._send_json(handler, 404, {'message': 'not found'})
+            return
+
+        self._count(endpoint)
+        if self._wait(self.owm_latency, self.owm_error_rate):
+            self._count('weather_errors')
+            self._send_json(handler, 500, {'message': 'injected error'})
+            return
+
+        query = parse_qs(url.query)
+        lat = float(query.get('lat', ['43.34'])[0])
+        lon = float(query.get('lon', ['17.81'])[0])
+        seed = int(abs(lat * 1000 + lon * 10))
+        if endpoint == 'weather':
+            body = {
+                'main': {'temp': 10 + seed % 20, 'humidity': 40 + seed % 50},
+                'wind': {'speed': (seed % 80) / 10},
+                'clouds': {'all': seed % 100},
+                'rain': {'1h': (seed % 5) / 10}
+            }
+        else:
+            body = {'list': [{'rain': {'3h': ((seed + i) % 7) / 10}} for i in range(40)]}
+        self._send_json(handler, 200, body)
+
+    def _handle_chat(self, handler):
+        length = int(handler.headers.get('Content-Length', 0))
+        request = json.loads(handler.rfile.read(length) or b'{}')
+        if not handler.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(handler, 404, {'error': {'message': 'not found'}})
+            return
+
+        self._count('chat')
+        if self._wait(self.llm_latency, self.llm_error_rate):
+            self._count('chat_errors')
+            self._send_json(handler, 500, {'error': {'message': 'injected error', 'type': 'server_error'}})
+            return
+
+        words = ("Preporuka: navodnjavajte rano ujutro, pratite vlažnost tla "
+                 "i planirajte prihranu nakon sljedećih padavina.").split()
+        prompt_tokens = sum(len(m.get('content', '').split()) for m in request.get('messages', []))
+        model = request.get('model', 'stub')
+
+        if not request.get('stream'):
+            self._send_json(handler, 200, {
+                'id': 'chatcmpl-stub',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': ' '.join(words)},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': len(words),
+                    'total_tokens': prompt_tokens + len(words)
+                }
+            })
+            return
+
+        # Server-sent events until the connection closes
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream')
+        handler.send_header('Connection', 'close')
+        handler.end_headers()
+        handler.close_connection = True
+        for i, word in enumerate(words):
+            chunk = {
+                'id': 'chatcmpl-stub',
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'delta': {'content': word + ' '}, 'finish_reason': None}]
+            }
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            handler.wfile.flush()
+            if i < len(words) - 1:
+                time.sleep(self.token_delay)
+        handler.wfile.write(b"data: [DONE]\n\n")
+
+
+class Backend:
+    """The backend server (Flask or ASGI) in a subprocess, wired to the stubs"""
+
+    def __init__(self, server, stubs_url, provider, port=None, extra_env=None, log_path=None):
+        self.server = server
+        self.port = port or _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.log_path = log_path
+        self.env = {
+            **os.environ,
+            'AI_MODEL': provider,
+            'GROQ_API_KEY': 'benchmark',
+            'GROQ_BASE_URL': stubs_url,
+            'OPENAI_API_KEY': 'benchmark',
+            'OPENAI_BASE_URL': f"{stubs_url}/v1",
+            'OPENWEATHER_BASE_URL': f"{stubs_url}/data/2.5",
+            'AI_HEDGE_MODEL': '',
+            'RECOMMENDATION_CACHE_PATH': '',
+            'PREFETCH_ENABLED': 'false',
+            'DATA_WATCH_ENABLED': 'false',
+            'PYTHONUNBUFFERED': '1',
+            **(extra_env or {})
+        }
+        self._process = None
+        self._log = None
+
+    def command(self):
+        if self.server == 'asgi':
+            return [sys.executable, '-m', 'uvicorn', 'ai_backend_async:app',
+                    '--host', '127.0.0.1', '--port', str(self.port), '--log-level', 'warning']
+        return [sys.executable, '-m', 'flask', '--app', 'ai_backend_with_llm', 'run',
+                '--host', '127.0.0.1', '--port', str(self.port), '--no-reload', '--no-debugger']
+
+    def start(self, timeout=60):
+        self._log = open(self.log_path, 'w', encoding='utf-8') if self.log_path else subprocess.DEVNULL
+        self._process = subprocess.Popen(
+            self.command(), cwd=ROOT, env=self.env, stdout=self._log, stderr=subprocess.STDOUT
+        )
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"Backend exited with code {self._process.returncode}"
+                                   + (f", see {self.log_path}" if self.log_path else ''))
+            try:
+                if httpx.get(f"{self.url}/api/health", timeout=2).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"Backend did not answer /api/health within {timeout}s")
+
+    def health(self):
+        return httpx.get(f"{self.url}/api/health", timeout=10).json()
+
+    def stop(self):
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        if self._log not in (None, subprocess.DEVNULL):
+            self._log.close()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def make_fields(count, spread, seed, center=(43.3438, 17.8078)):
+    """Field coordinates spread uniformly around the center (degrees)"""
+    rng = random.Random(seed)
+    return [
+        {
+            'id': i,
+            'lat': round(center[0] + rng.uniform(-spread, spread) / 2, 4),
+            'lon': round(center[1] + rng.uniform(-spread, spread) / 2, 4)
+        }
+        for i in range(count)
+    ]
+
+
+# Each request returns 'ok', 'fallback' (answered, but by the local model
+# because the LLM failed) or 'status' (non-200 or incomplete response)
+
+def _outcome(response):
+    if response.status_code != 200:
+        return 'status'
+    return 'fallback' if response.json().get('ai_model') == 'local' else 'ok'
+
+
+async def _field_data(client, rng, fields, args):
+    field = rng.choice(fields)
+    return _outcome(await client.get('/api/field-data', params={'lat': field['lat'], 'lon': field['lon']}))
+
+
+async def _chatbot(client, rng, fields, args):
+    field = rng.choice(fields)
+    return _outcome(await client.post('/api/chatbot', json={
+        'message': rng.choice(CHAT_QUESTIONS),
+        'fieldData': {'lat': field['lat'], 'lon': field['lon'], 'soilMoisture': rng.randint(15, 60)}
+    }))
+
+
+async def _batch(client, rng, fields, args):
+    body = {'fields': rng.sample(fields, min(args.batch_size, len(fields)))}
+    async with client.stream('POST', '/api/field-data/batch', json=body) as response:
+        if response.status_code != 200:
+            return 'status'
+        results = [json.loads(line) async for line in response.aiter_lines() if line.strip()]
+    if len(results) != len(body['fields']) or any('error' in item for item in results):
+        return 'status'
+    return 'fallback' if any(item.get('ai_model') == 'local' for item in results) else 'ok'
+
+
+REQUESTS = {'field-data': _field_data, 'chatbot': _chatbot, 'batch': _batch}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+async def run_level(base_url, scenario, concurrency, fields, args):
+    """Closed loop: `concurrency` clients send requests back to back
+
+    Requests started during the warmup are not measured. Throughput is
+    measured requests over the time from the end of the warmup to the last
+    measured response.
+    """
+    request = REQUESTS[scenario]
+    latencies = []
+    errors = Counter()
+    fallbacks = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        started = time.monotonic()
+        measure_from = started + args.warmup
+        stop_at = measure_from + args.duration
+        last_done = measure_from
+
+        async def worker(index):
+            nonlocal last_done, fallbacks
+            rng = random.Random(f"{args.seed}-{scenario}-{concurrency}-{index}")
+            while time.monotonic() < stop_at:
+                start = time.monotonic()
+                try:
+                    outcome = await request(client, rng, fields, args)
+                except httpx.HTTPError as e:
+                    outcome = type(e).__name__
+                done = time.monotonic()
+                if start >= measure_from:
+                    latencies.append(done - start)
+                    last_done = max(last_done, done)
+                    if outcome == 'fallback':
+                        fallbacks += 1
+                    elif outcome != 'ok':
+                        errors[outcome] += 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+    latencies.sort()
+    elapsed = max(last_done - measure_from, 1e-9)
+    ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(errors.values()),
+        'errorKinds': dict(errors),
+        'errorRate': round(sum(errors.values()) / len(latencies), 4) if latencies else 0.0,
+        'fallbacks': fallbacks,
+        'durationSeconds': round(elapsed, 3),
+        'throughputRps': round(len(latencies) / elapsed, 2),
+        'latencyMs': {
+            'mean': ms(sum(latencies) / len(latencies)) if latencies else None,
+            'p50': ms(percentile(latencies, 0.50)),
+            'p95': ms(percentile(latencies, 0.95)),
+            'p99': ms(percentile(latencies, 0.99)),
+            'max': ms(latencies[-1] if latencies else None)
+        }
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Regressions against a baseline report: p95 latency, throughput and error rate"""
+    previous = {(r['scenario'], r['concurrency']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        before = previous.get((result['scenario'], result['concurrency']))
+        if before is None:
+            continue
+        name = f"{result['scenario']} @ {result['concurrency']}"
+        p95, p95_before = result['latencyMs']['p95'], before['latencyMs']['p95']
+        if p95 is not None and p95_before and p95 > p95_before * (1 + tolerance):
+            regressions.append(f"{name}: p95 {p95_before}ms -> {p95}ms")
+        if result['throughputRps'] < before['throughputRps'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughputRps']} -> {result['throughputRps']} req/s")
+        if result['errorRate'] > before['errorRate'] + 0.01:
+            regressions.append(f"{name}: error rate {before['errorRate']} -> {result['errorRate']}")
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test benchmark for the Pametna Njiva backend')
+    parser.add_argument('--server', choices=['flask', 'asgi'], default='flask', help='Backend server to start')
+    parser.add_argument('--url', help='Benchmark an already running backend instead of starting one')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"Comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument('--concurrency', default='1,4,16,64', help='Comma-separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=10, help='Measured seconds per level')
+    parser.add_argument('--warmup', type=float, default=2, help='Unmeasured seconds before each level')
+    parser.add_argument('--timeout', type=float, default=60, help='Client timeout per request (seconds)')
+    parser.add_argument('--fields', type=int, default=500, help='Number of distinct field locations')
+    parser.add_argument('--spread', type=float, default=2.0, help='Side of the square the fields lie in (degrees)')
+    parser.add_argument('--batch-size', type=int, default=20, help='Fields per batch request')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for fields, requests and injected errors')
+    parser.add_argument('--llm-provider', choices=['groq', 'openai'], default='groq',
+                        help='OpenAI-compatible client the backend uses against the chat stub')
+    parser.add_argument('--owm-latency', type=float, default=0.15, help='OpenWeatherMap stub latency (seconds)')
+    parser.add_argument('--llm-latency', type=float, default=0.8, help='Chat stub latency (seconds)')
+    parser.add_argument('--jitter', type=float, default=0.2, help='Latency jitter as a fraction (0.2 = ±20%%)')
+    parser.add_argument('--owm-error-rate', type=float, default=0.0, help='Fraction of weather calls that return 500')
+    parser.add_argument('--llm-error-rate', type=float, default=0.0, help='Fraction of chat calls that return 500')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Extra backend environment, e.g. --env WEATHER_CACHE_CELL=0.1')
+    parser.add_argument('--backend-log', help='Write the backend output to this file')
+    parser.add_argument('--output', default='benchmark_report.json', help='JSON report path')
+    parser.add_argument('--baseline', help='Earlier report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression vs the baseline')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        print(f"❌ Unknown scenarios: {', '.join(sorted(unknown))}")
+        return 2
+    levels = [int(level) for level in args.concurrency.split(',')]
+    fields = make_fields(args.fields, args.spread, args.seed)
+
+    stubs = ProviderStubs(
+        args.owm_latency, args.llm_latency, args.jitter,
+        args.owm_error_rate, args.llm_error_rate, seed=args.seed
+    ).start()
+    backend = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            extra_env = dict(item.split('=', 1) for item in args.env)
+            backend = Backend(args.server, stubs.url, args.llm_provider,
+                              extra_env=extra_env, log_path=args.backend_log).start()
+            base_url = backend.url
+        print(f"🚀 Benchmarking {base_url} ({args.server if backend else 'external'})")
+
+        results = []
+        for scenario in scenarios:
+            for concurrency in levels:
+                before = stubs.snapshot()
+                result = asyncio.run(run_level(base_url, scenario, concurrency, fields, args))
+                after = stubs.snapshot()
+                result['upstreamCalls'] = {key: after[key] - before.get(key, 0) for key in after}
+                results.append(result)
+                latency = {
+                    key: '-' if value is None else f"{value:.0f}ms"
+                    for key, value in result['latencyMs'].items()
+                }
+                print(f"   {scenario:11s} c={concurrency:<4d} {result['throughputRps']:8.1f} req/s  "
+                      f"p50 {latency['p50']:>7s}  p95 {latency['p95']:>7s}  p99 {latency['p99']:>7s}  "
+                      f"errors {result['errors']}  fallbacks {result['fallbacks']}")
+
+        health = None
+        if backend is not None:
+            try:
+                health = backend.health()
+            except httpx.HTTPError:
+                pass
+    finally:
+        if backend is not None:
+            backend.stop()
+        stubs.stop()
+
+    report = {
+        'generatedAt': datetime.now().isoformat(),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpuCount': os.cpu_count(),
+        'config': vars(args),
+        'results': results,
+        'backendHealth': health
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report['regressions'] = compare(report, json.load(f), args.tolerance)
+        for regression in report['regressions']:
+            print(f"⚠ Regression: {regression}")
+        status = 1 if report['regressions'] else 0
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Report: {args.output}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
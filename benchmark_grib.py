@@ -0,0 +1,412 @@
+"""
+Mikro-benchmark za grib_processor - brzina ekstrakcije pygrib vs cfgrib
+
+Pravi sintetičke regular_ll GRIB2 fajlove (sve varijable iz TARGET_VARIABLES
+na nivoima iz LEVELS_TO_PROCESS) za više veličina mreže, pa za svaku
+kombinaciju mreža × broj farmi × biblioteka mjeri:
+
+    - faze posebno: open, index, decode, sample, save - mjere se unutar
+      process_grib_batch_with_pygrib/cfgrib (argument timer)
+    - cijelu obradu: process_grib_with_pygrib/cfgrib za jednu farmu,
+      process_grib_batch_with_pygrib/cfgrib za više farmi
+    - tačke/s (farme × varijable izvučene u sekundi) i varijable/s
+      (dekodirana polja u sekundi)
+    - vršnu memoriju po fazi (tracemalloc, poseban prolaz da ne usporava
+      mjerenje vremena) i vršni RSS procesa
+
+Svaki slučaj se izvršava u novom procesu, pa se memorija i keševi ne
+prenose između slučajeva. Rezultat je JSON izvještaj.
+
+Pokretanje:
+    python benchmark_grib.py
+    python benchmark_grib.py --grids 1.0,0.5,0.25 --farms 1,100,10000 --repeat 5
+    python benchmark_grib.py --engines pygrib --packing grid_ccsds --output grib_bench.json
+
+Potrebno: numpy, eccodes (generator), pygrib i/ili cfgrib + xarray.
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+import grib_processor as gp
+
+# Sintetičke poruke: pygrib ime -> (discipline, parameterCategory,
+# parameterNumber, typeOfFirstFixedSurface, nivo, akumulacija, tipična
+# vrijednost, amplituda). Nivoi: 1 = surface, 103 = heightAboveGround,
+# 106 = depthBelowLandLayer (0-10 cm), 10 = atmosphere. Novije eccodes
+# tabele neke od njih zovu drugačije (npr. 'Total Cloud Cover') - takve
+# pygrib obrada ne pronalazi, pa izvještaj navodi dekodirane varijable.
+SYNTHETIC_MESSAGES = {
+    '2 metre temperature': (0, 0, 0, 103, 2, False, 285.0, 15.0),
+    'Total Precipitation': (0, 1, 8, 1, 0, True, 2.0, 2.0),
+    '2 metre relative humidity': (0, 1, 1, 103, 2, False, 70.0, 25.0),
+    '10 metre U wind component': (0, 2, 2, 103, 10, False, 0.0, 8.0),
+    '10 metre V wind component': (0, 2, 3, 103, 10, False, 0.0, 8.0),
+    'Surface pressure': (0, 3, 0, 1, 0, False, 98000.0, 3000.0),
+    'Total cloud cover': (0, 6, 1, 10, 0, False, 50.0, 50.0),
+    'Soil temperature': (2, 0, 2, 106, 0, False, 283.0, 10.0),
+    'Volumetric soil moisture': (2, 0, 25, 106, 0, False, 0.3, 0.15),
+    'Downward short-wave radiation flux': (0, 4, 192, 1, 0, True, 300.0, 300.0),
+}
+
+STAGES = ('open', 'index', 'decode', 'sample', 'save')
+
+# Kolone koje batch obrada računa iz U i V komponente, ne dekodira
+DERIVED_KEYS = ('brzina_vjetra', 'smjer_vjetra')
+
+
+def make_synthetic_grib(path, resolution=0.5, step=0, packing='grid_simple'):
+    """
+    Pravi globalni regular_ll GRIB2 fajl sa svim varijablama iz SYNTHETIC_MESSAGES
+
+    Polja su glatka (zavise od geografske širine i dužine) uz malo šuma,
+    da pakovanje radi kao na stvarnim podacima.
+
+    Args:
+        path: Izlazni fajl
+        resolution: Korak mreže u stepenima (0.25 = GFS 0.25°)
+        step: Korak prognoze u satima
+        packing: packingType za eccodes (grid_simple, grid_ccsds, grid_complex_spatial_differencing)
+    """
+    import eccodes
+    import numpy as np
+
+    ni = int(round(360 / resolution))
+    nj = int(round(180 / resolution)) + 1
+    lats = np.linspace(90, -90, nj)[:, None]
+    lons = np.arange(ni)[None, :] * resolution
+    pattern = np.cos(np.radians(lats)) * np.sin(np.radians(lons) * 3)
+    noise = np.random.default_rng(step).standard_normal((nj, ni)) * 0.01
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for discipline, category, number, surface, level, accumulated, base, amplitude in SYNTHETIC_MESSAGES.values():
+            h = eccodes.codes_grib_new_from_samples('GRIB2')
+            try:
+                eccodes.codes_set(h, 'centre', 'kwbc')  # NCEP lokalne tabele (vlažnost tla, radijacija)
+                if accumulated:
+                    eccodes.codes_set(h, 'productDefinitionTemplateNumber', 8)
+                eccodes.codes_set(h, 'discipline', discipline)
+                eccodes.codes_set(h, 'parameterCategory', category)
+                eccodes.codes_set(h, 'parameterNumber', number)
+                eccodes.codes_set(h, 'typeOfFirstFixedSurface', surface)
+                if surface == 103:
+                    eccodes.codes_set(h, 'scaleFactorOfFirstFixedSurface', 0)
+                    eccodes.codes_set(h, 'scaledValueOfFirstFixedSurface', level)
+                elif surface == 106:
+                    eccodes.codes_set(h, 'scaleFactorOfFirstFixedSurface', 2)
+                    eccodes.codes_set(h, 'scaledValueOfFirstFixedSurface', 0)
+                    eccodes.codes_set(h, 'typeOfSecondFixedSurface', 106)
+                    eccodes.codes_set(h, 'scaleFactorOfSecondFixedSurface', 2)
+                    eccodes.codes_set(h, 'scaledValueOfSecondFixedSurface', 10)
+
+                eccodes.codes_set(h, 'gridType', 'regular_ll')
+                eccodes.codes_set(h, 'Ni', ni)
+                eccodes.codes_set(h, 'Nj', nj)
+                eccodes.codes_set(h, 'latitudeOfFirstGridPointInDegrees', 90.0)
+                eccodes.codes_set(h, 'longitudeOfFirstGridPointInDegrees', 0.0)
+                eccodes.codes_set(h, 'latitudeOfLastGridPointInDegrees', -90.0)
+                eccodes.codes_set(h, 'longitudeOfLastGridPointInDegrees', 360 - resolution)
+                eccodes.codes_set(h, 'iDirectionIncrementInDegrees', resolution)
+                eccodes.codes_set(h, 'jDirectionIncrementInDegrees', resolution)
+
+                if accumulated:
+                    eccodes.codes_set(h, 'forecastTime', 0)
+                    eccodes.codes_set(h, 'lengthOfTimeRange', max(step, 1))
+                else:
+                    eccodes.codes_set(h, 'forecastTime', step)
+
+                eccodes.codes_set(h, 'packingType', packing)
+                eccodes.codes_set(h, 'bitsPerValue', 16)
+                values = base + amplitude * (pattern + noise)
+                eccodes.codes_set_values(h, values.ravel())
+                eccodes.codes_write(h, f)
+            finally:
+                eccodes.codes_release(h)
+    os.replace(tmp_path, path)
+    return path
+
+
+def make_farms(count, seed=42, bbox=gp.DEFAULT_BBOX):
+    """Nasumične koordinate farmi unutar regiona (lat_min, lat_max, lon_min, lon_max)"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    lat_min, lat_max, lon_min, lon_max = bbox
+    return np.column_stack([rng.uniform(lat_min, lat_max, count), rng.uniform(lon_min, lon_max, count)])
+
+
+def remove_indexes(grib_file):
+    """Briše indekse pored GRIB fajla (naš .msgidx.json i cfgrib .idx) - mjeri se hladan start"""
+    import glob
+
+    for path in glob.glob(grib_file + gp.MESSAGE_INDEX_SUFFIX) + glob.glob(grib_file + '.*.idx'):
+        os.remove(path)
+
+
+class StageTimer:
+    """Sabira vrijeme po fazama; uz trace_memory i vršnu memoriju faze (tracemalloc)"""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.peak_mb = dict.fromkeys(STAGES, 0.0)
+
+    @contextmanager
+    def stage(self, name):
+        import tracemalloc
+        from time import perf_counter
+
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += perf_counter() - start
+            if self.trace_memory:
+                peak = (tracemalloc.get_traced_memory()[1] - base) / 2**20
+                self.peak_mb[name] = max(self.peak_mb[name], peak)
+
+
+def _save_batch(store_root, keys, coords, values):
+    """Faza save: tabela farme × varijable u FarmDataStore"""
+    with gp.FarmDataStore(store_root) as store:
+        store.append_batch('bench', {'lat': coords[:, 0], 'lon': coords[:, 1], 'keys': keys, 'values': values})
+
+
+def run_batch_stages(engine, grib_file, coords, store_root, timer):
+    """
+    Prava batch obrada (gp.BATCH_ENGINES) sa mjeračem faza, pa save - upis
+    rezultata u skladište
+
+    Faze mjeri sam grib_processor (vidi stage_context). pygrib poruke
+    pronalazi kroz indeks poruka, pa kod njega faza open ostaje 0.
+
+    Returns:
+        Ključevi dekodiranih varijabli (bez izračunatog vjetra i bez
+        varijabli koje nisu pronađene)
+    """
+    import numpy as np
+
+    batch = gp.BATCH_ENGINES[engine](grib_file, coords, timer=timer)
+
+    with timer.stage('save'):
+        _save_batch(store_root, batch['keys'], coords, batch['values'])
+    return [
+        key for col, key in enumerate(batch['keys'])
+        if key not in DERIVED_KEYS and not np.isnan(batch['values'][:, col]).all()
+    ]
+
+
+SINGLE_FARM = {
+    'pygrib': gp.process_grib_with_pygrib,
+    'cfgrib': gp.process_grib_with_cfgrib,
+}
+
+
+def _median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def _rss_mb():
+    """Vršni RSS procesa u MB (None na Windowsu)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+
+def run_case(grib_file, engine, farm_count, repeat, seed, workdir):
+    """
+    Jedan slučaj (fajl × biblioteka × broj farmi) - izvršava se u novom procesu
+
+    Indeksi se brišu prije svakog ponavljanja, pa su sva mjerenja hladan
+    start (fajl je ipak u kešu operativnog sistema). Prvi prolaz, koji
+    uključuje učitavanje eccodes tabela, ne ulazi u medijanu.
+    """
+    import shutil
+    import tracemalloc
+    from contextlib import redirect_stdout
+    from time import perf_counter
+
+    # Uvoz biblioteka nije dio mjerenja (grib_processor ih uvozi lijeno)
+    import numpy
+    if engine == 'cfgrib':
+        import cfgrib.dataset
+        import xarray
+    else:
+        import pygrib
+
+    # process_grib_with_* čuvaju JSON/CSV u trenutnom direktoriju
+    os.chdir(workdir)
+    coords = make_farms(farm_count, seed)
+    rss_start = _rss_mb()
+    store_root = os.path.join(workdir, 'store')
+
+    def run_stages(timer):
+        remove_indexes(grib_file)
+        shutil.rmtree(store_root, ignore_errors=True)
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            return run_batch_stages(engine, grib_file, coords, store_root, timer)
+
+    # Prvi prolaz u procesu učitava eccodes tabele definicija - mjeri se posebno
+    first_run = StageTimer()
+    run_stages(first_run)
+
+    timings = []
+    for _ in range(repeat):
+        timer = StageTimer()
+        decoded = run_stages(timer)
+        timings.append(timer.seconds)
+
+    # Poseban prolaz za memoriju - tracemalloc usporava Python kod
+    tracemalloc.start()
+    memory = StageTimer(trace_memory=True)
+    run_stages(memory)
+    tracemalloc.stop()
+
+    end_to_end = []
+    for _ in range(repeat):
+        remove_indexes(grib_file)
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            start = perf_counter()
+            if farm_count == 1:
+                SINGLE_FARM[engine](grib_file, float(coords[0, 0]), float(coords[0, 1]))
+            else:
+                gp.BATCH_ENGINES[engine](grib_file, coords)
+            end_to_end.append(perf_counter() - start)
+
+    variables = len(decoded)
+    stages = {name: round(_median([t[name] for t in timings]), 6) for name in STAGES}
+    total = sum(stages.values())
+    return {
+        'engine': engine,
+        'farms': farm_count,
+        'variables': variables,
+        'variableKeys': decoded,
+        'stageSeconds': stages,
+        'stageSecondsMin': {name: round(min(t[name] for t in timings), 6) for name in STAGES},
+        'totalSeconds': round(total, 6),
+        'firstRunSeconds': round(sum(first_run.seconds.values()), 6),
+        'pointsPerSecond': round(farm_count * variables / total, 1) if total else None,
+        'variablesPerSecond': round(variables / total, 2) if total else None,
+        'endToEnd': {
+            'function': (SINGLE_FARM[engine] if farm_count == 1 else gp.BATCH_ENGINES[engine]).__name__,
+            'seconds': round(_median(end_to_end), 6),
+            'pointsPerSecond': round(farm_count * variables / _median(end_to_end), 1)
+        },
+        'stagePeakMb': {name: round(value, 2) for name, value in memory.peak_mb.items()},
+        'rssStartMb': rss_start,
+        'rssPeakMb': _rss_mb()
+    }
+
+
+def available_engines():
+    """Biblioteke koje su instalirane"""
+    from importlib.util import find_spec
+
+    engines = []
+    if find_spec('pygrib'):
+        engines.append('pygrib')
+    if find_spec('cfgrib') and find_spec('xarray'):
+        engines.append('cfgrib')
+    return engines
+
+
+def parse_args(argv=None):
+    """Argumenti komandne linije"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Mikro-benchmark ekstrakcije GRIB podataka')
+    parser.add_argument('--grids', default='1.0,0.5,0.25', help='Koraci mreže u stepenima, odvojeni zarezom')
+    parser.add_argument('--farms', default='1,100,10000', help='Brojevi farmi, odvojeni zarezom')
+    parser.add_argument('--engines', help='pygrib,cfgrib (podrazumijevano sve instalirane)')
+    parser.add_argument('--repeat', type=int, default=3, help='Ponavljanja po slučaju (uzima se medijana)')
+    parser.add_argument('--packing', default='grid_simple', help='packingType sintetičkih poruka')
+    parser.add_argument('--seed', type=int, default=42, help='Seed za koordinate farmi')
+    parser.add_argument('--workdir', help='Direktorij za GRIB fajlove i izlaz (podrazumijevano privremeni)')
+    parser.add_argument('--output', default='grib_benchmark.json', help='JSON izvještaj')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Glavna funkcija"""
+    import json
+    import multiprocessing
+    import platform
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    from datetime import datetime
+
+    args = parse_args(argv)
+    installed = available_engines()
+    engines = args.engines.split(',') if args.engines else installed
+    missing = [engine for engine in engines if engine not in installed]
+    if missing or not engines:
+        print(f"❌ Nije instalirano: {', '.join(missing) or 'pygrib ILI cfgrib + xarray'}")
+        return 1
+
+    grids = [float(value) for value in args.grids.split(',')]
+    farm_counts = [int(value) for value in args.farms.split(',')]
+    output = os.path.abspath(args.output)
+    workdir = args.workdir or tempfile.mkdtemp(prefix='grib_bench_')
+    os.makedirs(workdir, exist_ok=True)
+
+    print("=" * 70)
+    print("⏱️  GRIB BENCHMARK")
+    print("=" * 70)
+
+    results = []
+    spawn = multiprocessing.get_context('spawn')
+    for resolution in grids:
+        grib_file = os.path.join(workdir, f'synthetic_{resolution:g}deg.grib2')
+        if not os.path.exists(grib_file):
+            make_synthetic_grib(grib_file, resolution, packing=args.packing)
+        size_mb = os.path.getsize(grib_file) / 2**20
+        print(f"\n📂 Mreža {resolution:g}° ({grib_file}, {size_mb:.1f} MB)")
+
+        for engine in engines:
+            for farm_count in farm_counts:
+                case_dir = os.path.join(workdir, f'{engine}_{resolution:g}_{farm_count}')
+                os.makedirs(case_dir, exist_ok=True)
+                # Novi proces po slučaju - čist RSS i bez keševa prethodnih slučajeva
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                    result = pool.submit(
+                        run_case, grib_file, engine, farm_count, args.repeat, args.seed, case_dir
+                    ).result()
+                result.update({
+                    'gridResolution': resolution,
+                    'gridPoints': int(round(360 / resolution)) * (int(round(180 / resolution)) + 1),
+                    'fileMb': round(size_mb, 2)
+                })
+                results.append(result)
+
+                stages = '  '.join(f"{name} {result['stageSeconds'][name] * 1000:7.1f}ms" for name in STAGES)
+                print(f"   {engine:6s} {farm_count:6d} farmi: {stages}  "
+                      f"| {result['pointsPerSecond']:12,.0f} tačaka/s  "
+                      f"| RSS {result['rssPeakMb']} MB")
+
+    report = {
+        'generatedAt': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpuCount': os.cpu_count(),
+        'config': vars(args),
+        'workdir': workdir,
+        'results': results
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Izvještaj: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
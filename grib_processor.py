@@ -4,47 +4,370 @@ GRIB2 Procesor - Ekstrakcija meteoroloških podataka za poljoprivredu
 
 import os
 import sys
+from contextlib import contextmanager
 
 def check_dependencies():
-    """Provjerava da li su instalirane potrebne biblioteke"""
+    """Provjerava da li su instalirane potrebne biblioteke (bez uvoza - brz start)"""
+    from importlib.util import find_spec
+    
     missing = []
     
-    try:
-        import pygrib
+    if find_spec('pygrib'):
         print("✅ pygrib instaliran")
-    except ImportError:
-        try:
-            import cfgrib
-            import xarray
-            print("✅ cfgrib + xarray instalirani")
-        except ImportError:
-            missing.append("pygrib ILI (cfgrib + xarray)")
+    elif find_spec('cfgrib') and find_spec('xarray'):
+        print("✅ cfgrib + xarray instalirani")
+    else:
+        missing.append("pygrib ILI (cfgrib + xarray)")
     
-    try:
-        import numpy
+    if find_spec('numpy'):
         print("✅ numpy instaliran")
-    except ImportError:
+    else:
         missing.append("numpy")
     
-    try:
-        import pandas
-        print("✅ pandas instaliran")
-    except ImportError:
-        missing.append("pandas")
-    
     if missing:
         print("\n❌ Nedostaju biblioteke:")
         for lib in missing:
             print(f"   - {lib}")
         print("\n📥 Instaliraj sa:")
-        print("   pip install pygrib numpy pandas")
+        print("   pip install pygrib numpy")
         print("   ILI")
-        print("   pip install cfgrib xarray numpy pandas")
+        print("   pip install cfgrib xarray numpy")
         return False
     
     return True
 
 
+# Varijable koje tražimo u GRIB fajlu (pygrib ime -> ključ u farm_data)
+TARGET_VARIABLES = {
+    '2 metre temperature': 'temperatura_2m',
+    'Total Precipitation': 'padavine',
+    '2 metre relative humidity': 'vlaznost',
+    '10 metre U wind component': 'vjetar_u',
+    '10 metre V wind component': 'vjetar_v',
+    'Surface pressure': 'pritisak',
+    'Total cloud cover': 'oblacnost',
+    'Soil temperature': 'temp_tla',
+    'Volumetric soil moisture': 'vlaznost_tla',
+    'Downward short-wave radiation flux': 'solarna_radijacija'
+}
+
+
+def convert_units(var_name, value, units):
+    """
+    Konvertuje vrijednost u jedinice pogodne za farmera
+
+    Radi i sa skalarima i sa NumPy nizovima.
+
+    Returns:
+        (value, unit): konvertovana vrijednost i oznaka jedinice
+    """
+    name = var_name.lower()
+    if 'temperature' in name:
+        return value - 273.15, '°C'  # Kelvin to Celsius
+    elif 'precipitation' in name:
+        return value, 'kg/m²'
+    elif 'humidity' in name:
+        return value, '%'
+    elif 'wind' in name:
+        return value, 'm/s'
+    elif 'pressure' in name:
+        return value / 100, 'hPa'  # Pa to hPa
+    elif 'radiation' in name:
+        return value, 'W/m²'
+    elif 'moisture' in name:
+        return value, 'm³/m³'
+    return value, units
+
+
+class GridIndex:
+    """
+    Indeks regularne lat/lon mreže (regular_ll) za uzorkovanje tačaka
+    
+    Pretvara nizove koordinata u ravne (flat) indekse mreže jednom
+    vektorizovanom operacijom - bez argmin pretrage po svakoj varijabli.
+    Instance se keširaju po definiciji mreže, pa sve varijable i sve
+    farme na istoj mreži dijele iste indekse.
+    """
+    
+    _cache = {}
+    
+    def __init__(self, lat0, lon0, dlat, dlon, nlat, nlon):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.dlat = dlat  # Negativan kada mreža ide od sjevera prema jugu
+        self.dlon = dlon
+        self.nlat = nlat
+        self.nlon = nlon
+        self.is_global = abs(abs(dlon) * nlon - 360) < abs(dlon) / 2
+    
+    @classmethod
+    def get(cls, lat0, lon0, dlat, dlon, nlat, nlon):
+        """Vraća keširani indeks za datu definiciju mreže"""
+        # float/int, da isti opis mreže (npr. 90 i 90.0) dijeli instancu,
+        # a izvedene vrijednosti ostanu Python brojevi (JSON zaglavlja)
+        key = (
+            round(float(lat0), 6), round(float(lon0), 6), round(float(dlat), 6), round(float(dlon), 6),
+            int(nlat), int(nlon)
+        )
+        if key not in cls._cache:
+            cls._cache[key] = cls(*key)
+        return cls._cache[key]
+    
+    @classmethod
+    def from_pygrib(cls, grb):
+        """Indeks iz pygrib poruke (samo regular_ll mreže)"""
+        if grb['gridType'] != 'regular_ll':
+            raise ValueError(f"Nepodržan tip mreže: {grb['gridType']}")
+        dlat = grb['jDirectionIncrementInDegrees']
+        if not grb['jScansPositively']:
+            dlat = -dlat
+        return cls.get(
+            grb['latitudeOfFirstGridPointInDegrees'],
+            grb['longitudeOfFirstGridPointInDegrees'],
+            dlat,
+            grb['iDirectionIncrementInDegrees'],
+            grb['Nj'],
+            grb['Ni']
+        )
+    
+    @classmethod
+    def from_coords(cls, lats, lons):
+        """Indeks iz 1D nizova koordinata (npr. xarray latitude/longitude)"""
+        return cls.get(
+            float(lats[0]), float(lons[0]),
+            float(lats[1] - lats[0]), float(lons[1] - lons[0]),
+            len(lats), len(lons)
+        )
+    
+    @property
+    def shape(self):
+        return (self.nlat, self.nlon)
+    
+    def _fractional(self, lats, lons):
+        """Razlomljene pozicije (red, kolona) tačaka u mreži"""
+        import numpy as np
+        
+        rows = (np.asarray(lats, dtype=np.float64) - self.lat0) / self.dlat
+        offsets = np.asarray(lons, dtype=np.float64) - self.lon0
+        if self.is_global:
+            offsets = np.mod(offsets, 360)
+        else:
+            offsets = np.mod(offsets + 180, 360) - 180  # Regionalna mreža - bez omotavanja
+        return rows, offsets / self.dlon
+    
+    def nearest(self, lats, lons):
+        """Ravni indeksi najbližih tačaka mreže"""
+        import numpy as np
+        
+        rows, cols = self._fractional(lats, lons)
+        rows = np.clip(np.rint(rows), 0, self.nlat - 1).astype(np.intp)
+        cols = np.rint(cols).astype(np.intp)
+        cols = cols % self.nlon if self.is_global else np.clip(cols, 0, self.nlon - 1)
+        return rows * self.nlon + cols
+    
+    def bilinear(self, lats, lons):
+        """
+        Četiri susjedne tačke i bilinearne težine
+        
+        Returns:
+            (indices, weights): oba oblika (N, 4), redoslijed susjeda je
+            (r0, c0), (r0, c1), (r1, c0), (r1, c1)
+        """
+        import numpy as np
+        
+        rows, cols = self._fractional(lats, lons)
+        rows = np.clip(rows, 0, self.nlat - 1)
+        r0 = np.clip(np.floor(rows), 0, max(self.nlat - 2, 0)).astype(np.intp)
+        r1 = np.minimum(r0 + 1, self.nlat - 1)
+        fr = rows - r0
+        
+        if self.is_global:
+            c0 = np.floor(cols).astype(np.intp) % self.nlon
+            c1 = (c0 + 1) % self.nlon
+            fc = cols - np.floor(cols)
+        else:
+            cols = np.clip(cols, 0, self.nlon - 1)
+            c0 = np.clip(np.floor(cols), 0, max(self.nlon - 2, 0)).astype(np.intp)
+            c1 = np.minimum(c0 + 1, self.nlon - 1)
+            fc = cols - c0
+        
+        indices = np.stack([
+            r0 * self.nlon + c0, r0 * self.nlon + c1,
+            r1 * self.nlon + c0, r1 * self.nlon + c1
+        ], axis=-1)
+        weights = np.stack([
+            (1 - fr) * (1 - fc), (1 - fr) * fc,
+            fr * (1 - fc), fr * fc
+        ], axis=-1)
+        return indices, weights
+    
+    def point(self, lat, lon, interpolate=False):
+        """
+        Skalarna verzija nearest/bilinear za jednu tačku
+        
+        Bez NumPy nizova indeksa - za upite po jednoj tački (npr. po
+        HTTP zahtjevu) to je višestruko brže od vektorizovanog puta.
+        
+        Returns:
+            Lista (red, kolona, težina) - jedan element ili četiri susjeda
+        """
+        import math
+        
+        row = min(max((lat - self.lat0) / self.dlat, 0), self.nlat - 1)
+        offset = lon - self.lon0
+        offset = offset % 360 if self.is_global else (offset + 180) % 360 - 180
+        col = offset / self.dlon
+        
+        if not interpolate:
+            c = round(col)
+            c = c % self.nlon if self.is_global else min(max(c, 0), self.nlon - 1)
+            return [(round(row), c, 1.0)]
+        
+        r0 = min(math.floor(row), max(self.nlat - 2, 0))
+        r1 = min(r0 + 1, self.nlat - 1)
+        fr = row - r0
+        if self.is_global:
+            c0 = math.floor(col) % self.nlon
+            c1 = (c0 + 1) % self.nlon
+            fc = col - math.floor(col)
+        else:
+            col = min(max(col, 0), self.nlon - 1)
+            c0 = min(math.floor(col), max(self.nlon - 2, 0))
+            c1 = min(c0 + 1, self.nlon - 1)
+            fc = col - c0
+        return [
+            (r0, c0, (1 - fr) * (1 - fc)), (r0, c1, (1 - fr) * fc),
+            (r1, c0, fr * (1 - fc)), (r1, c1, fr * fc)
+        ]
+    
+    def sample(self, field, indices):
+        """Uzima vrijednosti polja (..., nlat, nlon) na ravnim indeksima"""
+        import numpy as np
+        
+        field = np.asarray(field)
+        return field.reshape(field.shape[:-2] + (-1,))[..., indices]
+    
+    def interpolate(self, field, indices, weights):
+        """Bilinearna interpolacija polja na tačkama iz bilinear()"""
+        return (self.sample(field, indices) * weights).sum(axis=-1)
+
+
+# Sufiks indeksa poruka koji se čuva pored GRIB fajla
+MESSAGE_INDEX_SUFFIX = '.msgidx.json'
+
+
+def scan_grib_messages(grib_file):
+    """
+    Pronalazi bajt pozicije svih GRIB poruka u fajlu
+    
+    Čita se samo sekcija 0 (indikator) svake poruke - podaci se ne dekodiraju.
+    
+    Returns:
+        Lista (offset, length) za svaku poruku
+    """
+    import mmap
+    
+    positions = []
+    with open(grib_file, 'rb') as f:
+        if os.path.getsize(grib_file) == 0:
+            return positions
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offset = mm.find(b'GRIB')
+            while offset != -1 and offset + 16 <= len(mm):
+                edition = mm[offset + 7]
+                if edition == 2:
+                    length = int.from_bytes(mm[offset + 8:offset + 16], 'big')
+                else:
+                    length = int.from_bytes(mm[offset + 4:offset + 7], 'big')
+                if length <= 0:
+                    break
+                positions.append((offset, length))
+                offset = mm.find(b'GRIB', offset + length)
+    return positions
+
+
+def build_message_index(grib_file):
+    """
+    Pravi indeks poruka: (shortName, typeOfLevel, level, step) -> offset/length
+    
+    Svaka poruka se parsira samo kroz zaglavlje (pygrib.fromstring),
+    vrijednosti se ne dekodiraju.
+    """
+    import pygrib
+    
+    records = []
+    with open(grib_file, 'rb') as f:
+        for offset, length in scan_grib_messages(grib_file):
+            f.seek(offset)
+            grb = pygrib.fromstring(f.read(length))
+            records.append({
+                'shortName': grb.shortName if grb.has_key('shortName') else 'N/A',
+                'typeOfLevel': grb.typeOfLevel if grb.has_key('typeOfLevel') else 'N/A',
+                'level': grb.level if grb.has_key('level') else None,
+                'step': grb.step if grb.has_key('step') else None,
+                'name': grb.name,
+                'units': grb.units if grb.has_key('units') else 'N/A',
+                'offset': offset,
+                'length': length
+            })
+    return records
+
+
+def load_message_index(grib_file, rebuild=False):
+    """
+    Učitava indeks poruka iz sidecar fajla ili ga pravi i čuva
+    
+    Indeks se smatra važećim dok se veličina i vrijeme izmjene GRIB
+    fajla ne promijene.
+    """
+    import json
+    
+    index_file = grib_file + MESSAGE_INDEX_SUFFIX
+    stat = os.stat(grib_file)
+    
+    if not rebuild and os.path.exists(index_file):
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('size') == stat.st_size and cached.get('mtime') == stat.st_mtime:
+                return cached['messages']
+        except (ValueError, KeyError, OSError):
+            pass
+    
+    records = build_message_index(grib_file)
+    try:
+        with open(index_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'messages': records
+            }, f, separators=(',', ':'), ensure_ascii=False)
+    except OSError as e:
+        print(f"⚠️  Indeks nije sačuvan: {e}")
+    
+    return records
+
+
+def select_messages(index, **keys):
+    """Vraća zapise indeksa koji odgovaraju svim zadatim ključevima (npr. name=..., step=...)"""
+    return [rec for rec in index if all(rec.get(k) == v for k, v in keys.items())]
+
+
+def read_messages(grib_file, records):
+    """Čita i parsira samo zadate poruke direktnim pozicioniranjem (seek)"""
+    import pygrib
+    
+    with open(grib_file, 'rb') as f:
+        for rec in records:
+            f.seek(rec['offset'])
+            yield rec, pygrib.fromstring(f.read(rec['length']))
+
+
+def read_message(grib_file, record):
+    """Čita jednu poruku iz GRIB fajla na osnovu zapisa iz indeksa"""
+    return next(read_messages(grib_file, [record]))[1]
+
+
 def process_grib_with_pygrib(grib_file, lat, lon):
     """
     Obrađuje GRIB2 fajl koristeći pygrib
@@ -56,13 +379,13 @@ def process_grib_with_pygrib(grib_file, lat, lon):
     """
     import pygrib
     import numpy as np
-    import pandas as pd
     
     print(f"\n📂 Otvaram GRIB fajl: {grib_file}")
     print(f"📍 Lokacija: ({lat}, {lon})")
     
     try:
-        grbs = pygrib.open(grib_file)
+        # Indeks poruka (pravi se jednom i čuva pored fajla)
+        index = load_message_index(grib_file)
         
         # ============================================================
         # 1. PREGLED SVIH DOSTUPNIH VARIJABLI
@@ -71,25 +394,14 @@ def process_grib_with_pygrib(grib_file, lat, lon):
         print("📊 DOSTUPNE METEOROLOŠKE VARIJABLE")
         print("="*70)
         
-        variables = []
-        grbs.seek(0)
-        for i, grb in enumerate(grbs, 1):
-            var_info = {
-                'index': i,
-                'name': grb.name,
-                'level': grb.level if hasattr(grb, 'level') else 'N/A',
-                'units': grb.units if hasattr(grb, 'units') else 'N/A',
-                'shortName': grb.shortName if hasattr(grb, 'shortName') else 'N/A'
-            }
-            variables.append(var_info)
-            
-            if i <= 20:  # Prikaži prvih 20
-                print(f"{i:3d}. {grb.name:40s} [{grb.units:15s}] Level: {var_info['level']}")
+        for i, rec in enumerate(index[:20], 1):  # Prikaži prvih 20
+            level = rec['level'] if rec['level'] is not None else 'N/A'
+            print(f"{i:3d}. {rec['name']:40s} [{rec['units']:15s}] Level: {level}")
         
-        if len(variables) > 20:
-            print(f"... i još {len(variables) - 20} varijabli")
+        if len(index) > 20:
+            print(f"... i još {len(index) - 20} varijabli")
         
-        print(f"\n💡 Ukupno varijabli: {len(variables)}")
+        print(f"\n💡 Ukupno varijabli: {len(index)}")
         
         # ============================================================
         # 2. EKSTRAKCIJA VARIJABLI VAŽNIH ZA POLJOPRIVREDU
@@ -100,60 +412,21 @@ def process_grib_with_pygrib(grib_file, lat, lon):
         
         farm_data = {}
         
-        # Definiši varijable koje tražimo
-        target_variables = {
-            '2 metre temperature': 'temperatura_2m',
-            'Total Precipitation': 'padavine',
-            '2 metre relative humidity': 'vlaznost',
-            '10 metre U wind component': 'vjetar_u',
-            '10 metre V wind component': 'vjetar_v',
-            'Surface pressure': 'pritisak',
-            'Total cloud cover': 'oblacnost',
-            'Soil temperature': 'temp_tla',
-            'Volumetric soil moisture': 'vlaznost_tla',
-            'Downward short-wave radiation flux': 'solarna_radijacija'
-        }
-        
         # Probaj pronaći i ekstraktovati svaku varijablu
-        for var_name, key in target_variables.items():
-            grbs.seek(0)
+        for var_name, key in TARGET_VARIABLES.items():
             try:
-                # Pronađi varijablu
-                selected = grbs.select(name=var_name)
+                # Pronađi varijablu u indeksu i pročitaj samo tu poruku
+                selected = select_messages(index, name=var_name)
                 if selected:
-                    grb = selected[0]
+                    grb = read_message(grib_file, selected[0])
                     
                     # Ekstrakcija podataka za određenu lokaciju
-                    # Uzmi podatke u radijusu od 0.5° oko lokacije
-                    data, lats, lons = grb.data(
-                        lat1=lat-0.5, lat2=lat+0.5,
-                        lon1=lon-0.5, lon2=lon+0.5
-                    )
-                    
-                    # Pronađi najbližu tačku
-                    lat_idx = np.argmin(np.abs(lats[:, 0] - lat))
-                    lon_idx = np.argmin(np.abs(lons[0, :] - lon))
-                    value = data[lat_idx, lon_idx]
+                    # preko keširanog indeksa mreže (najbliža tačka)
+                    grid = GridIndex.from_pygrib(grb)
+                    value = grid.sample(grb.values, grid.nearest(lat, lon))
                     
                     # Konverzije jedinica
-                    if 'temperature' in var_name.lower():
-                        value = value - 273.15  # Kelvin to Celsius
-                        unit = '°C'
-                    elif 'precipitation' in var_name.lower():
-                        unit = 'kg/m²'
-                    elif 'humidity' in var_name.lower():
-                        unit = '%'
-                    elif 'wind' in var_name.lower():
-                        unit = 'm/s'
-                    elif 'pressure' in var_name.lower():
-                        value = value / 100  # Pa to hPa
-                        unit = 'hPa'
-                    elif 'radiation' in var_name.lower():
-                        unit = 'W/m²'
-                    elif 'moisture' in var_name.lower():
-                        unit = 'm³/m³'
-                    else:
-                        unit = grb.units
+                    value, unit = convert_units(var_name, value, grb.units)
                     
                     farm_data[key] = {
                         'value': float(value),
@@ -188,8 +461,6 @@ def process_grib_with_pygrib(grib_file, lat, lon):
             print(f"✅ {'Brzina vjetra':40s}: {wind_speed:8.2f} m/s")
             print(f"✅ {'Smjer vjetra':40s}: {wind_direction:8.1f} °")
         
-        grbs.close()
-        
         # ============================================================
         # 3. ANALIZA I INTERPRETACIJA ZA FARMERA
         # ============================================================
@@ -216,7 +487,320 @@ def process_grib_with_pygrib(grib_file, lat, lon):
         return None
 
 
-def process_grib_with_cfgrib(grib_file, lat, lon):
+def required_variables(variables, wind_keys):
+    """
+    Ključevi koje treba dekodirati za traženu selekciju varijabli
+    
+    Brzina i smjer vjetra se računaju iz U i V komponente (wind_keys), pa
+    njihov izbor povlači i komponente. None znači sve varijable.
+    """
+    if variables is None:
+        return None
+    needed = set(variables)
+    if needed & {'brzina_vjetra', 'smjer_vjetra'}:
+        needed.update(wind_keys)
+    return needed
+
+
+def stage_context(timer):
+    """
+    Funkcija stage(ime) -> kontekst koji mjeri fazu obrade
+    
+    Faze su 'open', 'index', 'decode' i 'sample'; timer je objekat sa
+    metodom stage(ime) (npr. StageTimer iz benchmark_grib). Bez timera
+    kontekst ne radi ništa.
+    """
+    from contextlib import nullcontext
+    
+    if timer is None:
+        return lambda name: nullcontext()
+    return timer.stage
+
+
+def process_grib_batch_with_pygrib(grib_file, coords, variables=None, timer=None):
+    """
+    Obrađuje GRIB2 fajl za više farmi odjednom koristeći pygrib
+    
+    Ciljne poruke se pronalaze preko indeksa poruka i svaka se dekodira
+    samo jednom, a vrijednosti za sve farme se uzimaju iz istog dekodiranog polja.
+    
+    Args:
+        grib_file: Putanja do GRIB2 fajla
+        coords: Koordinate farmi oblika (N, 2) - [[lat, lon], ...]
+        variables: Ključevi varijabli za ekstrakciju (podrazumijevano sve);
+                   ostale poruke se ne čitaju niti dekodiraju
+        timer: Mjerač faza (stage_context) - index: indeks poruka i izbor
+               ciljnih poruka, decode: čitanje i dekodiranje polja,
+               sample: najbliže tačke i konverzija jedinica
+    
+    Returns:
+        dict sa ključevima 'lat', 'lon' (N,), 'keys', 'units', 'names' (K,)
+        i 'values' - matrica (farme × varijable), NaN gdje varijabla nije pronađena
+    """
+    import numpy as np
+    from time import perf_counter
+    
+    stage = stage_context(timer)
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    farm_lats, farm_lons = coords[:, 0], coords[:, 1]
+    
+    print(f"\n📂 Otvaram GRIB fajl: {grib_file}")
+    print(f"📍 Broj farmi: {len(coords)}")
+    
+    start = perf_counter()
+    needed = required_variables(variables, ('vjetar_u', 'vjetar_v'))
+    targets = {
+        name: key for name, key in TARGET_VARIABLES.items()
+        if needed is None or key in needed
+    }
+    keys = list(targets.values())
+    names = list(targets.keys())
+    units = [None] * len(keys)
+    values = np.full((len(coords), len(keys)), np.nan)
+    found = set()
+    farm_indices = {}
+    
+    # Iz indeksa uzimamo prvu poruku za svaku ciljnu varijablu,
+    # pa se čitaju i dekodiraju samo te poruke
+    with stage('index'):
+        index = load_message_index(grib_file)
+        if not index:
+            raise ValueError(f"Nema GRIB poruka u fajlu: {grib_file}")
+        selected = []
+        for var_name in targets:
+            matches = select_messages(index, name=var_name)
+            if matches:
+                selected.append(matches[0])
+    
+    messages = read_messages(grib_file, selected)
+    while True:
+        with stage('decode'):
+            item = next(messages, None)
+            if item is not None:
+                rec, grb = item
+                data = np.ma.filled(grb.values, np.nan)
+        if item is None:
+            break
+        
+        var_name = rec['name']
+        found.add(var_name)
+        col = keys.index(targets[var_name])
+        
+        with stage('sample'):
+            # Indeksi najbližih tačaka se računaju jednom po mreži
+            grid = GridIndex.from_pygrib(grb)
+            if grid not in farm_indices:
+                farm_indices[grid] = grid.nearest(farm_lats, farm_lons)
+            values[:, col], units[col] = convert_units(
+                var_name, grid.sample(data, farm_indices[grid]), grb.units
+            )
+        del data, grb, item
+    
+    for var_name in targets:
+        if var_name not in found:
+            print(f"⚠️  {var_name:40s}: Nije pronađeno")
+    
+    # Brzina i smjer vjetra za sve farme odjednom
+    if 'vjetar_u' in keys and 'vjetar_v' in keys:
+        u = values[:, keys.index('vjetar_u')]
+        v = values[:, keys.index('vjetar_v')]
+        wind = np.column_stack([np.sqrt(u**2 + v**2), np.degrees(np.arctan2(v, u)) % 360])
+        values = np.hstack([values, wind])
+        keys += ['brzina_vjetra', 'smjer_vjetra']
+        names += ['Wind Speed', 'Wind Direction']
+        units += ['m/s', '°']
+    
+    elapsed = perf_counter() - start
+    print(f"✅ {len(coords)} farmi × {len(found)} varijabli za {elapsed:.2f}s")
+    
+    return {
+        'lat': farm_lats,
+        'lon': farm_lons,
+        'keys': keys,
+        'names': names,
+        'units': units,
+        'values': values
+    }
+
+
+def batch_to_farm_data(batch, i):
+    """Pretvara i-ti red batch rezultata u farm_data rječnik (kao kod jedne farme)"""
+    farm_data = {}
+    for col, key in enumerate(batch['keys']):
+        value = batch['values'][i, col]
+        if value != value:  # NaN - varijabla nije pronađena
+            continue
+        farm_data[key] = {
+            'value': float(value),
+            'unit': batch['units'][col],
+            'name': batch['names'][col]
+        }
+    return farm_data
+
+
+# Nivoi GRIB fajla koje obrađuje cfgrib (typeOfLevel -> opis)
+LEVELS_TO_PROCESS = [
+    ('surface', 'Površina (temperatura, pritisak, padavine)'),
+    ('heightAboveGround', 'Visina iznad tla (temperatura 2m, vjetar 10m)'),
+    ('depthBelowLandLayer', 'Dubina ispod površine (temperatura i vlažnost tla)'),
+    ('atmosphere', 'Atmosfera (oblaci, precipitable water)'),
+]
+
+# Mapiranje cfgrib imena varijabli na razumljiva imena
+CFGRIB_VARIABLES = {
+    't2m': 'temperatura_2m',
+    'u10': 'vjetar_u_10m',
+    'v10': 'vjetar_v_10m',
+    'sp': 'pritisak_povrsine',
+    'tp': 'ukupne_padavine',
+    'tcc': 'oblacnost',
+    'r2': 'vlaznost_2m',
+    'tsoil': 'temperatura_tla',
+    'soilw': 'vlaznost_tla',
+    'dswrf': 'solarna_radijacija',
+}
+
+
+def convert_cfgrib_units(value, unit):
+    """Konverzije jedinica za cfgrib varijable (radi i sa NumPy nizovima)"""
+    if unit == 'K':
+        return value - 273.15, '°C'
+    elif unit == 'Pa':
+        return value / 100, 'hPa'
+    return value, unit
+
+
+def open_cfgrib_index(grib_file):
+    """Jedan cfgrib indeks za cijeli fajl (pravi se jednom i čuva u .idx fajlu)"""
+    from cfgrib import messages, dataset
+    
+    return dataset.open_fileindex(messages.FileStream(grib_file))
+
+
+def open_cfgrib_level(index, level_type):
+    """
+    Lijeni cfgrib skupovi podataka za jedan typeOfLevel iz zajedničkog indeksa
+    
+    Svaka varijabla dobija svoj skup podataka pa se varijable sa različitim
+    visinama (npr. t2m i u10) ne isključuju međusobno.
+    """
+    from cfgrib import dataset
+    
+    level_index = index.subindex(typeOfLevel=level_type)
+    try:
+        param_ids = level_index['paramId']
+    except KeyError:
+        return []
+    
+    opened = []
+    for param_id in sorted(param_ids):
+        try:
+            opened.append(dataset.open_from_index(level_index.subindex(paramId=param_id)))
+        except dataset.DatasetBuildError:
+            continue
+    return opened
+
+
+def open_cfgrib_levels(grib_file, level_types):
+    """
+    Otvara GRIB fajl jednom i vraća lijene cfgrib skupove podataka po nivoima
+    
+    Svi nivoi dijele jedan cfgrib indeks (open_cfgrib_index).
+    
+    Returns:
+        Lista (level_type, cfgrib.Dataset) - podaci se još ne čitaju sa diska
+    """
+    index = open_cfgrib_index(grib_file)
+    return [(level_type, ds) for level_type in level_types for ds in open_cfgrib_level(index, level_type)]
+
+
+def iter_cfgrib_points(grib_file, coords, level_types=None, on_error=None, variables=None, timer=None):
+    """
+    Lijeno čitanje vrijednosti varijabli u tačkama farmi (cfgrib)
+    
+    Fajl se otvara jednom, a polja se dekodiraju jedno po jedno tek kada
+    generator stigne do njih - u memoriji je uvijek samo jedno polje.
+    
+    Args:
+        grib_file: Putanja do GRIB2 fajla
+        coords: Koordinate farmi oblika (N, 2) - [[lat, lon], ...]
+        level_types: typeOfLevel vrijednosti (podrazumijevano LEVELS_TO_PROCESS)
+        on_error: Funkcija (level_type, greška) - ako je zadata, greška pri
+                  otvaranju ili dekodiranju jednog nivoa se prijavljuje njoj
+                  i nastavlja se sa sljedećim nivoom; inače se greška diže
+        variables: Ključevi varijabli (CFGRIB_VARIABLES) za dekodiranje;
+                   ostala polja se preskaču bez čitanja (podrazumijevano sva)
+        timer: Mjerač faza (stage_context) - index: cfgrib indeks fajla,
+               open: skupovi podataka po nivoima, decode: čitanje polja,
+               sample: najbliže tačke
+    
+    Yields:
+        (level_type, var, values, attrs) - values je niz oblika (N,)
+    """
+    import numpy as np
+    
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if level_types is None:
+        level_types = [level_type for level_type, _ in LEVELS_TO_PROCESS]
+    
+    stage = stage_context(timer)
+    needed = required_variables(variables, ('vjetar_u_10m', 'vjetar_v_10m'))
+    with stage('index'):
+        index = open_cfgrib_index(grib_file)
+    farm_indices = {}
+    for level_type in level_types:
+        try:
+            with stage('open'):
+                opened = open_cfgrib_level(index, level_type)
+            for ds in opened:
+                if 'latitude' not in ds.variables or 'longitude' not in ds.variables:
+                    continue
+                with stage('sample'):
+                    grid = GridIndex.from_coords(ds.variables['latitude'].data, ds.variables['longitude'].data)
+                    if grid not in farm_indices:
+                        farm_indices[grid] = grid.nearest(coords[:, 0], coords[:, 1])
+                
+                for var, variable in ds.variables.items():
+                    if variable.dimensions[-2:] != ('latitude', 'longitude') or var in ('latitude', 'longitude'):
+                        continue
+                    if needed is not None and CFGRIB_VARIABLES.get(var, var) not in needed:
+                        continue
+                    with stage('decode'):
+                        # Prvo polje po ostalim dimenzijama (step, nivo...) - jedna poruka
+                        leading = (0,) * (len(variable.dimensions) - 2)
+                        field = variable.data[leading + (slice(None), slice(None))]
+                    with stage('sample'):
+                        sampled = grid.sample(field, farm_indices[grid])
+                    del field
+                    yield level_type, var, sampled, variable.attributes
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(level_type, e)
+
+
+def store_cfgrib_value(farm_data, var, value, attrs, level_type):
+    """Dodaje jednu cfgrib vrijednost u farm_data uz konverziju jedinica"""
+    import numpy as np
+    
+    # Provjeri da li je validna vrijednost
+    if np.isnan(value) or np.isinf(value):
+        return
+    
+    long_name = attrs.get('long_name', var)
+    value, unit = convert_cfgrib_units(value, attrs.get('units', 'N/A'))
+    
+    farm_data[CFGRIB_VARIABLES.get(var, var)] = {
+        'value': value,
+        'unit': unit,
+        'name': long_name,
+        'level': level_type
+    }
+    
+    print(f"   ✅ {long_name:45s}: {value:10.2f} {unit}")
+
+
+def process_grib_with_cfgrib(grib_file, lat, lon, single_open=True):
     """
     Obrađuje GRIB2 fajl koristeći cfgrib + xarray
     
@@ -224,8 +808,9 @@ def process_grib_with_cfgrib(grib_file, lat, lon):
         grib_file: Putanja do GRIB2 fajla
         lat: Geografska širina farme
         lon: Geografska dužina farme
+        single_open: Otvori fajl jednom za sve nivoe i čitaj polja lijeno
+                     (False - stari način, xr.open_dataset za svaki nivo)
     """
-    import xarray as xr
     import numpy as np
     
     print(f"\n📂 Otvaram GRIB fajl sa xarray: {grib_file}")
@@ -233,93 +818,31 @@ def process_grib_with_cfgrib(grib_file, lat, lon):
     
     farm_data = {}
     
-    # GRIB fajl ima više nivoa - trebamo otvoriti svaki posebno
-    levels_to_process = [
-        ('surface', 'Površina (temperatura, pritisak, padavine)'),
-        ('heightAboveGround', 'Visina iznad tla (temperatura 2m, vjetar 10m)'),
-        ('depthBelowLandLayer', 'Dubina ispod površine (temperatura i vlažnost tla)'),
-        ('atmosphere', 'Atmosfera (oblaci, precipitable water)'),
-    ]
-    
     print("\n" + "="*70)
     print("📊 EKSTRAKCIJA PODATAKA PO NIVOIMA")
     print("="*70)
     
-    for level_type, description in levels_to_process:
-        print(f"\n🔍 {description}")
-        print("-" * 70)
+    if single_open:
+        descriptions = dict(LEVELS_TO_PROCESS)
+        current_level = None
+        
+        def level_failed(level_type, error):
+            # Greška jednog nivoa ne prekida ostale (kao u starom načinu)
+            print(f"\n🔍 {descriptions[level_type]}")
+            print(f"   ⚠️  Nije dostupno ({level_type}): {error}")
         
         try:
-            # Otvori GRIB sa filterom za specifičan nivo
-            ds = xr.open_dataset(
-                grib_file, 
-                engine='cfgrib',
-                backend_kwargs={'filter_by_keys': {'typeOfLevel': level_type}}
-            )
-            
-            # Selektuj najbližu tačku
-            # Provjeri da li postoje latitude/longitude koordinate
-            if 'latitude' in ds.coords and 'longitude' in ds.coords:
-                data_point = ds.sel(latitude=lat, longitude=lon, method='nearest')
-            else:
-                print(f"   ⚠️  Nema geo koordinata za ovaj nivo")
-                ds.close()
-                continue
-            
-            # Ekstrakcija varijabli
-            for var in data_point.data_vars:
-                try:
-                    value = float(data_point[var].values)
-                    
-                    # Provjeri da li je validna vrijednost
-                    if np.isnan(value) or np.isinf(value):
-                        continue
-                    
-                    unit = data_point[var].attrs.get('units', 'N/A')
-                    long_name = data_point[var].attrs.get('long_name', var)
-                    
-                    # Konverzije jedinica
-                    if unit == 'K':
-                        value = value - 273.15
-                        unit = '°C'
-                    elif unit == 'Pa':
-                        value = value / 100
-                        unit = 'hPa'
-                    
-                    # Mapiranje na razumljiva imena
-                    var_mapping = {
-                        't2m': 'temperatura_2m',
-                        'u10': 'vjetar_u_10m',
-                        'v10': 'vjetar_v_10m',
-                        'sp': 'pritisak_povrsine',
-                        'tp': 'ukupne_padavine',
-                        'tcc': 'oblacnost',
-                        'r2': 'vlaznost_2m',
-                        'tsoil': 'temperatura_tla',
-                        'soilw': 'vlaznost_tla',
-                        'dswrf': 'solarna_radijacija',
-                    }
-                    
-                    key = var_mapping.get(var, var)
-                    
-                    farm_data[key] = {
-                        'value': value,
-                        'unit': unit,
-                        'name': long_name,
-                        'level': level_type
-                    }
-                    
-                    print(f"   ✅ {long_name:45s}: {value:10.2f} {unit}")
-                    
-                except Exception as e:
-                    # Preskoči varijable koje ne mogu biti ekstraktovane
-                    continue
-            
-            ds.close()
-            
+            for level_type, var, values, attrs in iter_cfgrib_points(grib_file, [[lat, lon]], on_error=level_failed):
+                if level_type != current_level:
+                    current_level = level_type
+                    print(f"\n🔍 {descriptions[level_type]}")
+                    print("-" * 70)
+                store_cfgrib_value(farm_data, var, float(values[0]), attrs, level_type)
         except Exception as e:
+            # Fajl se ne može ni otvoriti
             print(f"   ⚠️  Nije dostupno: {e}")
-            continue
+    else:
+        _extract_cfgrib_per_level(grib_file, lat, lon, farm_data)
     
     # Izračunaj dodatne varijable
     if 'vjetar_u_10m' in farm_data and 'vjetar_v_10m' in farm_data:
@@ -360,107 +883,1158 @@ def process_grib_with_cfgrib(grib_file, lat, lon):
     return farm_data
 
 
-def interpret_weather_for_farming(farm_data):
-    """Interpretira vremenske podatke za poljoprivrednike"""
-    
-    recommendations = []
-    
-    # Analiza temperature
-    if 'temperatura_2m' in farm_data:
-        temp = farm_data['temperatura_2m']['value']
-        
-        if temp < 0:
-            recommendations.append("🥶 MRAZ! Rizik od smrzavanja usjeva.")
-        elif temp < 5:
-            recommendations.append("❄️  Niske temperature. Usporavanje rasta.")
-        elif 15 <= temp <= 25:
-            recommendations.append("🌡️  Optimalna temperatura za većinu usjeva.")
-        elif temp > 30:
-            recommendations.append("🔥 Visoke temperature! Povećana potreba za vodom.")
-        elif temp > 35:
-            recommendations.append("🔥 EKSTREMNA VRUĆINA! Toplotni stres usjeva.")
-    
-    # Analiza padavina
-    if 'padavine' in farm_data:
-        precip = farm_data['padavine']['value']
-        
-        if precip > 20:
-            recommendations.append("☔ Značajne padavine. Provjerite drenažu.")
-        elif precip > 50:
-            recommendations.append("⛈️  JAKA KIŠA! Rizik od poplava i erozije.")
-        elif precip < 1:
-            recommendations.append("☀️  Suvo vrijeme. Razmotriti navodnjavanje.")
-    
-    # Analiza vjetra
-    if 'brzina_vjetra' in farm_data:
-        wind = farm_data['brzina_vjetra']['value']
-        
-        if wind > 15:
-            recommendations.append("💨 JAK VJETAR! Odgodite prskanje.")
-        elif wind > 25:
-            recommendations.append("🌪️  OLUJA! Rizik od oštećenja usjeva.")
-    
-    # Analiza vlažnosti tla
-    if 'vlaznost_tla' in farm_data:
-        soil_moist = farm_data['vlaznost_tla']['value']
-        
-        if soil_moist < 0.15:
-            recommendations.append("🏜️  Suvo zemljište. Potrebno navodnjavanje.")
-        elif soil_moist > 0.35:
-            recommendations.append("💧 Zasićeno zemljište. Izbjegavajte obradu.")
-    
-    # Solarna radijacija
-    if 'solarna_radijacija' in farm_data:
-        solar = farm_data['solarna_radijacija']['value']
-        
-        if solar > 800:
-            recommendations.append("☀️  Odlični uslovi za fotosintezu.")
-        elif solar < 200:
-            recommendations.append("☁️  Oblačno. Smanjena fotosinteza.")
-    
-    # Ispis preporuka
-    if recommendations:
-        print("\n⚠️  PREPORUKE:")
-        for rec in recommendations:
-            print(f"   • {rec}")
-    else:
-        print("\n✅ Normalni vremenski uslovi.")
-
-
-def save_farm_data(farm_data, lat, lon):
-    """Čuva ekstraktovane podatke u JSON i CSV format"""
-    import json
-    import pandas as pd
-    from datetime import datetime
-    
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+def _extract_cfgrib_per_level(grib_file, lat, lon, farm_data):
+    """Stari način: xr.open_dataset posebno za svaki nivo"""
+    import xarray as xr
     
-    # JSON format
-    json_file = f'farm_data_{lat}_{lon}_{timestamp}.json'
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(farm_data, f, indent=2, ensure_ascii=False)
+    # GRIB fajl ima više nivoa - trebamo otvoriti svaki posebno
+    for level_type, description in LEVELS_TO_PROCESS:
+        print(f"\n🔍 {description}")
+        print("-" * 70)
+        
+        try:
+            # Otvori GRIB sa filterom za specifičan nivo
+            ds = xr.open_dataset(
+                grib_file, 
+                engine='cfgrib',
+                backend_kwargs={'filter_by_keys': {'typeOfLevel': level_type}}
+            )
+            
+            # Selektuj najbližu tačku
+            # Provjeri da li postoje latitude/longitude koordinate
+            if 'latitude' in ds.coords and 'longitude' in ds.coords:
+                grid = GridIndex.from_coords(ds['latitude'].values, ds['longitude'].values)
+                row, col = divmod(int(grid.nearest(lat, lon)), grid.nlon)
+                data_point = ds.isel(latitude=row, longitude=col)
+            else:
+                print(f"   ⚠️  Nema geo koordinata za ovaj nivo")
+                ds.close()
+                continue
+            
+            # Ekstrakcija varijabli
+            for var in data_point.data_vars:
+                try:
+                    value = float(data_point[var].values)
+                    store_cfgrib_value(farm_data, var, value, data_point[var].attrs, level_type)
+                except Exception as e:
+                    # Preskoči varijable koje ne mogu biti ekstraktovane
+                    continue
+            
+            ds.close()
+            
+        except Exception as e:
+            print(f"   ⚠️  Nije dostupno: {e}")
+            continue
+
+
+def process_grib_batch_with_cfgrib(grib_file, coords, variables=None, timer=None):
+    """
+    Obrađuje GRIB2 fajl za više farmi odjednom koristeći cfgrib
+    
+    Isti oblik rezultata kao process_grib_batch_with_pygrib, ali sa
+    cfgrib imenima varijabli (CFGRIB_VARIABLES).
+    
+    Args:
+        grib_file: Putanja do GRIB2 fajla
+        coords: Koordinate farmi oblika (N, 2) - [[lat, lon], ...]
+        variables: Ključevi varijabli za ekstrakciju (podrazumijevano sve)
+        timer: Mjerač faza (stage_context), faze kao u iter_cfgrib_points
+    """
+    import numpy as np
+    from time import perf_counter
+    
+    stage = stage_context(timer)
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    
+    print(f"\n📂 Otvaram GRIB fajl sa cfgrib: {grib_file}")
+    print(f"📍 Broj farmi: {len(coords)}")
+    
+    start = perf_counter()
+    keys, names, units, columns = [], [], [], []
+    points = iter_cfgrib_points(grib_file, coords, variables=variables, timer=timer)
+    for level_type, var, values, attrs in points:
+        key = CFGRIB_VARIABLES.get(var, var)
+        if key in keys:
+            continue
+        with stage('sample'):
+            values, unit = convert_cfgrib_units(values.astype(np.float64), attrs.get('units', 'N/A'))
+        keys.append(key)
+        names.append(attrs.get('long_name', var))
+        units.append(unit)
+        columns.append(values)
+    
+    values = np.column_stack(columns) if columns else np.empty((len(coords), 0))
+    
+    # Brzina i smjer vjetra za sve farme odjednom
+    if 'vjetar_u_10m' in keys and 'vjetar_v_10m' in keys:
+        u = values[:, keys.index('vjetar_u_10m')]
+        v = values[:, keys.index('vjetar_v_10m')]
+        wind = np.column_stack([np.sqrt(u**2 + v**2), (np.degrees(np.arctan2(u, v)) + 180) % 360])
+        values = np.hstack([values, wind])
+        keys += ['brzina_vjetra', 'smjer_vjetra']
+        names += ['Brzina vjetra', 'Smjer vjetra (0=sjever, 90=istok)']
+        units += ['m/s', '°']
+    
+    elapsed = perf_counter() - start
+    print(f"✅ {len(coords)} farmi × {len(keys)} varijabli za {elapsed:.2f}s")
+    
+    return {
+        'lat': coords[:, 0],
+        'lon': coords[:, 1],
+        'keys': keys,
+        'names': names,
+        'units': units,
+        'values': values
+    }
+
+
+# Batch obrada po GRIB biblioteci
+BATCH_ENGINES = {
+    'pygrib': process_grib_batch_with_pygrib,
+    'cfgrib': process_grib_batch_with_cfgrib,
+}
+
+
+def filename_step(grib_file):
+    """Korak prognoze iz imena fajla (GFS konvencija '...f003') ili None"""
+    import re
+    
+    match = re.search(r'\.f(\d{3})(?:\.grib2)?$', os.path.basename(grib_file))
+    return int(match.group(1)) if match else None
+
+
+def forecast_step(grib_file):
+    """
+    Korak prognoze (sati) za GRIB fajl
+    
+    Prvo se gleda ime fajla (filename_step), a ako ga nema, korak se čita
+    iz indeksa poruka.
+    """
+    step = filename_step(grib_file)
+    if step is not None:
+        return step
+    
+    try:
+        index = load_message_index(grib_file)
+    except Exception:
+        return 0
+    for rec in index:
+        if rec['name'] in TARGET_VARIABLES and rec['step'] is not None:
+            return int(rec['step'])
+    return int(index[0]['step']) if index and index[0]['step'] is not None else 0
+
+
+def find_cycle_files(directory, pattern='*'):
+    """
+    Pronalazi GRIB fajlove jednog ciklusa i sortira ih po koraku prognoze
+    
+    Sortira se samo po koraku iz imena fajla (pa po imenu) - indeksi poruka
+    se ovdje ne prave, nego tek u radnim procesima, gdje se i tačan korak
+    čita za fajlove bez koraka u imenu.
+    """
+    import glob
+    
+    files = [
+        f for f in glob.glob(os.path.join(directory, pattern))
+        if os.path.isfile(f) and (f.endswith('.grib2') or 'gfs' in os.path.basename(f))
+        and not f.endswith(('.idx', MESSAGE_INDEX_SUFFIX))
+    ]
+    return sorted(files, key=_filename_sort_key)
+
+
+def _filename_sort_key(grib_file):
+    step = filename_step(grib_file)
+    return (step is None, step or 0, grib_file)
+
+
+def iter_forecast_steps(grib_files, coords):
+    """
+    Generator koji prolazi kroz sve korake prognoze jednog ciklusa
+    
+    Fajlovi se obrađuju jedan po jedan, tako da se u memoriji nikad ne
+    drži više od jednog fajla. Redoslijed je po koraku iz imena fajla
+    (kao find_cycle_files), pa se za sortiranje ne prave indeksi poruka;
+    fajlovi bez koraka u imenu dolaze na kraju, po imenu.
+    
+    Yields:
+        (step, batch) - batch je rezultat process_grib_batch_with_pygrib
+    """
+    for grib_file in sorted(grib_files, key=_filename_sort_key):
+        batch = process_grib_batch_with_pygrib(grib_file, coords)
+        # Korak se računa jednom, poslije obrade - indeks poruka tada već postoji
+        yield forecast_step(grib_file), batch
+
+
+def build_forecast_cube(grib_files, coords, workers=1):
+    """
+    Slaže vremensku seriju prognoze u kompaktnu kocku (korak × farma × varijabla)
+    
+    Args:
+        grib_files: GRIB fajlovi jednog ciklusa
+        coords: Koordinate farmi oblika (N, 2)
+        workers: Broj procesa (1 - serijski, None - broj jezgara)
+    
+    Returns:
+        dict sa 'steps' (S,), 'lat', 'lon' (N,), 'keys', 'names', 'units' (K,)
+        i 'values' - float32 niz oblika (S, N, K)
+    """
+    import numpy as np
+    
+    grib_files = list(grib_files)
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    
+    if workers == 1:
+        results = iter_forecast_steps(grib_files, coords)
+    else:
+        results = ((r['step'], r['batch']) for r in process_files_parallel(grib_files, coords, workers))
+    
+    cube = None
+    steps = np.zeros(len(grib_files), dtype=np.int32)
+    for i, (step, batch) in enumerate(results):
+        if cube is None:
+            keys, names, units = batch['keys'], batch['names'], batch['units']
+            cube = np.full((len(grib_files), len(coords), len(keys)), np.nan, dtype=np.float32)
+        steps[i] = step
+        cube[i] = batch['values']
+    
+    if cube is None:
+        keys, names, units = [], [], []
+        cube = np.empty((0, len(coords), 0), dtype=np.float32)
+    else:
+        # Fajlovi bez koraka u imenu stižu na kraju - kocka ide redom po koraku
+        order = np.argsort(steps, kind='stable')
+        steps, cube = steps[order], cube[order]
+    
+    return {
+        'steps': steps,
+        'lat': coords[:, 0],
+        'lon': coords[:, 1],
+        'keys': keys,
+        'names': names,
+        'units': units,
+        'values': cube
+    }
+
+
+def _process_file_worker(grib_file, coords, engine='pygrib', variables=None):
+    """Obrada jednog fajla u radnom procesu (ProcessPoolExecutor)"""
+    from time import perf_counter
+    
+    start = perf_counter()
+    batch = BATCH_ENGINES[engine](grib_file, coords, variables)
+    return {
+        'file': grib_file,
+        'step': forecast_step(grib_file),
+        'batch': batch,
+        'elapsed': perf_counter() - start,
+        'pid': os.getpid()
+    }
+
+
+def _init_worker(log):
+    """Preusmjerava ispis radnog procesa ('stderr' ili 'null') da ne miješa NDJSON izlaz"""
+    if log == 'stderr':
+        sys.stdout = sys.stderr
+    elif log == 'null':
+        sys.stdout = open(os.devnull, 'w')
+
+
+def iter_files(grib_files, coords, workers=1, engine='pygrib', log=None, variables=None, on_error=None):
+    """
+    Obrađuje fajlove i daje rezultate čim su gotovi
+    
+    Args:
+        workers: 1 - serijski redom po koraku iz imena fajla, inače pool procesa
+                 (None - broj jezgara); rezultati stižu redom završetka
+        engine: 'pygrib' ili 'cfgrib'
+        log: Preusmjerenje ispisa radnih procesa (None, 'stderr', 'null')
+        variables: Ključevi varijabli za ekstrakciju (podrazumijevano sve)
+        on_error: Funkcija (grib_file, greška) - ako je zadata, fajl koji se
+                  ne može pročitati se prijavljuje njoj i obrada se nastavlja;
+                  inače se greška diže
+    
+    Yields:
+        Rezultat _process_file_worker za svaki fajl
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    grib_files = list(grib_files)
+    if workers == 1 or len(grib_files) <= 1:
+        for grib_file in sorted(grib_files, key=_filename_sort_key):
+            try:
+                result = _process_file_worker(grib_file, coords, engine, variables)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(grib_file, e)
+                continue
+            yield result
+        return
+    
+    workers = min(workers or os.cpu_count() or 1, len(grib_files))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(log,)) as pool:
+        futures = {pool.submit(_process_file_worker, f, coords, engine, variables): f for f in grib_files}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(futures[future], e)
+                continue
+            yield result
+
+
+def process_files_parallel(grib_files, coords, workers=None):
+    """
+    Paralelno dekodiranje više GRIB fajlova u pool-u procesa
+    
+    Rezultati se spajaju deterministički (po koraku prognoze pa po imenu
+    fajla), bez obzira na redoslijed kojim ih radni procesi završe.
+    
+    Args:
+        grib_files: Lista GRIB fajlova
+        coords: Koordinate farmi oblika (N, 2)
+        workers: Broj procesa (podrazumijevano broj jezgara)
+    
+    Returns:
+        Lista rezultata _process_file_worker sortirana po koraku
+    """
+    from time import perf_counter
+    
+    grib_files = list(grib_files)
+    if not grib_files:
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(grib_files))
+    
+    print(f"\n⚙️  Paralelna obrada: {len(grib_files)} fajlova, {workers} procesa")
+    
+    start = perf_counter()
+    results = list(iter_files(grib_files, coords, workers=workers))
+    elapsed = perf_counter() - start
+    
+    results.sort(key=lambda r: (r['step'], r['file']))
+    
+    # Propusnost po radnom procesu
+    per_worker = {}
+    for r in results:
+        stats = per_worker.setdefault(r['pid'], {'files': 0, 'seconds': 0.0, 'points': 0})
+        stats['files'] += 1
+        stats['seconds'] += r['elapsed']
+        stats['points'] += r['batch']['values'].size
+    
+    print("\n📈 Propusnost po procesu:")
+    for pid, stats in sorted(per_worker.items()):
+        rate = stats['points'] / stats['seconds'] if stats['seconds'] else 0
+        print(f"   PID {pid:7d}: {stats['files']:4d} fajlova, {stats['seconds']:8.2f}s, {rate:12.0f} vrijednosti/s")
+    print(f"   Ukupno: {len(results)} fajlova za {elapsed:.2f}s ({len(results) / elapsed:.2f} fajlova/s)")
+    
+    return results
+
+
+class FarmDataStore:
+    """
+    Append-only kolonarno skladište rezultata, particionisano po ciklusu
+    
+    Svaka kolona je poseban binarni fajl u koji se samo dopisuje, pa
+    hiljade farmi po ciklusu ne prave hiljade malih fajlova, a čitanje
+    učitava (memory-map) samo tražene kolone:
+    
+        <root>/cycle=<YYYYMMDDHH>/lat.f4, lon.f4, variable.u2, step.i2, value.f4
+        <root>/cycle=<YYYYMMDDHH>/variables.json   (šifra -> ime varijable)
+        <root>/cycle=<YYYYMMDDHH>/rows.json        (broj potvrđenih redova)
+    
+    Upisi se baferuju u memoriji i zapisuju kada bafer dostigne batch_size
+    redova ili pri flush()/close(). Flush drži zaključan particiju
+    (fcntl.flock), pa više procesa može pisati u isto skladište, a broj
+    redova se upisuje posljednji - ako se flush prekine, višak na kraju
+    kolona se ne čita i odsijeca se pri sljedećem upisu.
+    """
+    
+    COLUMNS = {
+        'lat': '<f4',
+        'lon': '<f4',
+        'variable': '<u2',
+        'step': '<i2',
+        'value': '<f4'
+    }
+    
+    def __init__(self, root='data/store', batch_size=100000):
+        self.root = root
+        self.batch_size = batch_size
+        self._buffers = {}
+        self._buffered_rows = 0
+        self._variables = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _partition(self, cycle):
+        return os.path.join(self.root, f'cycle={cycle}')
+    
+    def _column_path(self, cycle, name):
+        return os.path.join(self._partition(cycle), f'{name}.{self.COLUMNS[name][1:]}')
+    
+    @contextmanager
+    def _locked(self, cycle):
+        """Isključiv pristup particiji za pisanje (bez fcntl, npr. Windows - bez zaključavanja)"""
+        partition = self._partition(cycle)
+        os.makedirs(partition, exist_ok=True)
+        with open(os.path.join(partition, '.lock'), 'w') as lock:
+            try:
+                import fcntl
+            except ImportError:
+                yield
+                return
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    
+    def _variable_codes(self, cycle):
+        """Rječnik ime varijable -> šifra za particiju (ponovo se učitava kad se variables.json promijeni)"""
+        import json
+        
+        path = os.path.join(self._partition(cycle), 'variables.json')
+        try:
+            st = os.stat(path)
+            version = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            version = None
+        
+        cached = self._variables.get(cycle)
+        if cached is None or cached[0] != version:
+            names = []
+            if version is not None:
+                with open(path, 'r', encoding='utf-8') as f:
+                    names = json.load(f)
+            cached = self._variables[cycle] = (version, {name: code for code, name in enumerate(names)})
+        return cached[1]
+    
+    def _committed_rows(self, cycle):
+        """Broj potvrđenih redova (starije particije bez rows.json - najkraća kolona)"""
+        import json
+        
+        path = os.path.join(self._partition(cycle), 'rows.json')
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)['rows']
+        
+        sizes = []
+        for name, dtype in self.COLUMNS.items():
+            column = self._column_path(cycle, name)
+            sizes.append(os.path.getsize(column) // int(dtype[2:]) if os.path.exists(column) else 0)
+        return min(sizes)
+    
+    def append(self, cycle, lats, lons, variables, steps, values):
+        """Dodaje redove (sve kolone iste dužine) u bafer ciklusa"""
+        import numpy as np
+        
+        # Šifre na disku se dodjeljuju tek u flush-u (pod ključem), ovdje
+        # samo lokalne šifre za imena u ovom pozivu
+        local = {}
+        local_codes = np.array([local.setdefault(v, len(local)) for v in variables], dtype=np.uint16)
+        
+        columns = {
+            'lat': lats,
+            'lon': lons,
+            'step': steps,
+            'value': values
+        }
+        buffer = self._buffers.setdefault(cycle, {name: [] for name in self.COLUMNS})
+        for name, dtype in self.COLUMNS.items():
+            if name == 'variable':
+                buffer[name].append((list(local), local_codes))
+            else:
+                buffer[name].append(np.asarray(columns[name]).astype(dtype, copy=False))
+        
+        self._buffered_rows += len(local_codes)
+        if self._buffered_rows >= self.batch_size:
+            self.flush()
+    
+    def append_batch(self, cycle, batch, step=0):
+        """Dodaje tabelu (farme × varijable) iz batch obrade"""
+        import numpy as np
+        
+        n_farms, n_vars = batch['values'].shape
+        self.append(
+            cycle,
+            np.repeat(batch['lat'], n_vars),
+            np.repeat(batch['lon'], n_vars),
+            list(batch['keys']) * n_farms,
+            np.full(n_farms * n_vars, step),
+            batch['values'].ravel()
+        )
+    
+    def append_cube(self, cycle, cube):
+        """Dodaje kocku prognoze (korak × farma × varijabla)"""
+        for i, step in enumerate(cube['steps']):
+            self.append_batch(cycle, {**cube, 'values': cube['values'][i]}, int(step))
+    
+    def flush(self):
+        """Zapisuje baferovane redove na kraj kolona"""
+        import json
+        import numpy as np
+        
+        for cycle, buffer in self._buffers.items():
+            partition = self._partition(cycle)
+            with self._locked(cycle):
+                # Šifre drugih pisaca su već na disku - nove se dodaju iza njih
+                codes = dict(self._variable_codes(cycle))
+                encoded = [
+                    np.array([codes.setdefault(v, len(codes)) for v in names], dtype=np.uint16)[local_codes]
+                    for names, local_codes in buffer['variable']
+                ]
+                
+                # Prvo rječnik varijabli, pa tek onda kolone koje ga koriste
+                tmp_path = os.path.join(partition, 'variables.json.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(sorted(codes, key=codes.get), f, ensure_ascii=False)
+                os.replace(tmp_path, os.path.join(partition, 'variables.json'))
+                
+                # Odsijeci ostatke prekinutog flush-a, da kolone ostanu poravnate
+                rows = self._committed_rows(cycle)
+                added = sum(len(c) for c in encoded)
+                for name, dtype in self.COLUMNS.items():
+                    data = np.concatenate(encoded if name == 'variable' else buffer[name])
+                    with open(self._column_path(cycle, name), 'ab') as f:
+                        f.truncate(rows * int(dtype[2:]))
+                        data.tofile(f)
+                
+                # Broj redova posljednji - tek tada su novi redovi vidljivi
+                tmp_path = os.path.join(partition, 'rows.json.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'rows': rows + added}, f)
+                os.replace(tmp_path, os.path.join(partition, 'rows.json'))
+        
+        self._buffers = {}
+        self._buffered_rows = 0
+    
+    def close(self):
+        self.flush()
+    
+    def cycles(self):
+        """Lista ciklusa prisutnih u skladištu"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d.split('=', 1)[1] for d in os.listdir(self.root) if d.startswith('cycle='))
+    
+    def read(self, cycle, columns=None, variables=None):
+        """
+        Čita tražene kolone jednog ciklusa
+        
+        Args:
+            cycle: Ciklus (npr. '2025110712')
+            columns: Kolone za čitanje (podrazumijevano sve)
+            variables: Ako je zadato, samo redovi za ta imena varijabli
+        
+        Returns:
+            dict ime kolone -> NumPy niz; kolona 'variable' se vraća kao imena
+        """
+        import numpy as np
+        
+        columns = list(columns or self.COLUMNS)
+        needed = set(columns) | ({'variable'} if variables else set())
+        
+        # Samo potvrđeni redovi - višak iza njih je upis u toku ili prekinut flush
+        rows = self._committed_rows(cycle) if os.path.isdir(self._partition(cycle)) else 0
+        codes = self._variable_codes(cycle)
+        
+        arrays = {}
+        for name in needed:
+            path = self._column_path(cycle, name)
+            if rows == 0:
+                arrays[name] = np.empty(0, dtype=self.COLUMNS[name])
+            else:
+                arrays[name] = np.memmap(path, dtype=self.COLUMNS[name], mode='r', shape=(rows,))
+        
+        names = sorted(codes, key=codes.get)
+        if variables:
+            wanted = [codes[v] for v in variables if v in codes]
+            mask = np.isin(arrays['variable'], wanted)
+            arrays = {name: a[mask] for name, a in arrays.items()}
+        
+        if 'variable' in columns:
+            arrays['variable'] = np.array(names, dtype=object)[arrays['variable']] if names else arrays['variable']
+        
+        return {name: arrays[name] for name in columns}
+
+
+def grib_cycle(grib_file):
+    """Ciklus GRIB fajla (YYYYMMDDHH) iz dataDate/dataTime prve poruke"""
+    index = load_message_index(grib_file)
+    grb = read_message(grib_file, index[0])
+    return f"{grb['dataDate']:08d}{grb['dataTime'] // 100:02d}"
+
+
+# Podrazumijevani region za regionalnu kocku: Balkan oko Mostara i Sarajeva
+# (lat_min, lat_max, lon_min, lon_max)
+DEFAULT_BBOX = (42.0, 46.5, 15.0, 20.5)
+
+# Podrazumijevana putanja regionalne kocke (bez ekstenzije: .npy + .json)
+DEFAULT_CUBE_PATH = os.path.join('data', 'cube', 'regional_cube')
+
+
+def ingest_regional_cube(grib_file, out_path=DEFAULT_CUBE_PATH, bbox=DEFAULT_BBOX):
+    """
+    Izrezuje region iz GRIB fajla jednom i čuva ga kao memory-mapped kocku
+    
+    Sve poljoprivredne varijable (TARGET_VARIABLES + brzina/smjer vjetra)
+    se čuvaju kao float32 niz oblika (varijable × lat × lon) u <out_path>.npy,
+    uz malo JSON zaglavlje <out_path>.json sa definicijom mreže.
+    
+    Oba fajla se pišu u .tmp fajlove i zamjenjuju sa os.replace - prvo
+    podaci, zaglavlje zadnje - pa čitač koji drži staru kocku otvorenu ne
+    vidi polupisane podatke, a novo zaglavlje znači da je kocka gotova.
+    
+    Args:
+        grib_file: Putanja do GRIB2 fajla
+        out_path: Putanja kocke bez ekstenzije
+        bbox: (lat_min, lat_max, lon_min, lon_max)
+    """
+    import json
+    import numpy as np
+    
+    lat_min, lat_max, lon_min, lon_max = bbox
+    
+    index = load_message_index(grib_file)
+    selected = []
+    for var_name in TARGET_VARIABLES:
+        matches = select_messages(index, name=var_name)
+        if matches:
+            selected.append(matches[0])
+    if not selected:
+        print("❌ Nijedna ciljna varijabla nije pronađena")
+        return None
+    
+    keys = [TARGET_VARIABLES[rec['name']] for rec in selected] + ['brzina_vjetra', 'smjer_vjetra']
+    names = [rec['name'] for rec in selected] + ['Wind Speed', 'Wind Direction']
+    units = [None] * len(keys)
+    
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    cube = None
+    
+    for i, (rec, grb) in enumerate(read_messages(grib_file, selected)):
+        if cube is None:
+            # Redovi i kolone regiona u globalnoj mreži (računa se jednom)
+            grid = GridIndex.from_pygrib(grb)
+            rows_range, cols_range = grid._fractional([lat_max, lat_min], [lon_min, lon_max])
+            r0 = int(np.clip(np.floor(rows_range.min()), 0, grid.nlat - 1))
+            r1 = int(np.clip(np.ceil(rows_range.max()), 0, grid.nlat - 1))
+            c0 = int(np.floor(cols_range[0]))
+            ncols = int(np.ceil((lon_max - lon_min) / abs(grid.dlon))) + 2
+            rows = np.arange(r0, r1 + 1)
+            cols = np.arange(c0, c0 + ncols)
+            cols = cols % grid.nlon if grid.is_global else cols[(cols >= 0) & (cols < grid.nlon)]
+            
+            cube = np.lib.format.open_memmap(
+                out_path + '.npy.tmp', mode='w+', dtype=np.float32,
+                shape=(len(keys), len(rows), len(cols))
+            )
+            cube[:] = np.nan
+        
+        data = np.ma.filled(grb.values, np.nan)[np.ix_(rows, cols)]
+        cube[i], units[i] = convert_units(rec['name'], data, grb.units)
+    
+    # Izvedeni slojevi: brzina i smjer vjetra
+    if 'vjetar_u' in keys and 'vjetar_v' in keys:
+        u = cube[keys.index('vjetar_u')]
+        v = cube[keys.index('vjetar_v')]
+        cube[-2] = np.sqrt(u**2 + v**2)
+        cube[-1] = np.degrees(np.arctan2(v, u)) % 360
+        del u, v
+    units[-2:] = ['m/s', '°']
+    cube.flush()
+    shape = cube.shape
+    del cube
+    
+    header = {
+        'source': os.path.basename(grib_file),
+        'cycle': grib_cycle(grib_file),
+        'step': forecast_step(grib_file),
+        'bbox': list(bbox),
+        'lat0': grid.lat0 + r0 * grid.dlat,
+        'lon0': (grid.lon0 + cols[0] * grid.dlon) % 360,
+        'dlat': grid.dlat,
+        'dlon': grid.dlon,
+        'nlat': len(rows),
+        'nlon': len(cols),
+        'keys': keys,
+        'names': names,
+        'units': units
+    }
+    with open(out_path + '.json.tmp', 'w', encoding='utf-8') as f:
+        json.dump(header, f, indent=2, ensure_ascii=False)
+    os.replace(out_path + '.npy.tmp', out_path + '.npy')
+    os.replace(out_path + '.json.tmp', out_path + '.json')
+    
+    print(f"💾 Regionalna kocka sačuvana: {out_path}.npy {shape} + {out_path}.json")
+    return header
+
+
+class RegionalCube:
+    """
+    Čitač regionalne kocke (ingest_regional_cube) za brze upite po tački
+    
+    Kocka se otvara kao memory-map, pa upit za proizvoljnu lat/lon
+    tačku ne otvara GRIB - samo aritmetika indeksa i čitanje nekoliko
+    float32 vrijednosti. Može je koristiti bilo koji proces (npr. Flask backend).
+    
+    Sa in_memory=True kocka se učita u RAM - proces koji je dugo drži
+    otvorenu tada ne zavisi od fajla koji ingest može prepisati.
+    """
+    
+    def __init__(self, path=DEFAULT_CUBE_PATH, in_memory=False):
+        import json
+        import numpy as np
+        
+        self.path = path
+        with open(path + '.json', 'r', encoding='utf-8') as f:
+            self.header = json.load(f)
+        self.values = np.load(path + '.npy', mmap_mode=None if in_memory else 'r')
+        # Zaglavlje pročitano prije zamjene, a podaci poslije nje
+        expected = (len(self.header['keys']), self.header['nlat'], self.header['nlon'])
+        if self.values.shape != expected:
+            raise ValueError(f"Kocka {path}.npy {self.values.shape} ne odgovara zaglavlju {expected}")
+        self.keys = self.header['keys']
+        self.units = self.header['units']
+        self.grid = GridIndex(
+            self.header['lat0'], self.header['lon0'],
+            self.header['dlat'], self.header['dlon'],
+            self.header['nlat'], self.header['nlon']
+        )
+    
+    def contains(self, lat, lon):
+        """Da li je tačka unutar regiona kocke (radi i nad NumPy nizovima)"""
+        lat_min, lat_max, lon_min, lon_max = self.header['bbox']
+        return (lat_min <= lat) & (lat <= lat_max) & (lon_min <= lon) & (lon <= lon_max)
+    
+    def query(self, lat, lon, interpolate=False):
+        """
+        Vrijednosti svih varijabli u tački
+        
+        Returns:
+            dict ključ varijable -> vrijednost (None ako je tačka van regiona)
+        """
+        if not self.contains(lat, lon):
+            return None
+        values = sum(self.values[:, row, col] * weight for row, col, weight in self.grid.point(lat, lon, interpolate))
+        return dict(zip(self.keys, values.tolist()))
+    
+    def query_many(self, lats, lons, interpolate=False):
+        """
+        Vrijednosti za niz tačaka - matrica (tačke × varijable)
+        
+        Tačke van regiona dobijaju NaN, a ne vrijednosti ivične ćelije.
+        """
+        import numpy as np
+        
+        lats, lons = np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+        if interpolate:
+            indices, weights = self.grid.bilinear(lats, lons)
+            values = self.grid.interpolate(self.values, indices, weights).T
+        else:
+            values = self.grid.sample(self.values, self.grid.nearest(lats, lons)).T
+        values = values.astype(np.float64)
+        values[~self.contains(lats, lons)] = np.nan
+        return values
+
+
+# Pravila za poljoprivredu: ključ varijable -> uslovi redom, prvi ispunjen
+# uslov daje preporuku (isto kao if/elif lanac), pa stroži prag ide prije
+# blažeg (npr. > 35 prije > 30). Uslovi rade i nad skalarima i nad NumPy nizovima.
+FARMING_RULES = [
+    ('temperatura_2m', [
+        ('mraz', lambda t: t < 0, "🥶 MRAZ! Rizik od smrzavanja usjeva."),
+        ('niska_temperatura', lambda t: t < 5, "❄️  Niske temperature. Usporavanje rasta."),
+        ('optimalna_temperatura', lambda t: (t >= 15) & (t <= 25), "🌡️  Optimalna temperatura za većinu usjeva."),
+        ('ekstremna_vrucina', lambda t: t > 35, "🔥 EKSTREMNA VRUĆINA! Toplotni stres usjeva."),
+        ('visoka_temperatura', lambda t: t > 30, "🔥 Visoke temperature! Povećana potreba za vodom."),
+    ]),
+    ('padavine', [
+        ('jaka_kisa', lambda p: p > 50, "⛈️  JAKA KIŠA! Rizik od poplava i erozije."),
+        ('znacajne_padavine', lambda p: p > 20, "☔ Značajne padavine. Provjerite drenažu."),
+        ('suvo_vrijeme', lambda p: p < 1, "☀️  Suvo vrijeme. Razmotriti navodnjavanje."),
+    ]),
+    ('brzina_vjetra', [
+        ('oluja', lambda w: w > 25, "🌪️  OLUJA! Rizik od oštećenja usjeva."),
+        ('jak_vjetar', lambda w: w > 15, "💨 JAK VJETAR! Odgodite prskanje."),
+    ]),
+    ('vlaznost_tla', [
+        ('suvo_zemljiste', lambda m: m < 0.15, "🏜️  Suvo zemljište. Potrebno navodnjavanje."),
+        ('zasiceno_zemljiste', lambda m: m > 0.35, "💧 Zasićeno zemljište. Izbjegavajte obradu."),
+    ]),
+    ('solarna_radijacija', [
+        ('odlicna_fotosinteza', lambda s: s > 800, "☀️  Odlični uslovi za fotosintezu."),
+        ('smanjena_fotosinteza', lambda s: s < 200, "☁️  Oblačno. Smanjena fotosinteza."),
+    ]),
+]
+
+# Poruka za svako upozorenje (ime pravila -> tekst)
+ALERT_MESSAGES = {name: message for _, rules in FARMING_RULES for name, _, message in rules}
+
+
+def interpret_weather_for_farming(farm_data):
+    """Interpretira vremenske podatke za poljoprivrednike"""
+    
+    recommendations = []
+    
+    for key, rules in FARMING_RULES:
+        if key not in farm_data:
+            continue
+        value = farm_data[key]['value']
+        for _, condition, message in rules:
+            if condition(value):
+                recommendations.append(message)
+                break
+    
+    # Ispis preporuka
+    if recommendations:
+        print("\n⚠️  PREPORUKE:")
+        for rec in recommendations:
+            print(f"   • {rec}")
+    else:
+        print("\n✅ Normalni vremenski uslovi.")
+
+
+def interpret_weather_grid(fields):
+    """
+    Vektorizovana verzija interpret_weather_for_farming
+    
+    Ista pravila (FARMING_RULES) se primjenjuju kao NumPy maske nad
+    cijelim nizovima - npr. regionalnom mrežom za sve korake prognoze.
+    
+    Args:
+        fields: dict ključ varijable -> niz proizvoljnog oblika
+    
+    Returns:
+        dict ime upozorenja -> bool raster istog oblika
+    """
+    import numpy as np
+    
+    alerts = {}
+    for key, rules in FARMING_RULES:
+        if key not in fields:
+            continue
+        values = np.asarray(fields[key])
+        remaining = np.ones(values.shape, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for name, condition, _ in rules:
+                matched = np.asarray(condition(values), dtype=bool)
+                alerts[name] = matched & remaining
+                remaining &= ~matched
+    return alerts
+
+
+def compute_regional_alerts(cube_paths, coords=None):
+    """
+    Alert rasteri za regionalne kocke svih koraka i liste upozorenja po farmi
+    
+    Jedno izračunavanje pokriva i sloj za mapu i sve farme.
+    
+    Args:
+        cube_paths: Putanje regionalnih kocki (jedna po koraku, ista mreža)
+        coords: Opciono koordinate farmi oblika (N, 2)
+    
+    Returns:
+        dict sa 'steps' (S,), 'alerts' - ime -> bool niz (S, lat, lon),
+        'farms' - za svaku farmu lista (po koraku) lista poruka, ili None
+        za farmu van regiona kocki, i 'outside' - bool niz (N,) tih farmi
+    """
+    import numpy as np
+    
+    cubes = sorted((RegionalCube(path) for path in cube_paths), key=lambda c: c.header['step'])
+    if not cubes:
+        return {'steps': np.empty(0, dtype=np.int32), 'alerts': {}, 'farms': [], 'outside': np.empty(0, dtype=bool)}
+    
+    fields = {
+        key: np.stack([c.values[c.keys.index(key)] for c in cubes])
+        for key in cubes[0].keys
+    }
+    alerts = interpret_weather_grid(fields)
+    
+    farms = []
+    outside = np.empty(0, dtype=bool)
+    if coords is not None:
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        # Farme van regiona bi nearest() pritegao na ivičnu ćeliju - tuđa upozorenja
+        outside = ~cubes[0].contains(coords[:, 0], coords[:, 1])
+        indices = cubes[0].grid.nearest(coords[:, 0], coords[:, 1])
+        # (upozorenje, korak, farma) za sve farme odjednom
+        names = list(alerts)
+        hits = np.stack([alerts[name].reshape(len(cubes), -1)[:, indices] for name in names])
+        for i in range(len(coords)):
+            if outside[i]:
+                farms.append(None)
+                continue
+            farms.append([
+                [ALERT_MESSAGES[names[a]] for a in np.flatnonzero(hits[:, s, i])]
+                for s in range(len(cubes))
+            ])
+        if outside.any():
+            print(f"⚠️  {int(outside.sum())} farmi van regiona kocke - bez upozorenja")
+    
+    return {
+        'steps': np.array([c.header['step'] for c in cubes], dtype=np.int32),
+        'alerts': alerts,
+        'farms': farms,
+        'outside': outside
+    }
+
+
+def save_farm_data(farm_data, lat, lon, store=None, cycle=None, step=0):
+    """
+    Čuva ekstraktovane podatke
+    
+    Ako je zadato skladište (FarmDataStore), podaci se dodaju u njegovu
+    particiju ciklusa. Inače se pišu JSON i CSV fajlovi kao ranije.
+    """
+    import csv
+    import json
+    from datetime import datetime
+    
+    if store is not None:
+        keys = list(farm_data)
+        store.append(
+            cycle or datetime.now().strftime('%Y%m%d%H'),
+            [lat] * len(keys),
+            [lon] * len(keys),
+            keys,
+            [step] * len(keys),
+            [farm_data[key]['value'] for key in keys]
+        )
+        print(f"\n💾 Dodano u skladište: {store.root} ({len(keys)} varijabli)")
+        return
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+    # Fajlovi se pišu pod privremenim imenom pa preimenuju, da backend
+    # koji prati direktorij nikad ne učita napola zapisan fajl
+    
+    # JSON format
+    json_file = f'farm_data_{lat}_{lon}_{timestamp}.json'
+    with open(json_file + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(farm_data, f, indent=2, ensure_ascii=False)
+    os.replace(json_file + '.tmp', json_file)
     
     print(f"\n💾 JSON sačuvan: {json_file}")
     
     # CSV format
-    df_data = []
-    for key, value in farm_data.items():
-        df_data.append({
-            'varijabla': key,
-            'naziv': value['name'],
-            'vrijednost': value['value'],
-            'jedinica': value['unit']
-        })
-    
-    df = pd.DataFrame(df_data)
     csv_file = f'farm_data_{lat}_{lon}_{timestamp}.csv'
-    df.to_csv(csv_file, index=False, encoding='utf-8')
+    with open(csv_file + '.tmp', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['varijabla', 'naziv', 'vrijednost', 'jedinica'])
+        writer.writeheader()
+        for key, value in farm_data.items():
+            writer.writerow({
+                'varijabla': key,
+                'naziv': value['name'],
+                'vrijednost': value['value'],
+                'jedinica': value['unit']
+            })
+    os.replace(csv_file + '.tmp', csv_file)
     
     print(f"💾 CSV sačuvan: {csv_file}")
 
 
-def main():
+def load_farm_coordinates(path):
+    """
+    Učitava koordinate farmi iz CSV ili JSON fajla
+    
+    CSV: kolone lat, lon i opciono id
+    JSON: [{"lat": .., "lon": .., "id": ..}, ...] ili [[lat, lon], ...]
+    
+    Returns:
+        (coords, ids): lista [lat, lon] parova i lista identifikatora
+    """
+    import csv
+    import json
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(f))
+    
+    coords, ids = [], []
+    for i, row in enumerate(rows):
+        if isinstance(row, dict):
+            coords.append([float(row['lat']), float(row['lon'])])
+            ids.append(row.get('id', i))
+        else:
+            coords.append([float(row[0]), float(row[1])])
+            ids.append(i)
+    return coords, ids
+
+
+def expand_grib_paths(patterns):
+    """Proširuje putanje i glob uzorke u listu GRIB fajlova (bez sidecar indeksa)"""
+    import glob
+    
+    files = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            if path.endswith(('.idx', MESSAGE_INDEX_SUFFIX)) or path in files:
+                continue
+            files.append(path)
+    return files
+
+
+def parse_args(argv=None):
+    """Argumenti komandne linije"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description='GRIB2 procesor za poljoprivredu',
+        epilog='Bez argumenata pokreće se interaktivni režim.'
+    )
+    parser.add_argument('grib', nargs='*', help='GRIB fajlovi ili glob uzorci (npr. "data/gfs/gfs.t12z.*")')
+    parser.add_argument('--farms', help='CSV/JSON fajl sa koordinatama farmi (lat, lon, id)')
+    parser.add_argument('--lat', type=float, help='Geografska širina jedne farme')
+    parser.add_argument('--lon', type=float, help='Geografska dužina jedne farme')
+    parser.add_argument('--variables', help='Ključevi varijabli odvojeni zarezom (npr. temperatura_2m,padavine)')
+    parser.add_argument('--workers', type=int, default=1, help='Broj procesa (0 - broj jezgara)')
+    parser.add_argument('--engine', choices=sorted(BATCH_ENGINES), default='pygrib', help='GRIB biblioteka')
+    parser.add_argument('--format', choices=['ndjson', 'text'], default='ndjson', help='Format izlaza')
+    parser.add_argument('--quiet', action='store_true', help='Bez dijagnostičkog ispisa na stderr')
+    parser.add_argument('--store', help='Dodaj rezultate u FarmDataStore u ovom direktoriju')
+    parser.add_argument('--ingest-cube', action='store_true', help='Napravi regionalnu kocku umjesto ekstrakcije')
+    parser.add_argument('--cube-path', default=DEFAULT_CUBE_PATH, help='Putanja regionalne kocke (bez ekstenzije)')
+    parser.add_argument('--bbox', default=','.join(str(v) for v in DEFAULT_BBOX),
+                        help='Region kocke: lat_min,lat_max,lon_min,lon_max')
+    parser.add_argument('--parallel', action='store_true', help='Interaktivni režim: svi koraci ciklusa paralelno')
+    return parser.parse_args(argv)
+
+
+def select_batch_columns(batch, variables):
+    """Batch rezultat samo sa traženim ključevima varijabli (None - svi)"""
+    if variables is None:
+        return batch
+    columns = [col for col, key in enumerate(batch['keys']) if key in variables]
+    return {
+        **batch,
+        'keys': [batch['keys'][col] for col in columns],
+        'names': [batch['names'][col] for col in columns],
+        'units': [batch['units'][col] for col in columns],
+        'values': batch['values'][:, columns]
+    }
+
+
+def run_batch(args):
+    """
+    Neinteraktivna obrada: rezultati se ispisuju kao NDJSON zapisi
+    (jedan po farmi i koraku) čim je fajl obrađen
+    
+    Fajl koji nedostaje ili se ne može pročitati ne prekida obradu - za njega
+    se ispisuje zapis sa 'error', a povratni kod je na kraju 1.
+    """
+    from contextlib import nullcontext
+    
+    with (open(os.devnull, 'w') if args.quiet else nullcontext(sys.stderr)) as log:
+        return _run_batch(args, sys.stdout, log)
+
+
+def _run_batch(args, out, log):
+    import json
+    from contextlib import redirect_stdout
+    
+    files = expand_grib_paths(args.grib)
+    if not files:
+        print("❌ GRIB fajl nije pronađen!", file=sys.stderr)
+        return 1
+    
+    failed = []
+    
+    def file_failed(grib_file, error):
+        failed.append(grib_file)
+        print(f"❌ {grib_file}: {type(error).__name__}: {error}", file=log)
+        if args.format == 'ndjson':
+            out.write(json.dumps({
+                'file': os.path.basename(grib_file),
+                'error': f"{type(error).__name__}: {error}"
+            }, ensure_ascii=False) + '\n')
+            out.flush()
+    
+    with redirect_stdout(log if args.format == 'ndjson' else out):
+        if args.ingest_cube:
+            bbox = tuple(float(v) for v in args.bbox.split(','))
+            for grib_file in files:
+                # Više koraka - jedna kocka po koraku (<cube-path>_fNNN)
+                path = args.cube_path if len(files) == 1 else f"{args.cube_path}_f{forecast_step(grib_file):03d}"
+                try:
+                    ingest_regional_cube(grib_file, path, bbox)
+                except Exception as e:
+                    file_failed(grib_file, e)
+            return 1 if failed else 0
+        
+        if args.farms:
+            coords, ids = load_farm_coordinates(args.farms)
+        elif args.lat is not None and args.lon is not None:
+            coords, ids = [[args.lat, args.lon]], [0]
+        else:
+            print("❌ Zadaj --farms ili --lat i --lon", file=sys.stderr)
+            return 1
+        
+        selected = args.variables.split(',') if args.variables else None
+        store = FarmDataStore(args.store) if args.store else None
+        worker_log = ('null' if args.quiet else 'stderr') if args.format == 'ndjson' else None
+        
+        results = iter_files(
+            files, coords, args.workers or None, args.engine, worker_log,
+            variables=selected, on_error=file_failed
+        )
+        for result in results:
+            # Komponente vjetra dekodirane samo za brzinu/smjer se ne zapisuju
+            batch, step = select_batch_columns(result['batch'], selected), result['step']
+            
+            if store is not None:
+                try:
+                    store.append_batch(grib_cycle(result['file']), batch, step)
+                except Exception as e:
+                    file_failed(result['file'], e)
+                    continue
+            
+            for i, farm_id in enumerate(ids):
+                if args.format == 'ndjson':
+                    values = {}
+                    for col, key in enumerate(batch['keys']):
+                        value = float(batch['values'][i, col])
+                        values[key] = None if value != value else value
+                    out.write(json.dumps({
+                        'file': os.path.basename(result['file']),
+                        'step': step,
+                        'id': farm_id,
+                        'lat': coords[i][0],
+                        'lon': coords[i][1],
+                        'values': values
+                    }, ensure_ascii=False) + '\n')
+                else:
+                    farm_data = batch_to_farm_data(batch, i)
+                    print(f"\n📍 Farma {farm_id} ({coords[i][0]}, {coords[i][1]}) - korak {step}h")
+                    for key in batch['keys']:
+                        if key in farm_data:
+                            print(f"   {key:25s}: {farm_data[key]['value']:10.2f} {farm_data[key]['unit']}")
+                    interpret_weather_for_farming(farm_data)
+            out.flush()
+        
+        if store is not None:
+            store.close()
+    
+    if failed:
+        print(f"❌ Neuspješno: {len(failed)} od {len(files)} fajlova", file=log)
+        return 1
+    return 0
+
+
+def main(argv=None):
     """Glavna funkcija"""
+    args = parse_args(argv)
+    
+    if args.grib:
+        sys.exit(run_batch(args))
     
     print("="*70)
     print("🌾 GRIB2 PROCESOR ZA POLJOPRIVREDU")
@@ -470,20 +2044,18 @@ def main():
     if not check_dependencies():
         sys.exit(1)
     
-    # Pronađi GRIB fajl
-    grib_file = None
+    # Pronađi GRIB fajlove (sortirane po koraku prognoze)
+    files = []
     
     # Provjeri u data/gfs folderu
     if os.path.exists('data/gfs'):
-        files = [f for f in os.listdir('data/gfs') if f.endswith('.grib2') or 'gfs' in f]
-        if files:
-            grib_file = os.path.join('data/gfs', files[0])
+        files = find_cycle_files('data/gfs')
     
-    # Ako nije pronađen, traži u trenutnom direktoriju
-    if not grib_file:
-        files = [f for f in os.listdir('.') if f.endswith('.grib2') or 'gfs' in f]
-        if files:
-            grib_file = files[0]
+    # Ako nisu pronađeni, traži u trenutnom direktoriju
+    if not files:
+        files = find_cycle_files('.')
+    
+    grib_file = files[0] if files else None
     
     if not grib_file:
         print("\n❌ GRIB fajl nije pronađen!")
@@ -493,6 +2065,11 @@ def main():
     print(f"\n✅ Pronađen GRIB fajl: {grib_file}")
     print(f"   Veličina: {os.path.getsize(grib_file) / (1024*1024):.1f} MB")
     
+    if args.ingest_cube:
+        bbox = tuple(float(v) for v in args.bbox.split(','))
+        ingest_regional_cube(grib_file, args.cube_path, bbox)
+        return
+    
     # Unesi koordinate farme
     print("\n📍 Unesi koordinate farme:")
     print("   (Za Mostar: 43.3438, 17.8078)")
@@ -505,6 +2082,16 @@ def main():
         print("❌ Nevažeće koordinate. Koristim Mostar kao default.")
         lat, lon = 43.3438, 17.8078
     
+    # Paralelno: svi koraci ciklusa odjednom
+    if args.parallel and len(files) > 1:
+        cube = build_forecast_cube(files, [[lat, lon]], workers=None)
+        print(f"\n✅ Kocka prognoze: {cube['values'].shape} (koraci × farme × varijable)")
+        with FarmDataStore() as store:
+            store.append_cube(grib_cycle(files[0]), cube)
+        print(f"💾 Dodano u skladište: {store.root}")
+        interpret_weather_for_farming(batch_to_farm_data({**cube, 'values': cube['values'][0]}, 0))
+        return
+    
     # Obradi GRIB fajl
     try:
         import pygrib
@@ -1,7 +1,7 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { MessageCircle, X, Send, Bot, User } from 'lucide-react';
 import { getChatbotResponse } from '../utils/mockData';
-import { sendChatMessage } from '../services/api';
+import { sendChatMessage, streamChatMessage } from '../services/api';
 
 const Chatbot = () => {
   const [isOpen, setIsOpen] = useState(false);
@@ -40,26 +40,54 @@ const Chatbot = () => {
     setInputValue('');
     setIsTyping(true);
 
+    const botId = messages.length + 2;
+    let streamed = false;
+
     try {
-      // Try to get AI response from backend
-      const aiResponse = await sendChatMessage(currentInput);
-      const botResponse = {
-        id: messages.length + 2,
-        text: aiResponse,
-        sender: 'bot',
-        timestamp: new Date()
-      };
-      setMessages(prev => [...prev, botResponse]);
-    } catch (error) {
-      console.error('Error getting AI response:', error);
-      // Fallback to mock response
-      const botResponse = {
-        id: messages.length + 2,
-        text: getChatbotResponse(currentInput),
-        sender: 'bot',
-        timestamp: new Date()
-      };
-      setMessages(prev => [...prev, botResponse]);
+      // Stream AI response from backend, showing tokens as they arrive
+      await streamChatMessage(currentInput, null, (token) => {
+        if (!streamed) {
+          streamed = true;
+          setIsTyping(false);
+          setMessages(prev => [...prev, { id: botId, text: token, sender: 'bot', timestamp: new Date() }]);
+        } else {
+          setMessages(prev => prev.map(msg => (msg.id === botId ? { ...msg, text: msg.text + token } : msg)));
+        }
+      });
+    } catch (streamError) {
+      if (streamError.fallback) {
+        // The server's fallback replaces the partial streamed answer
+        const botResponse = { id: botId, text: streamError.fallback, sender: 'bot', timestamp: new Date() };
+        setMessages(prev => (streamed
+          ? prev.map(msg => (msg.id === botId ? botResponse : msg))
+          : [...prev, botResponse]));
+        return;
+      }
+      if (streamed) {
+        console.error('Chat stream interrupted:', streamError);
+        return;
+      }
+      try {
+        // Fall back to the regular JSON endpoint
+        const aiResponse = await sendChatMessage(currentInput);
+        const botResponse = {
+          id: botId,
+          text: aiResponse,
+          sender: 'bot',
+          timestamp: new Date()
+        };
+        setMessages(prev => [...prev, botResponse]);
+      } catch (error) {
+        console.error('Error getting AI response:', error);
+        // Fallback to mock response
+        const botResponse = {
+          id: botId,
+          text: getChatbotResponse(currentInput),
+          sender: 'bot',
+          timestamp: new Date()
+        };
+        setMessages(prev => [...prev, botResponse]);
+      }
     } finally {
       setIsTyping(false);
     }
@@ -2,7 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { MapContainer, TileLayer, Marker, Popup, useMapEvents, CircleMarker } from 'react-leaflet';
 import L from 'leaflet';
 import { mockFields, generateMockData } from '../utils/mockData';
-import { getFieldData } from '../services/api';
+import { getFieldData, getFieldDataBatch } from '../services/api';
 import 'leaflet/dist/leaflet.css';
 
 // Fix for default marker icons in React-Leaflet
@@ -41,6 +41,21 @@ const Map = ({ onFieldSelect, selectedField }) => {
   const center = [44.5475, 18.6753]; // Tuzla, Bosnia and Herzegovina
   const zoom = 10;
   const [isLoading, setIsLoading] = useState(false);
+  const [liveData, setLiveData] = useState({});
+
+  // Load all field markers with one batch request, updating each as it arrives
+  useEffect(() => {
+    let cancelled = false;
+    getFieldDataBatch(mockFields, (data, index) => {
+      if (cancelled) return;
+      setLiveData(prev => ({ ...prev, [mockFields[index].id]: data }));
+    });
+    return () => {
+      cancelled = true;
+    };
+  }, []);
+
+  const withLiveData = (field) => ({ ...field, ...liveData[field.id], id: field.id, name: field.name });
 
   const handleMapClick = async (lat, lng) => {
     setIsLoading(true);
@@ -59,6 +74,12 @@ const Map = ({ onFieldSelect, selectedField }) => {
   };
 
   const handleFieldClick = async (field) => {
+    // Already loaded by the batch request
+    if (liveData[field.id]) {
+      onFieldSelect(withLiveData(field));
+      return;
+    }
+
     setIsLoading(true);
     try {
       // Get fresh data from AI backend for existing fields
@@ -88,7 +109,7 @@ const Map = ({ onFieldSelect, selectedField }) => {
         
         <MapClickHandler onMapClick={handleMapClick} />
         
-        {mockFields.map((field) => (
+        {mockFields.map(withLiveData).map((field) => (
           <CircleMarker
             key={field.id}
             center={[field.lat, field.lon]}
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Plus, MapPin, Droplets, Thermometer, Leaf, Calendar, Map as MapIcon, Edit2, Trash2 } from 'lucide-react';
 import AddFieldModal from '../components/AddFieldModal';
+import { getFieldDataBatch, registerFields } from '../services/api';
 
 const MyFields = () => {
   const navigate = useNavigate();
@@ -54,6 +55,45 @@ const MyFields = () => {
     }
   }, []);
 
+  // Changes only when fields are added, moved or removed - not when their data refreshes
+  const fieldLocations = fields.map(field => `${field.id}:${field.lat},${field.lon}`).join(';');
+
+  // Let the backend keep these fields' data warm
+  useEffect(() => {
+    if (fields.length > 0) {
+      registerFields(fields);
+    }
+  }, [fieldLocations]);
+
+  // Refresh all fields with one batch request, updating each card as its data arrives
+  useEffect(() => {
+    if (fields.length === 0) return;
+    let cancelled = false;
+    getFieldDataBatch(fields, (data, index, fromBackend) => {
+      // Keep the stored values rather than replacing them with mock data
+      if (cancelled || !fromBackend) return;
+      const { id } = fields[index];
+      setFields(prev => {
+        const updatedFields = prev.map(field => (
+          field.id === id
+            ? {
+                ...field,
+                soilMoisture: data.soilMoisture,
+                temperature: data.temperature,
+                ndvi: data.ndvi,
+                lastUpdate: new Date().toISOString()
+              }
+            : field
+        ));
+        localStorage.setItem('userFields', JSON.stringify(updatedFields));
+        return updatedFields;
+      });
+    });
+    return () => {
+      cancelled = true;
+    };
+  }, [fieldLocations]);
+
   const handleAddField = (newField) => {
     const updatedFields = [...fields, newField];
     setFields(updatedFields);
@@ -28,6 +28,95 @@ export const getFieldData = async (lat, lon) => {
   }
 };
 
+/**
+ * Fetch field data and AI recommendations for many fields in one request
+ * @param {Array<Object>} fields - Fields with id, lat and lon
+ * @param {Function} onResult - Called with (data, index, fromBackend) for each field as it arrives;
+ *   fromBackend is false for mock fallback data
+ * @returns {Promise<Array<Object>>} Field data in the order of the input fields
+ */
+export const getFieldDataBatch = async (fields, onResult = () => {}) => {
+  const results = new Array(fields.length);
+  try {
+    const response = await fetch(`${API_BASE_URL}/field-data/batch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        fields: fields.map(({ id, lat, lon }) => ({ id, lat, lon }))
+      })
+    });
+    
+    if (!response.ok || !response.body) {
+      throw new Error('Failed to fetch field data batch');
+    }
+    
+    // One JSON object per line, in completion order
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    const handleLine = (line) => {
+      if (!line.trim()) return;
+      const item = JSON.parse(line);
+      const data = item.error ? getFallbackData(item.lat, item.lon) : item;
+      results[item.index] = data;
+      onResult(data, item.index, !item.error);
+    };
+    
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      lines.forEach(handleLine);
+    }
+    handleLine(buffer);
+  } catch (error) {
+    console.error('Error fetching field data batch:', error);
+  }
+  
+  // Fallback to mock data for fields the backend did not return
+  fields.forEach((field, index) => {
+    if (!results[index]) {
+      results[index] = getFallbackData(field.lat, field.lon);
+      onResult(results[index], index, false);
+    }
+  });
+  return results;
+};
+
+/**
+ * Register fields with the backend so their data is prefetched in the background
+ * @param {Array<Object>} fields - Fields with lat and lon
+ * @returns {Promise<Object|null>} Prefetch status, or null if the backend is unavailable
+ */
+export const registerFields = async (fields) => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/prefetch/fields`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        fields: fields.map(({ lat, lon }) => ({ lat, lon }))
+      })
+    });
+    
+    if (!response.ok) {
+      throw new Error('Failed to register fields');
+    }
+    
+    return await response.json();
+  } catch (error) {
+    console.error('Error registering fields:', error);
+    return null;
+  }
+};
+
 /**
  * Send message to AI chatbot
  * @param {string} message - User message
@@ -60,6 +149,80 @@ export const sendChatMessage = async (message, fieldData = null) => {
   }
 };
 
+/**
+ * Parse one Server-Sent Event block ("event: ...\ndata: ...")
+ * @param {string} raw - Raw event text
+ * @returns {Object} Event type and parsed JSON data
+ */
+const parseSseEvent = (raw) => {
+  let type = 'message';
+  let data = '';
+  for (const line of raw.split('\n')) {
+    if (line.startsWith('event:')) {
+      type = line.slice(6).trim();
+    } else if (line.startsWith('data:')) {
+      data += line.slice(5).trim();
+    }
+  }
+  return { type, data: data ? JSON.parse(data) : {} };
+};
+
+/**
+ * Stream AI chatbot response token by token (Server-Sent Events)
+ * @param {string} message - User message
+ * @param {Object} fieldData - Optional field data for context
+ * @param {Function} onToken - Called with each received token
+ * @returns {Promise<string>} Full chatbot response
+ * @throws {Error} On failure; if the backend sent a fallback message, it is in error.fallback
+ */
+export const streamChatMessage = async (message, fieldData = null, onToken = () => {}) => {
+  const response = await fetch(`${API_BASE_URL}/chatbot/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({
+      message,
+      fieldData
+    })
+  });
+  
+  if (!response.ok || !response.body) {
+    throw new Error('Failed to stream chatbot response');
+  }
+  
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let text = '';
+  
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    
+    buffer += decoder.decode(value, { stream: true });
+    const events = buffer.split('\n\n');
+    buffer = events.pop();
+    
+    for (const raw of events) {
+      const event = parseSseEvent(raw);
+      if (event.type === 'token') {
+        text += event.data.token;
+        onToken(event.data.token);
+      } else if (event.type === 'fallback') {
+        // Provider failed; the fallback message replaces any partial answer
+        const error = new Error(event.data.message);
+        error.fallback = event.data.message;
+        throw error;
+      } else if (event.type === 'error') {
+        throw new Error(event.data.error);
+      }
+    }
+  }
+  
+  return text;
+};
+
 /**
  * Check if backend is available
  * @returns {Promise<boolean>} Backend health status
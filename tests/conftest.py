@@ -0,0 +1,67 @@
+"""
+Zajednička podešavanja testova
+
+Moduli su u korijenu repozitorija (nisu paket), pa se on dodaje na
+sys.path. Backend se uvozi sa lokalnim AI modelom i bez pozadinskih
+niti, tako da testovi ne zovu vanjske servise.
+"""
+
+import os
+import subprocess
+import sys
+from importlib.util import find_spec
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ['AI_MODEL'] = 'local'
+os.environ['AI_HEDGE_MODEL'] = ''
+os.environ['DATA_WATCH_ENABLED'] = 'false'
+os.environ['PREFETCH_ENABLED'] = 'false'
+os.environ.pop('RECOMMENDATION_CACHE_PATH', None)
+os.environ.pop('PREFETCH_FIELDS', None)
+
+
+@pytest.fixture
+def synthetic_grib():
+    """
+    Funkcija (putanja, rezolucija, korak) -> sintetički GRIB2 fajl
+
+    Fajl pravi benchmark_grib.make_synthetic_grib u posebnom procesu:
+    eccodes Python modul i pygrib učitani zajedno ruše interpreter pri
+    izlasku, pa testovi uvoze samo pygrib.
+    """
+    if find_spec('eccodes') is None or find_spec('pygrib') is None:
+        pytest.skip('potrebni su eccodes i pygrib')
+
+    def make(path, resolution=2.0, step=0):
+        code = f'from benchmark_grib import make_synthetic_grib; make_synthetic_grib({str(path)!r}, {resolution!r}, {step!r})'
+        subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+        return str(path)
+
+    return make
+
+
+class FakeClock:
+    """Ručno pomjerani sat za time.monotonic/time.time"""
+
+    def __init__(self, start=1000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    import time
+
+    fake = FakeClock()
+    monkeypatch.setattr(time, 'monotonic', fake)
+    monkeypatch.setattr(time, 'time', fake)
+    return fake
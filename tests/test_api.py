@@ -0,0 +1,67 @@
+"""Tests for request parsing and the batch field-data endpoint"""
+
+import json
+
+import pytest
+
+from ai_backend_with_llm import _parse_fields, app, ai_engine
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def test_parse_fields():
+    data = {'fields': [{'id': 'a', 'lat': '43.3', 'lon': 17.8}, {'lat': 44, 'lon': 18}]}
+    assert _parse_fields(data) == [
+        {'id': 'a', 'lat': 43.3, 'lon': 17.8},
+        {'id': None, 'lat': 44.0, 'lon': 18.0},
+    ]
+    assert _parse_fields(None) == []
+    assert _parse_fields({}) == []
+
+
+@pytest.mark.parametrize('data, error', [
+    ([1, 2], ValueError),
+    ({'fields': [1]}, ValueError),
+    ({'fields': ['x']}, ValueError),
+    ({'fields': 5}, TypeError),
+    ({'fields': [{'lat': 43}]}, KeyError),
+    ({'fields': [{'lat': 'north', 'lon': 17}]}, ValueError),
+])
+def test_parse_fields_rejects_bad_input(data, error):
+    with pytest.raises(error):
+        _parse_fields(data)
+
+
+@pytest.mark.parametrize('body', [[1, 2], {'fields': [1]}, {'fields': 5}, {'fields': [{'lat': 'x', 'lon': 1}]}])
+@pytest.mark.parametrize('endpoint', ['/api/field-data/batch', '/api/prefetch/fields'])
+def test_bad_payloads_get_400(client, endpoint, body):
+    response = client.post(endpoint, json=body)
+    assert response.status_code == 400
+    assert 'Invalid fields' in response.get_json()['error']
+
+
+def test_batch_streams_one_line_per_field(client, monkeypatch):
+    def field_data(lat, lon):
+        if lat > 50:
+            return None
+        return {
+            'temperature': 21.0, 'soilMoisture': 40.0, 'ndvi': 0.6, 'precipitation': 5.0,
+            'windSpeed': 3.0, 'cloudCover': 20, 'sunshineDuration': 8, 'vegetation': 70
+        }
+
+    monkeypatch.setattr(ai_engine, 'get_field_data', field_data)
+    fields = [{'id': 'a', 'lat': 43.34, 'lon': 17.80}, {'id': 'b', 'lat': 43.341, 'lon': 17.801},
+              {'id': 'c', 'lat': 60.0, 'lon': 17.8}]
+
+    response = client.post('/api/field-data/batch', json={'fields': fields})
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.mimetype == 'application/x-ndjson'
+    by_id = {line['id']: line for line in lines}
+    assert sorted(by_id) == ['a', 'b', 'c']
+    assert by_id['a']['index'] == 0 and by_id['c']['index'] == 2
+    assert by_id['a']['temperature'] == 21.0
+    assert by_id['c']['error'] == 'No data available'
@@ -0,0 +1,83 @@
+"""Tests for TTLCache and WeatherCache"""
+
+import pytest
+
+from ai_backend_with_llm import TTLCache, WeatherCache
+
+
+def test_get_returns_value_until_ttl_expires(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('a', 1)
+    clock.advance(59)
+    assert cache.get('a') == 1
+    clock.advance(2)
+    assert cache.get('a') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_per_entry_ttl_overrides_default(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('short', 1, ttl=5)
+    cache.set('long', 2)
+    clock.advance(10)
+    assert cache.get('short') is None
+    assert cache.get('long') == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_overwrite_refreshes_ttl_and_recency(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    clock.advance(50)
+    cache.set('a', 10)
+    cache.set('c', 3)
+    clock.advance(20)
+    assert cache.get('a') == 10
+    assert cache.get('b') is None
+
+
+def test_stats_count_hits_and_misses(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('missing')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hitRatio']) == (1, 1, 0.5)
+
+
+def test_items_and_pop(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=5)
+    clock.advance(10)
+    assert [(key, remaining, value) for key, remaining, value in cache.items()] == [('a', 50, 1)]
+    assert cache.pop('a') == 1
+    assert cache.pop('a') is None
+
+
+@pytest.mark.parametrize('lat, lon, cell', [
+    (43.3438, 17.8078, (43.35, 17.8)),
+    (43.3301, 17.8249, (43.35, 17.8)),
+    (-0.01, -0.02, (-0.0, -0.0)),
+])
+def test_weather_cells_snap_to_grid(monkeypatch, lat, lon, cell):
+    monkeypatch.setenv('WEATHER_CACHE_CELL', '0.05')
+    assert WeatherCache().cell(lat, lon) == pytest.approx(cell)
+
+
+def test_weather_cache_ttls_come_from_env(monkeypatch):
+    monkeypatch.setenv('WEATHER_CACHE_CURRENT_TTL', '30')
+    monkeypatch.setenv('WEATHER_CACHE_FORECAST_TTL', '90')
+    cache = WeatherCache()
+    assert (cache.current.ttl, cache.forecast.ttl) == (30, 90)
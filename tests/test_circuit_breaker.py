@@ -0,0 +1,100 @@
+"""Tests for CircuitBreaker state transitions"""
+
+import pytest
+
+from ai_backend_with_llm import CircuitBreaker
+
+
+@pytest.fixture
+def breaker(monkeypatch, clock):
+    for key, value in {'ERROR_RATE': '0.5', 'WINDOW': '10', 'MIN_CALLS': '4', 'OPEN_SECONDS': '30'}.items():
+        monkeypatch.setenv(f'BREAKER_{key}', value)
+    return CircuitBreaker('test', slow_call=2)
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        assert breaker.allow()
+        breaker.record(False, 0.1)
+
+
+def test_stays_closed_below_min_calls(breaker):
+    fail(breaker, 3)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_opens_at_error_rate_and_rejects(breaker):
+    breaker.record(True, 0.1)
+    breaker.record(True, 0.1)
+    fail(breaker, 2)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_slow_calls_count_as_failures(breaker):
+    for _ in range(4):
+        breaker.record(True, 5.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_probe_success_closes(breaker, clock):
+    fail(breaker, 4)
+    clock.advance(31)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()['recentCalls'] == 0
+
+
+def test_half_open_probe_failure_reopens(breaker, clock):
+    fail(breaker, 4)
+    clock.advance(31)
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.advance(29)
+    assert not breaker.allow()
+
+
+def test_lost_probe_is_replaced(breaker, clock):
+    fail(breaker, 4)
+    clock.advance(31)
+    assert breaker.allow()
+    clock.advance(31)
+    assert breaker.allow()
+
+
+def test_outcomes_while_open_are_ignored(breaker):
+    fail(breaker, 4)
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_trip_opens_for_the_given_time(breaker, clock):
+    breaker.trip(5)
+    assert not breaker.allow()
+    clock.advance(6)
+    assert breaker.allow()
+
+
+def test_only_the_last_window_of_calls_counts(breaker):
+    for _ in range(10):
+        breaker.record(True, 0.1)
+    fail(breaker, 4)
+    assert breaker.state == CircuitBreaker.CLOSED
+    # 5 of the last 10 failed, although only 5 of all 15 did
+    fail(breaker, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_provider_settings_override_global(monkeypatch):
+    monkeypatch.setenv('BREAKER_SLOW_CALL', '5')
+    monkeypatch.setenv('GROQ_BREAKER_SLOW_CALL', '1.5')
+    assert CircuitBreaker('groq').slow_call == 1.5
+    assert CircuitBreaker('openai').slow_call == 5
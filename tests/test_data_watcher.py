@@ -0,0 +1,111 @@
+"""Tests for FarmDataWatcher change detection and background reloads"""
+
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ai_backend_with_llm import AgriculturalAI, FarmDataWatcher
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('FARM_DATA_DIR', str(tmp_path))
+    monkeypatch.setenv('DATA_WATCH_ENABLED', 'false')
+    write(tmp_path / 'farm_data_1.json', {'current_weather': {'temperature': 20}})
+    write(tmp_path / 'farm_data_1.csv', 'time,temperature\n2025-11-08,20\n')
+    return tmp_path
+
+
+@pytest.fixture
+def watcher(data_dir):
+    reads = []
+
+    def read_data_files(json_file=None, csv_file=None):
+        reads.append((json_file and os.path.basename(json_file), csv_file and os.path.basename(csv_file)))
+        return AgriculturalAI.read_data_files(None, json_file, csv_file)
+
+    engine = SimpleNamespace(data_cache={}, read_data_files=read_data_files)
+    watcher = FarmDataWatcher(engine)
+    watcher.cube_path = None
+    watcher.reads = reads
+    return watcher
+
+
+def write(path, content, age=10):
+    path.write_text(content if isinstance(content, str) else json.dumps(content), encoding='utf-8')
+    # Older than DATA_WATCH_SETTLE, and distinct ctimes/mtimes per write
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+
+
+def test_initial_check_loads_both_kinds(watcher):
+    assert watcher.check()
+    assert watcher.reads == [('farm_data_1.json', 'farm_data_1.csv')]
+    assert watcher.engine.data_cache['json']['current_weather']['temperature'] == 20
+    assert not watcher.check()
+
+
+def test_only_the_changed_kind_is_read_again(watcher, data_dir):
+    watcher.check()
+    json_data = watcher.engine.data_cache['json']
+
+    write(data_dir / 'farm_data_1.csv', 'time,temperature\n2025-11-08,25\n', age=5)
+    assert watcher.check()
+
+    assert watcher.reads[-1] == (None, 'farm_data_1.csv')
+    assert watcher.engine.data_cache['json'] is json_data
+    assert watcher.engine.data_cache['csv'][0]['temperature'] == '25'
+
+
+def test_a_newer_file_replaces_the_old_one(watcher, data_dir):
+    watcher.check()
+    time.sleep(0.01)
+    write(data_dir / 'farm_data_2.json', {'current_weather': {'temperature': 30}}, age=5)
+
+    assert watcher.check()
+    assert watcher.engine.data_cache['json_file'].endswith('farm_data_2.json')
+    assert watcher.engine.data_cache['csv_file'].endswith('farm_data_1.csv')
+
+
+def test_unparsable_file_keeps_the_previous_data(watcher, data_dir):
+    watcher.check()
+    old = watcher.engine.data_cache
+    write(data_dir / 'farm_data_1.json', '{broken', age=5)
+
+    assert not watcher.check()
+    assert watcher.engine.data_cache is old
+    assert watcher.errors == 1
+    # Not retried until the file changes again
+    assert not watcher.check()
+    assert watcher.errors == 1
+
+
+def test_files_still_being_written_are_not_loaded(watcher, data_dir):
+    watcher.check()
+    write(data_dir / 'farm_data_1.csv', 'time,temperature\n', age=0)
+    assert not watcher.check(settle=60)
+
+
+def test_reload_requests_share_one_worker(watcher):
+    started, release = threading.Event(), threading.Event()
+    passes = []
+
+    def slow_reload():
+        passes.append(1)
+        started.set()
+        release.wait(5)
+
+    watcher.reload = slow_reload
+    first = watcher.reload_async()
+    assert started.wait(5)
+    threads = [watcher.reload_async() for _ in range(10)]
+    release.set()
+    first.join(5)
+
+    assert all(thread is first for thread in threads)
+    assert len(passes) == 2
+    assert watcher._reload_thread is None
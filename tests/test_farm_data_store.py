@@ -0,0 +1,140 @@
+"""Testovi za FarmDataStore - upis, čitanje, potvrđeni redovi i oporavak"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from grib_processor import FarmDataStore
+
+CYCLE = '2025110712'
+
+
+def batch(n_farms=3, keys=('temperatura_2m', 'padavine'), offset=0.0):
+    values = np.arange(n_farms * len(keys), dtype=np.float64).reshape(n_farms, len(keys)) + offset
+    return {
+        'lat': np.linspace(43.0, 44.0, n_farms),
+        'lon': np.linspace(17.0, 18.0, n_farms),
+        'keys': list(keys),
+        'values': values
+    }
+
+
+def test_append_batch_round_trip(tmp_path):
+    with FarmDataStore(str(tmp_path)) as store:
+        store.append_batch(CYCLE, batch(), step=6)
+
+    data = FarmDataStore(str(tmp_path)).read(CYCLE)
+    assert len(data['value']) == 6
+    assert data['variable'].tolist() == ['temperatura_2m', 'padavine'] * 3
+    assert data['value'].tolist() == list(range(6))
+    assert set(data['step'].tolist()) == {6}
+    np.testing.assert_allclose(data['lat'], np.repeat([43.0, 43.5, 44.0], 2), rtol=1e-6)
+
+
+def test_read_filters_columns_and_variables(tmp_path):
+    with FarmDataStore(str(tmp_path)) as store:
+        store.append_batch(CYCLE, batch())
+
+    data = FarmDataStore(str(tmp_path)).read(CYCLE, columns=['value'], variables=['padavine'])
+    assert list(data) == ['value']
+    assert data['value'].tolist() == [1, 3, 5]
+
+
+def test_nothing_is_visible_before_flush(tmp_path):
+    store = FarmDataStore(str(tmp_path))
+    store.append_batch(CYCLE, batch())
+    assert len(FarmDataStore(str(tmp_path)).read(CYCLE)['value']) == 0
+
+    store.flush()
+    assert len(FarmDataStore(str(tmp_path)).read(CYCLE)['value']) == 6
+
+
+def test_buffer_flushes_at_batch_size(tmp_path):
+    store = FarmDataStore(str(tmp_path), batch_size=4)
+    store.append_batch(CYCLE, batch())
+    assert json.loads((tmp_path / f'cycle={CYCLE}' / 'rows.json').read_text())['rows'] == 6
+
+
+def test_writers_share_variable_codes(tmp_path):
+    # Drugi pisac ne zna šifre prvog - šifre se dodjeljuju pri flush-u
+    first, second = FarmDataStore(str(tmp_path)), FarmDataStore(str(tmp_path))
+    first.append_batch(CYCLE, batch(keys=('a', 'b')))
+    second.append_batch(CYCLE, batch(keys=('b', 'c')))
+    first.flush()
+    second.flush()
+
+    data = FarmDataStore(str(tmp_path)).read(CYCLE)
+    assert data['variable'].tolist() == ['a', 'b'] * 3 + ['b', 'c'] * 3
+    assert data['value'].tolist() == list(range(6)) * 2
+
+
+def test_interrupted_flush_is_ignored_and_truncated(tmp_path):
+    with FarmDataStore(str(tmp_path)) as store:
+        store.append_batch(CYCLE, batch())
+
+    # Prekinut flush: dio redova dopisan u neke kolone, rows.json nije ažuriran
+    partition = tmp_path / f'cycle={CYCLE}'
+    with open(partition / 'value.f4', 'ab') as f:
+        np.arange(5, dtype='<f4').tofile(f)
+    with open(partition / 'lat.f4', 'ab') as f:
+        np.arange(2, dtype='<f4').tofile(f)
+
+    assert len(FarmDataStore(str(tmp_path)).read(CYCLE)['value']) == 6
+
+    with FarmDataStore(str(tmp_path)) as store:
+        store.append_batch(CYCLE, batch(offset=100))
+
+    data = FarmDataStore(str(tmp_path)).read(CYCLE)
+    assert data['value'].tolist() == list(range(6)) + list(range(100, 106))
+    for name, dtype in FarmDataStore.COLUMNS.items():
+        assert os.path.getsize(partition / f'{name}.{dtype[1:]}') == 12 * int(dtype[2:])
+
+
+def test_partition_without_rows_file_uses_shortest_column(tmp_path):
+    with FarmDataStore(str(tmp_path)) as store:
+        store.append_batch(CYCLE, batch())
+
+    partition = tmp_path / f'cycle={CYCLE}'
+    os.remove(partition / 'rows.json')
+    with open(partition / 'step.i2', 'ab') as f:
+        np.zeros(3, dtype='<i2').tofile(f)
+
+    assert len(FarmDataStore(str(tmp_path)).read(CYCLE)['value']) == 6
+
+
+def test_cycles_and_missing_cycle(tmp_path):
+    store = FarmDataStore(str(tmp_path))
+    assert store.cycles() == []
+    store.append_batch(CYCLE, batch())
+    store.append_batch('2025110800', batch())
+    store.flush()
+
+    assert store.cycles() == ['2025110712', '2025110800']
+    assert len(store.read('2025110900')['value']) == 0
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='fork i fcntl zaključavanje')
+def test_concurrent_writers_keep_columns_aligned(tmp_path):
+    import multiprocessing
+
+    def write(i):
+        with FarmDataStore(str(tmp_path), batch_size=10) as store:
+            for _ in range(20):
+                store.append_batch(CYCLE, batch(keys=(f'v{i}',), offset=i))
+
+    ctx = multiprocessing.get_context('fork')
+    workers = [ctx.Process(target=write, args=(i,)) for i in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+        assert p.exitcode == 0
+
+    data = FarmDataStore(str(tmp_path)).read(CYCLE)
+    assert len(data['value']) == 4 * 20 * 3
+    for i in range(4):
+        mask = data['variable'] == f'v{i}'
+        assert mask.sum() == 60
+        assert set(data['value'][mask].tolist()) == {i, i + 1, i + 2}
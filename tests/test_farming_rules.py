@@ -0,0 +1,52 @@
+"""Testovi za pravila za poljoprivredu i regionalne alert rastere"""
+
+import numpy as np
+import pytest
+
+import grib_processor as gp
+from test_regional_cube import write_cube
+
+
+def test_regional_alerts_for_cells_and_farms(tmp_path):
+    hot = np.stack([np.full((10, 12), 36.0), np.zeros((10, 12)), np.full((10, 12), 30.0)])
+    mild = np.stack([np.full((10, 12), 20.0), np.full((10, 12), 60.0), np.zeros((10, 12))])
+    paths = [write_cube(tmp_path / 'f006', mild, step=6), write_cube(tmp_path / 'f000', hot, step=0)]
+
+    result = gp.compute_regional_alerts(paths, coords=[[44.0, 18.0], [50.0, 18.0]])
+
+    assert result['steps'].tolist() == [0, 6]
+    assert result['alerts']['ekstremna_vrucina'][0].all()
+    assert not result['alerts']['visoka_temperatura'].any()
+    assert result['alerts']['oluja'][0].all()
+    assert result['alerts']['jaka_kisa'][1].all()
+    assert result['outside'].tolist() == [False, True]
+    assert result['farms'][1] is None
+    assert gp.ALERT_MESSAGES['ekstremna_vrucina'] in result['farms'][0][0]
+
+
+@pytest.mark.parametrize('key, value, expected', [
+    ('temperatura_2m', -1, 'mraz'),
+    ('temperatura_2m', 3, 'niska_temperatura'),
+    ('temperatura_2m', 32, 'visoka_temperatura'),
+    ('temperatura_2m', 36, 'ekstremna_vrucina'),
+    ('padavine', 25, 'znacajne_padavine'),
+    ('padavine', 51, 'jaka_kisa'),
+    ('brzina_vjetra', 16, 'jak_vjetar'),
+    ('brzina_vjetra', 26, 'oluja'),
+])
+def test_first_matching_rule_wins(key, value, expected):
+    alerts = gp.interpret_weather_grid({key: np.array([value])})
+    assert [name for name, raster in alerts.items() if raster[0]] == [expected]
+
+
+def test_every_rule_is_reachable():
+    values = {
+        'temperatura_2m': np.array([-1, 3, 20, 32, 36]),
+        'padavine': np.array([0, 25, 51]),
+        'brzina_vjetra': np.array([16, 26]),
+        'vlaznost_tla': np.array([0.1, 0.4]),
+        'solarna_radijacija': np.array([100, 900]),
+    }
+    alerts = gp.interpret_weather_grid(values)
+    assert set(alerts) == set(gp.ALERT_MESSAGES)
+    assert all(raster.any() for raster in alerts.values())
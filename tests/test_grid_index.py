@@ -0,0 +1,97 @@
+"""Testovi za GridIndex - najbliže tačke, bilinearne težine, omotavanje i polovi"""
+
+import numpy as np
+import pytest
+
+from grib_processor import GridIndex
+
+
+@pytest.fixture
+def global_grid():
+    # GFS 1°: od sjevernog pola prema jugu, 0..359° istočno
+    return GridIndex(90.0, 0.0, -1.0, 1.0, 181, 360)
+
+
+@pytest.fixture
+def regional_grid():
+    # Balkan 0.25°, bez omotavanja
+    return GridIndex(46.0, 15.0, -0.25, 0.25, 17, 17)
+
+
+def test_nearest_matches_argmin(global_grid):
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(-90, 90, 200)
+    lons = rng.uniform(-180, 360, 200)
+    grid_lats = 90.0 - np.arange(181)
+    grid_lons = np.arange(360.0)
+
+    rows, cols = np.divmod(global_grid.nearest(lats, lons), 360)
+
+    expected_rows = np.abs(grid_lats[None, :] - lats[:, None]).argmin(axis=1)
+    lon_distance = np.abs((grid_lons[None, :] - lons[:, None] + 180) % 360 - 180)
+    expected_cols = lon_distance.argmin(axis=1)
+    np.testing.assert_array_equal(rows, expected_rows)
+    np.testing.assert_array_equal(cols, expected_cols)
+
+
+def test_global_grid_wraps_around_longitude(global_grid):
+    # -0.4° je najbliže 0°, 359.6° takođe, a -1° je kolona 359
+    cols = global_grid.nearest([0, 0, 0], [-0.4, 359.6, -1.0]) % 360
+    assert cols.tolist() == [0, 0, 359]
+
+
+def test_global_bilinear_crosses_the_antimeridian(global_grid):
+    indices, weights = global_grid.bilinear([0.0], [359.5])
+    cols = sorted(set((indices[0] % 360).tolist()))
+    assert cols == [0, 359]
+    assert weights.sum() == pytest.approx(1.0)
+
+
+def test_poles_are_clamped_to_edge_rows(global_grid):
+    rows = global_grid.nearest([90.0, 95.0, -90.0, -95.0], [0, 0, 0, 0]) // 360
+    assert rows.tolist() == [0, 0, 180, 180]
+
+    indices, weights = global_grid.bilinear([90.0, -90.0], [10.0, 10.0])
+    assert np.all(indices // 360 <= 180)
+    np.testing.assert_allclose(weights.sum(axis=1), 1.0)
+
+
+def test_regional_grid_does_not_wrap(regional_grid):
+    # Zapadno od regiona je prva kolona, a ne zadnja
+    cols = regional_grid.nearest([44.0, 44.0], [10.0, 25.0]) % 17
+    assert cols.tolist() == [0, 16]
+    assert not regional_grid.is_global
+
+
+def test_bilinear_interpolates_a_linear_field(regional_grid):
+    lats = 46.0 - 0.25 * np.arange(17)
+    lons = 15.0 + 0.25 * np.arange(17)
+    field = 2 * lats[:, None] + 3 * lons[None, :]
+
+    points = ([43.3438, 44.1], [17.8078, 18.63])
+    indices, weights = regional_grid.bilinear(*points)
+    values = regional_grid.interpolate(field, indices, weights)
+
+    np.testing.assert_allclose(values, 2 * np.array(points[0]) + 3 * np.array(points[1]))
+
+
+def test_point_matches_vectorized_lookup(regional_grid):
+    field = np.arange(17 * 17, dtype=np.float64).reshape(17, 17)
+    for lat, lon in [(43.3438, 17.8078), (46.0, 15.0), (42.0, 19.0)]:
+        nearest = regional_grid.sample(field, regional_grid.nearest([lat], [lon]))[0]
+        assert sum(field[r, c] * w for r, c, w in regional_grid.point(lat, lon)) == nearest
+
+        indices, weights = regional_grid.bilinear([lat], [lon])
+        bilinear = regional_grid.interpolate(field, indices, weights)[0]
+        point = sum(field[r, c] * w for r, c, w in regional_grid.point(lat, lon, interpolate=True))
+        assert point == pytest.approx(bilinear)
+
+
+def test_instances_are_cached_per_grid_definition():
+    assert GridIndex.get(90, 0, -1, 1, 181, 360) is GridIndex.get(90.0, 0.0, -1.0, 1.0, 181, 360)
+    assert GridIndex.get(90, 0, -1, 1, 181, 360) is not GridIndex.get(90, 0, -0.5, 0.5, 361, 720)
+
+
+def test_from_coords_reads_direction():
+    grid = GridIndex.from_coords(np.array([46.0, 45.75, 45.5]), np.array([15.0, 15.25, 15.5]))
+    assert (grid.lat0, grid.dlat, grid.dlon, grid.shape) == (46.0, -0.25, 0.25, (3, 3))
@@ -0,0 +1,73 @@
+"""Testovi za indeks GRIB poruka (.msgidx.json) i direktno čitanje poruka"""
+
+import json
+import os
+
+import pytest
+
+import grib_processor as gp
+from benchmark_grib import SYNTHETIC_MESSAGES
+
+
+@pytest.fixture
+def grib_file(tmp_path, synthetic_grib):
+    return synthetic_grib(tmp_path / 'gfs.t12z.pgrb2.2p00.f006', resolution=2.0, step=6)
+
+
+def test_scan_finds_every_message(grib_file):
+    positions = gp.scan_grib_messages(grib_file)
+    assert len(positions) == len(SYNTHETIC_MESSAGES)
+    offset, length = positions[-1]
+    assert offset + length == os.path.getsize(grib_file)
+
+
+def test_index_is_saved_and_reused(grib_file, monkeypatch):
+    index = gp.load_message_index(grib_file)
+    assert os.path.exists(grib_file + gp.MESSAGE_INDEX_SUFFIX)
+    assert {rec['step'] for rec in index} <= {0, 6}
+
+    def rebuild(_):
+        raise AssertionError('indeks je trebao biti učitan iz sidecar fajla')
+
+    monkeypatch.setattr(gp, 'build_message_index', rebuild)
+    assert gp.load_message_index(grib_file) == index
+
+
+def test_index_is_rebuilt_when_the_file_changes(grib_file):
+    gp.load_message_index(grib_file)
+    stat = os.stat(grib_file)
+    os.utime(grib_file, (stat.st_atime, stat.st_mtime + 10))
+
+    gp.load_message_index(grib_file)
+    with open(grib_file + gp.MESSAGE_INDEX_SUFFIX, encoding='utf-8') as f:
+        assert json.load(f)['mtime'] == os.stat(grib_file).st_mtime
+
+
+def test_corrupt_index_is_rebuilt(grib_file):
+    with open(grib_file + gp.MESSAGE_INDEX_SUFFIX, 'w', encoding='utf-8') as f:
+        f.write('{nije json')
+    assert len(gp.load_message_index(grib_file)) == len(SYNTHETIC_MESSAGES)
+
+
+def test_read_message_seeks_to_the_selected_record(grib_file):
+    index = gp.load_message_index(grib_file)
+    rec = gp.select_messages(index, name='2 metre temperature')[0]
+
+    grb = gp.read_message(grib_file, rec)
+    assert grb.name == '2 metre temperature'
+    assert grb.values.shape == (91, 180)
+
+
+def test_empty_file_has_no_messages(tmp_path):
+    empty = tmp_path / 'empty.grib2'
+    empty.write_bytes(b'')
+    assert gp.scan_grib_messages(str(empty)) == []
+
+
+def test_filename_step_and_sort_key():
+    assert gp.filename_step('gfs.t12z.pgrb2.0p25.f003') == 3
+    assert gp.filename_step('gfs.t12z.pgrb2.0p25.f120.grib2') == 120
+    assert gp.filename_step('forecast.grib2') is None
+
+    files = ['b.grib2', 'x.f012', 'x.f003', 'a.grib2']
+    assert sorted(files, key=gp._filename_sort_key) == ['x.f003', 'x.f012', 'a.grib2', 'b.grib2']
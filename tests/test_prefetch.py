@@ -0,0 +1,64 @@
+"""Tests for FieldPrefetcher registration limits and expiry"""
+
+import pytest
+
+from ai_backend_with_llm import FieldPrefetcher, PrefetchLimitError, ai_engine, app
+
+
+@pytest.fixture
+def prefetcher(monkeypatch, clock):
+    monkeypatch.setenv('PREFETCH_ENABLED', 'true')
+    monkeypatch.setenv('PREFETCH_MAX_CELLS', '3')
+    monkeypatch.setenv('PREFETCH_REGISTRATION_TTL', '100')
+    monkeypatch.setenv('PREFETCH_FIELDS', '43.3438,17.8078')
+    return FieldPrefetcher(ai_engine)
+
+
+def test_fields_in_one_cell_register_once(prefetcher):
+    assert prefetcher.register([(44.0, 18.0), (44.001, 18.001)]) == 1
+    assert prefetcher.register([(44.0, 18.0)]) == 0
+    assert len(prefetcher.cells) == 2
+
+
+def test_registration_over_the_cap_is_rejected_whole(prefetcher):
+    with pytest.raises(PrefetchLimitError):
+        prefetcher.register([(44.0, 18.0), (45.0, 19.0), (46.0, 20.0)])
+    assert len(prefetcher.cells) == 1
+
+    assert prefetcher.register([(44.0, 18.0), (45.0, 19.0)]) == 2
+
+
+def test_unused_registrations_expire(prefetcher, clock):
+    prefetcher.register([(44.0, 18.0), (45.0, 19.0)])
+    clock.advance(60)
+    prefetcher.register([(44.0, 18.0)])
+    clock.advance(60)
+
+    # 45/19 is stale and frees its slot; the PREFETCH_FIELDS cell never expires
+    assert prefetcher.register([(46.0, 20.0)]) == 1
+    assert prefetcher.expired == 1
+    cell = ai_engine.weather_cache.cell
+    assert set(prefetcher.cells) == {cell(43.3438, 17.8078), cell(44.0, 18.0), cell(46.0, 20.0)}
+
+
+def test_snapshot_reads_keep_a_registration_alive(prefetcher, clock):
+    prefetcher.register([(44.0, 18.0)])
+    cell = ai_engine.weather_cache.cell(44.0, 18.0)
+    prefetcher.snapshots[cell] = (clock(), {'temperature': 20})
+
+    clock.advance(90)
+    assert prefetcher.snapshot(44.0, 18.0)['temperature'] == 20
+    clock.advance(90)
+    with prefetcher._lock:
+        prefetcher._expire(clock())
+    assert cell in prefetcher.cells
+
+
+def test_endpoint_returns_413_over_the_cap(monkeypatch):
+    monkeypatch.setattr(ai_engine.prefetcher, 'max_cells', len(ai_engine.prefetcher.cells) + 1)
+    client = app.test_client()
+    fields = [{'lat': 40.0 + i, 'lon': 18.0} for i in range(2)]
+
+    response = client.post('/api/prefetch/fields', json={'fields': fields})
+    assert response.status_code == 413
+    assert response.get_json()['maxCells'] == ai_engine.prefetcher.max_cells
@@ -0,0 +1,90 @@
+"""Tests for RecommendationCache keys, persistence and debounced saving"""
+
+import json
+
+import pytest
+
+from ai_backend_with_llm import RecommendationCache
+
+FIELD = {
+    'temperature': 21.2, 'soilMoisture': 41.0, 'ndvi': 0.61, 'precipitation': 4.9,
+    'windSpeed': 3.2, 'status': 'good', 'priority': 'low', 'analysis': {'ndviLevel': 'high'}
+}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.delenv('RECOMMENDATION_CACHE_PATH', raising=False)
+    monkeypatch.delenv('RECOMMENDATION_CACHE_QUANTIZATION', raising=False)
+    return RecommendationCache()
+
+
+@pytest.fixture
+def persistent(monkeypatch, tmp_path):
+    path = tmp_path / 'recommendations.json'
+    monkeypatch.setenv('RECOMMENDATION_CACHE_PATH', str(path))
+    monkeypatch.setenv('RECOMMENDATION_CACHE_SAVE_INTERVAL', '3600')
+    return path
+
+
+def test_values_in_the_same_bucket_share_a_key(cache):
+    nearby = {**FIELD, 'temperature': 20.9, 'ndvi': 0.62, 'soilMoisture': 40.2}
+    assert cache.key(nearby, 'groq') == cache.key(FIELD, 'groq')
+
+
+def test_key_changes_across_buckets_models_and_categories(cache):
+    key = cache.key(FIELD, 'groq')
+    assert cache.key({**FIELD, 'temperature': 22.6}, 'groq') != key
+    assert cache.key(FIELD, 'openai') != key
+    assert cache.key({**FIELD, 'status': 'critical'}, 'groq') != key
+    assert cache.key({**FIELD, 'analysis': {'ndviLevel': 'low'}}, 'groq') != key
+
+
+def test_unknown_fields_do_not_affect_the_key(cache):
+    assert cache.key({**FIELD, 'id': 7, 'lat': 44.1}, 'groq') == cache.key(FIELD, 'groq')
+
+
+def test_quantization_can_be_overridden(monkeypatch):
+    monkeypatch.setenv('RECOMMENDATION_CACHE_QUANTIZATION', 'temperature=0.1')
+    cache = RecommendationCache()
+    assert cache.key({**FIELD, 'temperature': 20.9}, 'groq') != cache.key(FIELD, 'groq')
+
+
+def test_get_returns_advice_and_model(cache):
+    key = cache.key(FIELD, 'groq')
+    cache.set(key, 'Water 10 mm', 'groq')
+    assert cache.get(key) == ('Water 10 mm', 'groq')
+
+
+def test_set_does_not_write_until_flush(persistent):
+    cache = RecommendationCache()
+    cache.set('k', 'advice', 'groq')
+    assert not persistent.exists()
+    assert cache.stats()['unsaved']
+
+    cache.flush()
+    assert json.loads(persistent.read_text())['k']['advice'] == 'advice'
+    assert cache.stats()['saves'] == 1
+    assert not cache.stats()['unsaved']
+
+    cache.flush()
+    assert cache.stats()['saves'] == 1
+
+
+def test_saved_entries_are_loaded_until_they_expire(persistent, clock):
+    cache = RecommendationCache()
+    cache.set('k', 'advice', 'groq')
+    cache.flush()
+
+    assert RecommendationCache().get('k') == ('advice', 'groq')
+    clock.advance(cache.cache.ttl + 1)
+    assert RecommendationCache().get('k') is None
+
+
+def test_failed_save_keeps_the_cache_dirty(persistent, tmp_path):
+    cache = RecommendationCache()
+    cache.path = str(tmp_path / 'missing' / 'recommendations.json')
+    cache.set('k', 'advice', 'groq')
+    cache.flush()
+    assert cache.stats()['unsaved']
+    cache.path = None  # Nothing left for the exit-time flush
@@ -0,0 +1,88 @@
+"""Testovi za RegionalCube - upiti po tački, tačke van regiona i zamjena kocke"""
+
+import json
+
+import numpy as np
+import pytest
+
+import grib_processor as gp
+
+BBOX = (42.0, 46.5, 15.0, 20.5)
+KEYS = ['temperatura_2m', 'padavine', 'brzina_vjetra']
+
+
+def write_cube(path, values, step=0):
+    """Kocka 0.5° preko BBOX-a (sjever -> jug), kao što je piše ingest_regional_cube"""
+    nlat, nlon = values.shape[1:]
+    np.save(str(path) + '.npy', values.astype(np.float32))
+    header = {
+        'source': 'test', 'cycle': '2025110712', 'step': step, 'bbox': list(BBOX),
+        'lat0': 46.5, 'lon0': 15.0, 'dlat': -0.5, 'dlon': 0.5, 'nlat': nlat, 'nlon': nlon,
+        'keys': KEYS, 'names': KEYS, 'units': ['°C', 'mm', 'm/s']
+    }
+    with open(str(path) + '.json', 'w', encoding='utf-8') as f:
+        json.dump(header, f)
+    return str(path)
+
+
+def linear_field(a, b, c):
+    lats = 46.5 - 0.5 * np.arange(10)
+    lons = 15.0 + 0.5 * np.arange(12)
+    return a + b * lats[:, None] + c * lons[None, :]
+
+
+@pytest.fixture
+def cube_path(tmp_path):
+    values = np.stack([linear_field(0, 1, 0), linear_field(0, 0, 1), np.full((10, 12), 5.0)])
+    return write_cube(tmp_path / 'cube', values)
+
+
+def test_query_returns_all_variables(cube_path):
+    cube = gp.RegionalCube(cube_path)
+    result = cube.query(44.0, 18.0)
+    assert result == pytest.approx({'temperatura_2m': 44.0, 'padavine': 18.0, 'brzina_vjetra': 5.0})
+
+
+def test_query_interpolates_between_cells(cube_path):
+    result = gp.RegionalCube(cube_path, in_memory=True).query(43.3438, 17.8078, interpolate=True)
+    assert result['temperatura_2m'] == pytest.approx(43.3438, abs=1e-4)
+    assert result['padavine'] == pytest.approx(17.8078, abs=1e-4)
+
+
+def test_points_outside_the_region(cube_path):
+    cube = gp.RegionalCube(cube_path)
+    assert cube.query(48.0, 18.0) is None
+    assert cube.query(44.0, 21.0) is None
+
+    values = cube.query_many([44.0, 48.0, 44.0], [18.0, 18.0, 10.0])
+    assert values[0].tolist() == pytest.approx([44.0, 18.0, 5.0])
+    assert np.isnan(values[1:]).all()
+
+
+def test_query_many_matches_query(cube_path):
+    cube = gp.RegionalCube(cube_path)
+    lats, lons = [42.1, 43.3438, 46.4], [15.1, 17.8078, 20.4]
+    for interpolate in (False, True):
+        values = cube.query_many(lats, lons, interpolate=interpolate)
+        for row, lat, lon in zip(values, lats, lons):
+            assert row.tolist() == pytest.approx(list(cube.query(lat, lon, interpolate).values()))
+
+
+def test_header_that_does_not_match_the_data_is_rejected(tmp_path):
+    path = write_cube(tmp_path / 'cube', np.zeros((3, 10, 12)))
+    np.save(path + '.npy', np.zeros((3, 4, 4), dtype=np.float32))
+    with pytest.raises(ValueError):
+        gp.RegionalCube(path)
+
+
+def test_ingest_replaces_the_cube_for_open_readers(tmp_path, synthetic_grib):
+    out = str(tmp_path / 'cube' / 'regional')
+    gp.ingest_regional_cube(synthetic_grib(tmp_path / 'a.f000', 1.0, step=0), out)
+    reader = gp.RegionalCube(out)
+    before = reader.query(44.0, 18.0)
+
+    gp.ingest_regional_cube(synthetic_grib(tmp_path / 'b.f006', 1.0, step=6), out)
+
+    assert reader.query(44.0, 18.0) == before
+    assert gp.RegionalCube(out).header['step'] == 6
+    assert sorted(p.name for p in (tmp_path / 'cube').iterdir()) == ['regional.json', 'regional.npy']
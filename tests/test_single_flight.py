@@ -0,0 +1,84 @@
+"""Tests for SingleFlight call coalescing"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ai_backend_with_llm import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch(x):
+        calls.append(x)
+        release.wait(5)
+        return x * 2
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flight.do, 'key', fetch, 21) for _ in range(8)]
+        while flight.executed + flight.coalesced < 8:
+            pass
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert results == [42] * 8
+    assert calls == [21]
+    assert flight.stats() == {'executed': 1, 'coalesced': 7, 'inFlight': 0}
+
+
+def test_exception_is_shared_and_key_is_released():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError('upstream down')
+
+    with pytest.raises(RuntimeError):
+        flight.do('key', fail)
+    assert flight.do('key', lambda: 'ok') == 'ok'
+    assert flight.executed == 2
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    assert flight.coalesced == 0
+
+
+def test_coroutines_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x + 1
+
+    async def main():
+        return await asyncio.gather(*(flight.ado('key', fetch, 1) for _ in range(5)))
+
+    assert asyncio.run(main()) == [2] * 5
+    assert calls == [1]
+    assert flight.stats() == {'executed': 1, 'coalesced': 4, 'inFlight': 0}
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return 'done'
+
+    async def main():
+        first = asyncio.ensure_future(flight.ado('key', fetch))
+        second = asyncio.ensure_future(flight.ado('key', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 'done'